@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve this (e.g. `uvicorn config.asgi:application`) for the /api/events/
+stream: each open stream is then an idle coroutine. The WSGI app answers
+that endpoint with 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
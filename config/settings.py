@@ -10,14 +10,55 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
-# Webhook secret (set in environment in production)
-WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET', 'change-this-in-prod')
+from django.core.exceptions import ImproperlyConfigured
+
+# Webhook signing secrets per source (resumes/webhooks.py), from
+# WEBHOOK_SOURCES="source=secret,other=new-secret|old-secret"; list several
+# secrets with | while rotating. Deliveries from unlisted sources are rejected.
+WEBHOOK_SOURCES = {
+    source.strip(): [secret for secret in secrets.split('|') if secret]
+    for source, _, secrets in (item.partition('=') for item in os.environ.get('WEBHOOK_SOURCES', '').split(','))
+    if source.strip() and secrets
+}
+# the single WEBHOOK_SECRET is gone: an environment still setting only that
+# would otherwise start up and reject every delivery
+if os.environ.get('WEBHOOK_SECRET') and not WEBHOOK_SOURCES:
+    raise ImproperlyConfigured("WEBHOOK_SECRET is no longer read: set WEBHOOK_SOURCES=<source>=<secret> instead.")
+# Accepted clock skew for X-Webhook-Timestamp, and the size of each worker's replay cache
+WEBHOOK_TOLERANCE_SECONDS = int(os.environ.get('WEBHOOK_TOLERANCE_SECONDS', '300'))
+WEBHOOK_REPLAY_CACHE_SIZE = int(os.environ.get('WEBHOOK_REPLAY_CACHE_SIZE', '100000'))
 
 # Optional OpenAI key for improved summary generation (leave blank if not using)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
+# Summary provider (resumes/summaries.py): 'openai', 'stub' (offline, deterministic)
+# or '' for rule-based summaries only. Defaults to OpenAI when a key is set.
+SUMMARY_PROVIDER = os.environ.get('SUMMARY_PROVIDER', 'openai' if OPENAI_API_KEY else '')
+SUMMARY_PROVIDER_OPTIONS = {
+    'openai': {
+        'api_key': OPENAI_API_KEY,
+        'model': os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo'),
+        'timeout': float(os.environ.get('SUMMARY_TIMEOUT', '10')),
+        'batch_size': int(os.environ.get('SUMMARY_BATCH_SIZE', '10')),
+        'max_connections': 10,
+        'failure_threshold': 5,
+        'reset_timeout': 30.0,
+    },
+    'stub': {},
+}
+
+# Live event stream (/api/events/): idle heartbeat interval and per-subscriber
+# queue size; a subscriber whose queue fills up is evicted as a slow consumer
+EVENT_STREAM_HEARTBEAT_SECONDS = int(os.environ.get('EVENT_STREAM_HEARTBEAT_SECONDS', '15'))
+EVENT_STREAM_QUEUE_SIZE = int(os.environ.get('EVENT_STREAM_QUEUE_SIZE', '100'))
+
+# Resumes not updated for this many days are moved to the archive table by
+# `manage.py archive_resumes` and restored on access
+RESUME_ARCHIVE_AFTER_DAYS = int(os.environ.get('RESUME_ARCHIVE_AFTER_DAYS', '365'))
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -64,8 +105,82 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # token buckets (see resumes/throttling.py); "N/period" = burst of N refilled at N per period
+    'DEFAULT_THROTTLE_CLASSES': (
+        'resumes.throttling.AnonBucketThrottle',
+        'resumes.throttling.UserBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_ANON', '60/min'),
+        'user': os.environ.get('THROTTLE_USER', '600/min'),
+        'summary': os.environ.get('THROTTLE_SUMMARY', '10/min'),
+        'pdf': os.environ.get('THROTTLE_PDF', '30/min'),
+        'webhook': os.environ.get('THROTTLE_WEBHOOK', '120/min'),
+    },
+    # reverse proxies in front of the app (e.g. 1 behind Heroku's router);
+    # X-Forwarded-For is ignored at 0, so clients cannot pick their bucket
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# MessagePack (Accept / Content-Type: application/msgpack) for internal
+# service-to-service calls, when the msgpack package is installed
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('resumes.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('resumes.renderers.MessagePackParser')
+
+# Response compression (resumes/compression.py): best of these the client
+# accepts; zstd/br need the zstandard/brotli packages, gzip always works.
+# API representations only: HTML pages (admin, login) carry CSRF tokens next
+# to reflected input, which compression would expose to BREACH
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_CONTENT_TYPES = ('application/json', 'application/x-ndjson',
+                             'application/msgpack', 'application/vnd.oai.openapi')
+
+# Max in-flight requests per expensive endpoint, across workers
+CONCURRENCY_LIMITS = {
+    'summary': int(os.environ.get('CONCURRENCY_SUMMARY', '4')),
+    'pdf': int(os.environ.get('CONCURRENCY_PDF', '4')),
+}
+CONCURRENCY_SLOT_TIMEOUT = 300
+
+# Shared cache: Redis when REDIS_URL is set, otherwise per-process memory
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'resume-system',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+# Cache alias holding throttle buckets and concurrency counters
+RATE_LIMIT_CACHE = 'default'
+
+# Resume read cache (resumes/caching.py): shared tier alias and TTL, and the
+# number of entries kept in each process's local LRU
+RESUME_CACHE = 'default'
+# whether that cache is seen by every worker process. Per-process memory is
+# only shared with a single worker (SINGLE_PROCESS=True: runserver, gunicorn
+# -w 1); otherwise a write in one worker could not invalidate another's
+# entries, so the read cache and shard directory cache are bypassed and
+# shard moves are refused
+RESUME_CACHE_SHARED = bool(REDIS_URL) or os.environ.get('SINGLE_PROCESS', 'False') == 'True'
+RESUME_CACHE_TIMEOUT = int(os.environ.get('RESUME_CACHE_TIMEOUT', '300'))
+RESUME_CACHE_LOCAL_SIZE = int(os.environ.get('RESUME_CACHE_LOCAL_SIZE', '512'))
+
 # drf-spectacular 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Resume System API',
@@ -76,10 +191,12 @@ SPECTACULAR_SETTINGS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'resumes.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'resumes.sharding.ShardRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,13 +207,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # compile each template once per process, also with DEBUG on
+            # (resume themes are rendered on every /html/ and cache miss)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -114,6 +238,16 @@ DATABASES = {
     }
 }
 
+# Resume data shards (resumes/sharding.py): the database aliases holding
+# resumes, their sections, change feed and archive, partitioned by owner,
+# e.g. RESUME_SHARDS="shard1,shard2". Aliases missing from DATABASES get a
+# SQLite file next to db.sqlite3. Only append: a shard's position in
+# DATABASES fixes the id range of its rows.
+RESUME_SHARDS = [alias.strip() for alias in os.environ.get('RESUME_SHARDS', 'default').split(',') if alias.strip()]
+for alias in RESUME_SHARDS:
+    DATABASES.setdefault(alias, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{alias}.sqlite3'})
+DATABASE_ROUTERS = ['resumes.sharding.ShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,6 +268,11 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Multiplier for the latency budgets in the performance tests (tag "perf");
+# raise it on slow or shared CI machines, query budgets are not scaled
+PERF_BUDGET_SCALE = float(os.environ.get('PERF_BUDGET_SCALE', '1'))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -0,0 +1,15 @@
+# config/test_runner.py
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that skips tests tagged "perf" unless tags are requested.
+    Their wall-clock budgets only hold on an otherwise idle machine, so they
+    run on their own: `manage.py test --tag perf`.
+    """
+
+    def __init__(self, tags=None, exclude_tags=None, **kwargs):
+        if not tags:
+            exclude_tags = {*(exclude_tags or ()), 'perf'}
+        super().__init__(tags=tags, exclude_tags=exclude_tags, **kwargs)
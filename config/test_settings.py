@@ -0,0 +1,21 @@
+# config/test_settings.py
+"""
+Settings for the test suite: `manage.py test` picks them up by default. Set
+DJANGO_SETTINGS_MODULE=config.test_settings for other runners (pytest,
+`django-admin test`).
+"""
+from .settings import *  # noqa: F401,F403
+
+# hashes only need to verify, not to resist brute force, and the default
+# costs ~300 ms per password
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# the sharding tests spread owners over two extra databases
+for alias in ('shard1', 'shard2'):
+    DATABASES.setdefault(alias, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{alias}.sqlite3'})
+
+# each test process has its own cache, so it is shared by everything it runs
+RESUME_CACHE_SHARED = True
+
+# leaves the timing gates (tag "perf") out unless asked for with --tag perf
+TEST_RUNNER = 'config.test_runner.TestRunner'
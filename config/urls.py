@@ -31,7 +31,10 @@ from resumes.views import (ResumeViewSet, ProjectViewSet, ExperienceViewSet,
 from resumes.views import (
                            ResumeViewSet, ProjectViewSet, ExperienceViewSet,
                            EducationViewSet, SkillViewSet, AchievementViewSet,
-                           IntegrationWebhookAPIView, resume_pdf_view)
+                           IntegrationWebhookAPIView, resume_pdf_view,
+                           ChangeFeedAPIView, resume_events_view,
+                           MyAnalyticsAPIView, AnalyticsAPIView, CacheStatsAPIView,
+                           ResumeSearchAPIView)
 
 
 router = routers.DefaultRouter()
@@ -58,5 +61,12 @@ urlpatterns = [
     # webhook integrations endpoint
     path('api/integrations/webhook/', IntegrationWebhookAPIView.as_view(), name='integration-webhook'),
     path('api/resumes/<int:pk>/export_pdf/', resume_pdf_view, name='resume-export-pdf'),
+    path('api/changes/', ChangeFeedAPIView.as_view(), name='resume-changes'),
+    path('api/events/', resume_events_view, name='resume-events'),
+    path('api/analytics/', AnalyticsAPIView.as_view(), name='analytics-global'),
+    path('api/analytics/me/', MyAnalyticsAPIView.as_view(), name='analytics-me'),
+    path('api/analytics/users/<int:user_id>/', AnalyticsAPIView.as_view(), name='analytics-user'),
+    path('api/cache/stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
+    path('api/search/resumes/', ResumeSearchAPIView.as_view(), name='resume-search'),
 
 ]
@@ -11,6 +11,10 @@ fi
 
 # run migrations and collectstatic
 python manage.py migrate --noinput
+# resume shards other than default (RESUME_SHARDS) are migrated one by one
+for alias in ${RESUME_SHARDS//,/ }; do
+  [ "$alias" = default ] || python manage.py migrate --noinput --database "$alias"
+done
 python manage.py collectstatic --noinput
 
 # create superuser if env provided (non-interactive)
@@ -24,4 +28,5 @@ if [ ! -z "$DJANGO_SUPERUSER_USERNAME" ] && [ ! -z "$DJANGO_SUPERUSER_EMAIL" ] &
 fi
 
 # start Gunicorn
-gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers 3
+# settings (bind, workers, preload) live in gunicorn.conf.py
+gunicorn config.wsgi:application
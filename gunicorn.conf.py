@@ -0,0 +1,17 @@
+# gunicorn.conf.py - picked up automatically by `gunicorn` from the working directory
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('GUNICORN_WORKERS', '3'))
+
+# Import Django and the URLconf once in the master; forked workers share those
+# pages copy-on-write instead of each importing the app on boot.
+preload_app = True
+
+
+def when_ready(server):
+    # Freeze everything allocated so far into the permanent GC generation. The
+    # collector then never touches (writes to) those objects in the workers,
+    # so the shared pages stay shared.
+    gc.freeze()
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # the test suite runs with its own settings (config/test_settings.py)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE',
+                          'config.test_settings' if sys.argv[1:2] == ['test'] else 'config.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
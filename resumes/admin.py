@@ -1,14 +1,259 @@
 # resumes/admin.py
 from django.contrib import admin
-from .models import Resume, Project, Experience, Education, Skill, Achievement
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
+from .models import Resume, Project, Experience, Education, Skill, Achievement, ArchivedResume
+from .paginators import EstimatedCountPaginator
+from . import archive, sharding, summaries
+
+SHARD_SESSION_KEY = 'resume_admin_shard'
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Edits one page of a resume's child rows instead of loading all of them."""
+    per_page = 20
+    page_number = 1
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    def get_queryset(self):
+        if not hasattr(self, '_paged_queryset'):
+            qs = super().get_queryset().order_by('-pk')
+            self.page = Paginator(qs, self.per_page).get_page(self.page_number)
+            self._paged_queryset = self.page.object_list
+        return self._paged_queryset
+
+
+class PaginatedInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = 'admin/resumes/paginated_tabular.html'
+    per_page = 20
+    extra = 0
+    show_change_link = True
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        prefix = formset.get_default_prefix()
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(f'{prefix}-page', 1)
+        return formset
+
+
+class ProjectInline(PaginatedInline):
+    model = Project
+    fields = ('title', 'tech_stack', 'link', 'start_date', 'end_date')
+
+class ExperienceInline(PaginatedInline):
+    model = Experience
+    fields = ('company', 'role', 'start_date', 'end_date')
+
+class EducationInline(PaginatedInline):
+    model = Education
+    fields = ('institute', 'degree', 'start_date', 'end_date')
+
+class SkillInline(PaginatedInline):
+    model = Skill
+    fields = ('name', 'level')
+
+class AchievementInline(PaginatedInline):
+    model = Achievement
+    fields = ('title', 'issuer', 'date', 'proof_url')
+
+
+class ShardFilter(admin.SimpleListFilter):
+    """Picks the shard the admin works on; only shown when resume data is sharded."""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.current = model_admin.shard(request)
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in sharding.shards()] if sharding.enabled() else []
+
+    def queryset(self, request, queryset):
+        return queryset  # ShardedAdmin.get_queryset already reads the picked shard
+
+    def choices(self, changelist):
+        # no "All": a change list reads one database
+        for alias, title in self.lookup_choices:
+            yield {'selected': alias == self.current, 'display': title,
+                   'query_string': changelist.get_query_string({self.parameter_name: alias})}
+
+
+class ShardedAdmin(admin.ModelAdmin):
+    """
+    Admin for resume data (resumes/sharding.py). With several shards it works
+    on one at a time, picked with the change list's shard filter and kept in
+    the session, so change forms, inlines, actions and autocomplete read and
+    write the same shard. Owners are users in default, which a join cannot
+    reach, so they are prefetched instead.
+    """
+    list_filter = (ShardFilter,)
+    owner_path = 'resume__owner'  # '' when the model holds a plain owner id
+
+    def shard(self, request):
+        aliases = sharding.shards()
+        picked = request.GET.get(ShardFilter.parameter_name)
+        if picked in aliases:
+            request.session[SHARD_SESSION_KEY] = picked
+            return picked
+        picked = request.session.get(SHARD_SESSION_KEY)
+        return picked if picked in aliases else aliases[0]
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if not sharding.enabled():
+            return qs
+        qs = qs.using(self.shard(request))
+        return qs.prefetch_related(self.owner_path) if self.owner_path else qs
+
+    def get_list_select_related(self, request):
+        if not sharding.enabled():
+            return super().get_list_select_related(request)
+        return tuple(path for path in [self.owner_path.rpartition('__')[0]] if path)
+
+    def on_shard(self, view, request, *args):
+        if not sharding.enabled():
+            return view(request, *args)
+        with sharding.use(self.shard(request)):
+            response = view(request, *args)
+            # form choices and inlines are read while the template renders
+            if isinstance(response, TemplateResponse):
+                response.render()
+        return response
+
+    def changelist_view(self, request, extra_context=None):
+        return self.on_shard(super().changelist_view, request, extra_context)
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        return self.on_shard(super().changeform_view, request, object_id, form_url, extra_context)
+
+    def delete_view(self, request, object_id, extra_context=None):
+        return self.on_shard(super().delete_view, request, object_id, extra_context)
+
+    def history_view(self, request, object_id, extra_context=None):
+        return self.on_shard(super().history_view, request, object_id, extra_context)
+
+    def response_add(self, request, obj, post_url_continue=None):
+        # a new row goes to its owner's shard, which may not be the picked one
+        if sharding.enabled():
+            request.session[SHARD_SESSION_KEY] = obj._state.db
+        return super().response_add(request, obj, post_url_continue)
+
 
 @admin.register(Resume)
-class ResumeAdmin(admin.ModelAdmin):
+class ResumeAdmin(ShardedAdmin):
     list_display = ('id', 'owner', 'title', 'last_updated')
-    search_fields = ('owner__username', 'title')
+    list_select_related = ('owner',)
+    owner_path = 'owner'
+    # whole owner username in any case (UPPER() index on PostgreSQL, users
+    # migration 0003) and title prefix (expression index on PostgreSQL,
+    # migration 0005); the default icontains scans the whole table
+    search_fields = ('owner__username__iexact', '^title')
+    autocomplete_fields = ('owner',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = (ProjectInline, ExperienceInline, EducationInline, SkillInline, AchievementInline)
+    actions = ('regenerate_summaries',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # a new owner may live on another shard; moves go through rebalance_shards
+        if obj is not None and sharding.enabled():
+            return (*super().get_readonly_fields(request, obj), 'owner')
+        return super().get_readonly_fields(request, obj)
+
+    def get_search_fields(self, request):
+        if sharding.enabled():
+            return ('^title',)  # the username is matched in get_search_results
+        return super().get_search_fields(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if sharding.enabled() and term:
+            # users are in default, so the owner cannot be joined on a shard
+            owner_ids = list(get_user_model().objects.filter(username__iexact=term).values_list('pk', flat=True))
+            results |= queryset.filter(owner_id__in=owner_ids)
+        return results, may_have_duplicates
+
+    @admin.action(description="Regenerate summaries (rule-based)")
+    def regenerate_summaries(self, request, queryset):
+        # for thousands of resumes prefer `manage.py regenerate_summaries`
+        total = sum(processed for _last, processed, _sources in summaries.regenerate(queryset))
+        self.message_user(request, f"Regenerated {total} summaries.")
+
+    def delete_model(self, request, obj):
+        archive.hard_delete([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        archive.hard_delete(list(queryset.values_list('pk', flat=True)))
+
+
+@admin.register(ArchivedResume)
+class ArchivedResumeAdmin(ShardedAdmin):
+    list_display = ('resume_id', 'owner_id', 'title', 'last_updated', 'archived_at')
+    # plus an exact owner id (see get_search_results)
+    search_fields = ('^title',)
+    exclude = ('payload',)
+    readonly_fields = ('resume_id', 'owner_id', 'title', 'last_updated', 'archived_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('restore',)
+    owner_path = ''
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        # the admin compares '=owner_id' as CAST(owner_id AS text), which the
+        # owner_id index cannot serve; match numeric terms as integers instead
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit():
+            results |= queryset.filter(owner_id=int(term))
+        return results, may_have_duplicates
+
+    @admin.action(description="Restore selected resumes")
+    def restore(self, request, queryset):
+        restored = [archive.restore(pk) for pk in list(queryset.values_list('resume_id', flat=True))]
+        self.message_user(request, f"Restored {sum(r is not None for r in restored)} resumes.")
+
+
+class ChildAdmin(ShardedAdmin):
+    # Resume.__str__ reads owner.username, so pull both in with the list query
+    list_select_related = ('resume__owner',)
+    autocomplete_fields = ('resume',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Project)
+class ProjectAdmin(ChildAdmin):
+    list_display = ('id', 'title', 'resume')
+    search_fields = ('^title',)
+
+@admin.register(Experience)
+class ExperienceAdmin(ChildAdmin):
+    list_display = ('id', 'role', 'company', 'resume')
+    search_fields = ('^company',)
+
+@admin.register(Education)
+class EducationAdmin(ChildAdmin):
+    list_display = ('id', 'degree', 'institute', 'resume')
+    search_fields = ('^institute',)
+
+@admin.register(Skill)
+class SkillAdmin(ChildAdmin):
+    list_display = ('id', 'name', 'level', 'resume')
+    search_fields = ('^name',)
 
-admin.site.register(Project)
-admin.site.register(Experience)
-admin.site.register(Education)
-admin.site.register(Skill)
-admin.site.register(Achievement)
+@admin.register(Achievement)
+class AchievementAdmin(ChildAdmin):
+    list_display = ('id', 'title', 'issuer', 'resume')
+    search_fields = ('^title',)
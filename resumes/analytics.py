@@ -0,0 +1,249 @@
+# resumes/analytics.py
+"""
+Precomputed resume analytics: per-owner and global (owner_id 0) resume counts,
+skill frequency, average tenure of completed experiences, and achievements per
+issuer (the webhook `source`).
+
+`refresh()` is the rollup job (`manage.py rollup_analytics`, run periodically).
+It reads the owners touched since the last run from the ResumeChange feed and
+recomputes only those owners with set-based GROUP BY queries. The global row is
+then re-derived from the per-owner tables, so the raw child tables are never
+scanned in full. API reads hit a handful of indexed rows (`stats_payload()`).
+
+Archived resumes (resumes/archive.py) are counted from their compressed
+documents, so archiving and restoring leave the numbers unchanged.
+The source tables may be spread over shards (resumes/sharding.py); the
+analytics tables always live in the default database.
+
+`check()` rebuilds everything from scratch in memory and diffs it against
+the stored tables. Any difference means drift, or changes that have not been
+rolled up yet.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import archive, sharding
+from .models import (Resume, Skill, Experience, Achievement, ResumeChange, ArchivedResume,
+                     OwnerStats, OwnerSkillCount, OwnerIssuerCount, AnalyticsWatermark,
+                     GLOBAL_OWNER_ID)
+
+STAT_FIELDS = ('resume_count', 'skill_count', 'achievement_count', 'experience_count', 'experience_days')
+OWNER_CHUNK = 500
+
+
+def _empty_stats():
+    return dict.fromkeys(STAT_FIELDS, 0)
+
+
+def compute(owner_ids=None):
+    """
+    Aggregate from the source tables, for all owners or just `owner_ids`.
+    Returns (stats {owner: {field: value}}, skills {(owner, name): n}, issuers {(owner, issuer): n}).
+    With sharded resume data each shard is aggregated in parallel; an owner's
+    rows are all on one shard, so the results only need combining.
+    """
+    if owner_ids is None:
+        parts = sharding.fan_out(lambda alias: _compute(None))
+    else:
+        groups = sharding.partition(owner_ids)
+        parts = sharding.fan_out(lambda alias: _compute(groups[alias]), groups)
+    stats, skills, issuers = {}, {}, {}
+    for part_stats, part_skills, part_issuers in parts.values():
+        stats.update(part_stats)
+        skills.update(part_skills)
+        issuers.update(part_issuers)
+    return stats, skills, issuers
+
+
+def _compute(owner_ids):
+    resumes, skills = Resume.objects.all(), Skill.objects.all()
+    experiences, achievements = Experience.objects.filter(end_date__isnull=False), Achievement.objects.all()
+    if owner_ids is not None:
+        resumes = resumes.filter(owner_id__in=owner_ids)
+        skills = skills.filter(resume__owner_id__in=owner_ids)
+        experiences = experiences.filter(resume__owner_id__in=owner_ids)
+        achievements = achievements.filter(resume__owner_id__in=owner_ids)
+
+    stats = defaultdict(_empty_stats)
+    for owner, n in resumes.values('owner_id').annotate(n=Count('id')).values_list('owner_id', 'n'):
+        stats[owner]['resume_count'] = n
+
+    skill_counts = {}
+    for owner, name, n in (skills.annotate(lname=Lower('name')).values('resume__owner_id', 'lname')
+                           .annotate(n=Count('id')).values_list('resume__owner_id', 'lname', 'n')):
+        skill_counts[owner, name] = n
+        stats[owner]['skill_count'] += n
+
+    issuer_counts = {}
+    for owner, issuer, n in (achievements.values('resume__owner_id', 'issuer').annotate(n=Count('id'))
+                             .values_list('resume__owner_id', 'issuer', 'n')):
+        issuer_counts[owner, issuer] = n
+        stats[owner]['achievement_count'] += n
+
+    tenure = ExpressionWrapper(F('end_date') - F('start_date'), output_field=DurationField())
+    for owner, n, total in (experiences.values('resume__owner_id').annotate(n=Count('id'), total=Sum(tenure))
+                            .values_list('resume__owner_id', 'n', 'total')):
+        stats[owner]['experience_count'] = n
+        stats[owner]['experience_days'] = total.days if total else 0
+
+    archived = ArchivedResume.objects.all()
+    if owner_ids is not None:
+        archived = archived.filter(owner_id__in=owner_ids)
+    for owner, payload in archived.values_list('owner_id', 'payload').iterator(chunk_size=OWNER_CHUNK):
+        _count_archived(stats[owner], skill_counts, issuer_counts, owner, archive.decode(payload)['sections'])
+
+    return dict(stats), skill_counts, issuer_counts
+
+
+def _count_archived(stats, skill_counts, issuer_counts, owner, sections):
+    """Fold one archived resume's document into the _compute() totals, as the queries above would."""
+    stats['resume_count'] += 1
+    for row in sections['skill']:
+        key = owner, row['name'].lower()
+        skill_counts[key] = skill_counts.get(key, 0) + 1
+        stats['skill_count'] += 1
+    for row in sections['achievement']:
+        key = owner, row['issuer']
+        issuer_counts[key] = issuer_counts.get(key, 0) + 1
+        stats['achievement_count'] += 1
+    for row in sections['experience']:
+        if row['end_date'] is None:
+            continue
+        stats['experience_count'] += 1
+        stats['experience_days'] += (datetime.date.fromisoformat(row['end_date'])
+                                     - datetime.date.fromisoformat(row['start_date'])).days
+
+
+def with_global(stats, skills, issuers):
+    """Add the owner-0 global totals to a compute() result."""
+    stats, skills, issuers = dict(stats), dict(skills), dict(issuers)
+    if stats:
+        stats[GLOBAL_OWNER_ID] = {f: sum(s[f] for s in stats.values()) for f in STAT_FIELDS}
+    for counts in (skills, issuers):
+        totals = defaultdict(int)
+        for (_owner, key), n in counts.items():
+            totals[key] += n
+        counts.update({(GLOBAL_OWNER_ID, key): n for key, n in totals.items()})
+    return stats, skills, issuers
+
+
+def _write(stats, skills, issuers):
+    OwnerStats.objects.bulk_create([OwnerStats(owner_id=owner, **values) for owner, values in stats.items()])
+    OwnerSkillCount.objects.bulk_create(
+        [OwnerSkillCount(owner_id=owner, name=name, count=n) for (owner, name), n in skills.items()])
+    OwnerIssuerCount.objects.bulk_create(
+        [OwnerIssuerCount(owner_id=owner, issuer=issuer, count=n) for (owner, issuer), n in issuers.items()])
+
+
+def _delete(owner_ids):
+    for model in (OwnerStats, OwnerSkillCount, OwnerIssuerCount):
+        model.objects.filter(owner_id__in=owner_ids).delete()
+
+
+def _refresh_global():
+    _delete([GLOBAL_OWNER_ID])
+    owners = OwnerStats.objects.exclude(owner_id=GLOBAL_OWNER_ID)
+    totals = owners.aggregate(**{f: Sum(f) for f in STAT_FIELDS})
+    if totals['resume_count'] is None:
+        return
+    skills = (OwnerSkillCount.objects.exclude(owner_id=GLOBAL_OWNER_ID).values('name')
+              .annotate(n=Sum('count')).values_list('name', 'n'))
+    issuers = (OwnerIssuerCount.objects.exclude(owner_id=GLOBAL_OWNER_ID).values('issuer')
+               .annotate(n=Sum('count')).values_list('issuer', 'n'))
+    _write({GLOBAL_OWNER_ID: totals},
+           {(GLOBAL_OWNER_ID, name): n for name, n in skills},
+           {(GLOBAL_OWNER_ID, issuer): n for issuer, n in issuers})
+
+
+def _recompute(owner_ids):
+    owner_ids = sorted(set(owner_ids))
+    for start in range(0, len(owner_ids), OWNER_CHUNK):
+        chunk = owner_ids[start:start + OWNER_CHUNK]
+        _delete(chunk)
+        _write(*compute(chunk))
+
+
+def refresh_owners(owner_ids):
+    """
+    Recompute `owner_ids` (and the global row) right away, for writes that do
+    not go through the change feed, such as archiving and deleting a user.
+    """
+    with transaction.atomic():
+        AnalyticsWatermark.objects.select_for_update().get_or_create(pk=1)
+        _recompute(owner_ids)
+        _refresh_global()
+
+
+def refresh(full=False):
+    """
+    Fold changes since the last run into the analytics tables; with full=True
+    rebuild every owner. Returns the number of owners recomputed.
+    """
+    with transaction.atomic():
+        mark, _ = AnalyticsWatermark.objects.select_for_update().get_or_create(pk=1)
+        high = max(sharding.fan_out(lambda alias: ResumeChange.objects.aggregate(m=Max('seq'))['m'] or 0).values())
+        if full:
+            for model in (OwnerStats, OwnerSkillCount, OwnerIssuerCount):
+                model.objects.all().delete()
+            stats, skills, issuers = compute()
+            _write(stats, skills, issuers)
+            refreshed = len(stats)
+        else:
+            owners = set().union(*sharding.fan_out(
+                lambda alias: set(ResumeChange.objects.filter(seq__gt=mark.seq, seq__lte=high)
+                                  .values_list('owner_id', flat=True).distinct())).values())
+            _recompute(owners)
+            refreshed = len(owners)
+        _refresh_global()
+        mark.seq = high
+        mark.refreshed_at = timezone.now()
+        mark.save()
+    return refreshed
+
+
+def stored():
+    """The analytics tables in compute()/with_global() shape."""
+    stats = {row['owner_id']: {f: row[f] for f in STAT_FIELDS}
+             for row in OwnerStats.objects.values('owner_id', *STAT_FIELDS)}
+    skills = {(owner, name): n for owner, name, n in OwnerSkillCount.objects.values_list('owner_id', 'name', 'count')}
+    issuers = {(owner, issuer): n for owner, issuer, n in
+               OwnerIssuerCount.objects.values_list('owner_id', 'issuer', 'count')}
+    return stats, skills, issuers
+
+
+def check():
+    """Rebuild from scratch and list every difference against the stored aggregates."""
+    problems = []
+    for label, expected, actual in zip(('stats', 'skills', 'issuers'), with_global(*compute()), stored()):
+        for key in sorted(set(expected) | set(actual), key=str):
+            if expected.get(key) != actual.get(key):
+                problems.append(f"{label} {key}: expected {expected.get(key)}, stored {actual.get(key)}")
+    return problems
+
+
+def stats_payload(owner_id, top=20):
+    """API representation for one owner (or GLOBAL_OWNER_ID); a few indexed lookups."""
+    row = OwnerStats.objects.filter(owner_id=owner_id).first() or OwnerStats(owner_id=owner_id)
+    mark = AnalyticsWatermark.objects.filter(pk=1).first()
+    return {
+        'resume_count': row.resume_count,
+        'skill_count': row.skill_count,
+        'achievement_count': row.achievement_count,
+        'avg_experience_tenure_days': row.avg_tenure_days,
+        'top_skills': [
+            {'name': name, 'count': n} for name, n in
+            OwnerSkillCount.objects.filter(owner_id=owner_id).order_by('-count', 'name')
+            .values_list('name', 'count')[:top]
+        ],
+        'achievements_by_issuer': [
+            {'issuer': issuer, 'count': n} for issuer, n in
+            OwnerIssuerCount.objects.filter(owner_id=owner_id).order_by('-count', 'issuer')
+            .values_list('issuer', 'count')[:top]
+        ],
+        'as_of': mark.refreshed_at if mark else None,
+    }
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ResumesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resumes'
+
+    def ready(self):
+        from . import changes, sharding  # noqa: F401  (connect their signal receivers)
+        from .summaries import check_settings
+        check_settings()
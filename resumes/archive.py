@@ -0,0 +1,165 @@
+# resumes/archive.py
+"""
+Archive tier and set-based deletes for resumes.
+
+`archive_stale()` moves resumes not updated since a cutoff out of the hot
+tables: each resume and its section rows become one zlib-compressed JSON
+document in ArchivedResume, and the hot rows are removed with `hard_delete()`.
+Archiving is a storage detail, so nothing is written to the change feed; the
+analytics and cached reads of the affected owners are refreshed directly instead.
+
+`restore()` puts an archived resume back with its original ids. The API calls it
+when a request names a resume that is no longer in the hot table, or a section
+row of one (`archived_resume_of()`), so clients never need to know about the
+archive. Listing does not restore: the resume list shows archived resumes as
+stubs from their metadata, and section lists only cover hot resumes. The restore is logged as an update of
+the resume, and last_updated is bumped so the resume is not archived again
+straight away. Analytics count archived resumes from their documents.
+
+`hard_delete()` removes resumes with one DELETE per table instead of Django's
+delete collector, which loads every child row and sends a post_delete signal
+for each. Change-feed delete rows are still written, with one INSERT ... SELECT
+per section table.
+"""
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import analytics, caching, changes, sharding
+from .models import (Resume, Project, Experience, Education, Skill, Achievement,
+                     ResumeChange, ArchivedResume)
+
+# every model with a foreign key to Resume; hard_delete() must clear all of them
+SECTION_MODELS = (Project, Experience, Education, Skill, Achievement)
+CHUNK_SIZE = 500
+
+
+def _row(values, model):
+    return model(**{f.attname: f.to_python(values[f.attname])
+                    for f in model._meta.concrete_fields if f.attname in values})
+
+
+def resume_documents(resume_ids):
+    """{resume_id: {'resume': {...}, 'sections': {model_name: [{...}, ...]}}} for `resume_ids`."""
+    docs = {row['id']: {'resume': row, 'sections': {m._meta.model_name: [] for m in SECTION_MODELS}}
+            for row in Resume.objects.filter(pk__in=resume_ids).values()}
+    for model in SECTION_MODELS:
+        for row in model.objects.filter(resume_id__in=list(docs)).order_by('pk').values():
+            docs[row['resume_id']]['sections'][model._meta.model_name].append(row)
+    return docs
+
+
+def encode(doc):
+    return zlib.compress(json.dumps(doc, cls=DjangoJSONEncoder, separators=(',', ':')).encode())
+
+
+def decode(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def hard_delete(resume_ids, record_changes=True):
+    """
+    Delete resumes and all their section rows: one DELETE per table and chunk,
+    no per-row signals. Returns the number of rows deleted per model name.
+    """
+    resume_ids = sorted(set(resume_ids))
+    deleted = dict.fromkeys([m._meta.model_name for m in SECTION_MODELS + (Resume,)], 0)
+    with sharding.atomic(), changes.batch():
+        for start in range(0, len(resume_ids), CHUNK_SIZE):
+            chunk = resume_ids[start:start + CHUNK_SIZE]
+            querysets = [model.objects.filter(resume_id__in=chunk) for model in SECTION_MODELS]
+            resumes = Resume.objects.filter(pk__in=chunk)
+            if record_changes:
+                for qs in querysets:
+                    changes.log_deletes(qs)
+                changes.record_deleted(Resume, resumes.values_list('pk', 'pk', 'owner_id'))
+            # the collector is skipped on purpose: every table referencing
+            # Resume is in SECTION_MODELS, and ResumeChange holds plain ids
+            for qs in querysets + [resumes]:
+                deleted[qs.model._meta.model_name] += qs._raw_delete(qs.db)
+    return deleted
+
+
+def _archived(docs):
+    return [
+        ArchivedResume(resume_id=pk, owner_id=doc['resume']['owner_id'], title=doc['resume']['title'],
+                       last_updated=doc['resume']['last_updated'], payload=encode(doc))
+        for pk, doc in docs.items()
+    ]
+
+
+def archive(resume_ids):
+    """Move `resume_ids` to the archive table. Returns the ArchivedResume rows written."""
+    docs = resume_documents(resume_ids)
+    archived = _archived(docs)
+    with sharding.atomic():
+        ArchivedResume.objects.bulk_create(archived)
+        hard_delete(list(docs), record_changes=False)
+        caching.invalidate({row.owner_id for row in archived})
+    return archived
+
+
+def archive_stale(cutoff, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Archive every resume with last_updated < cutoff, `chunk_size` at a time,
+    one shard after another. Yields (archived, raw_bytes, stored_bytes) per
+    chunk, then refreshes the analytics of the owners involved.
+    """
+    owners = set()
+    for alias in sharding.shards():
+        after_id = 0
+        while True:
+            with sharding.use(alias), sharding.atomic():
+                # locked so a resume edited meanwhile is not archived with stale data
+                ids = list(Resume.objects.filter(last_updated__lt=cutoff, pk__gt=after_id).order_by('pk')
+                           .select_for_update().values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+                after_id = ids[-1]
+                rows = _archived(resume_documents(ids)) if dry_run else archive(ids)
+            owners.update(row.owner_id for row in rows)
+            raw = sum(len(zlib.decompress(row.payload)) for row in rows)
+            yield len(rows), raw, sum(len(row.payload) for row in rows)
+    if owners and not dry_run:
+        analytics.refresh_owners(owners)
+
+
+def restore(resume_id, owner_id=None):
+    """
+    Move an archived resume back into the hot tables, optionally only if it
+    belongs to `owner_id`. Returns the Resume, or None if nothing was archived
+    under that id.
+    """
+    try:
+        resume_id = int(resume_id)
+    except (TypeError, ValueError):
+        return None
+    with sharding.atomic():
+        qs = ArchivedResume.objects.select_for_update().filter(resume_id=resume_id)
+        if owner_id is not None:
+            qs = qs.filter(owner_id=owner_id)
+        archived = qs.first()
+        if archived is None:
+            return None
+        doc = decode(archived.payload)
+        resume = _row(doc['resume'], Resume)
+        Resume.objects.bulk_create([resume])  # auto_now sets last_updated to now
+        for model in SECTION_MODELS:
+            model.objects.bulk_create([_row(row, model) for row in doc['sections'][model._meta.model_name]])
+        archived.delete()
+        changes.record(ResumeChange.OP_UPDATE, [resume])
+    return resume
+
+
+def archived_resume_of(owner_id, model, pk):
+    """The id of `owner_id`'s archived resume holding section row `model` #`pk`, or None."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    rows = ArchivedResume.objects.filter(owner_id=owner_id).values_list('resume_id', 'payload')
+    for resume_id, payload in rows.iterator(chunk_size=CHUNK_SIZE):
+        if any(row['id'] == pk for row in decode(payload)['sections'][model._meta.model_name]):
+            return resume_id
+    return None
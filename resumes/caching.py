@@ -0,0 +1,244 @@
+# resumes/caching.py
+"""
+Two-tier read-through cache for resume reads.
+
+Tier 1 is a small LRU in each process (settings.RESUME_CACHE_LOCAL_SIZE
+entries), tier 2 the shared Django cache named by settings.RESUME_CACHE.
+Entries hold serialized API data, not model instances. Each key is scoped to
+an owner and includes that owner's version, a counter kept in the shared
+cache. Any write to an owner's resumes or sections bumps the version, so
+every process stops using the owner's old entries at once; the old entries
+simply age out of both tiers. That needs a shared tier every worker sees:
+when settings.RESUME_CACHE_SHARED is off (per-process memory with several
+workers) reads bypass the cache and always load.
+
+Version bumps come from the change feed (resumes/changes.py), which sees
+every write path: model signals for single-row saves and deletes, and
+explicit records for bulk writes and set-based deletes. Archiving does not
+go through the feed, so it invalidates directly. The version is bumped when
+the write happens and again on commit, so a read that ran between the two
+cannot keep pre-commit data reachable.
+
+Stampedes are avoided by loading a missing key once. Threads in the same
+process wait for the first loader. Other processes see a short lease in the
+shared cache and poll for the value, then load it themselves if the lease
+holder is too slow.
+
+`metrics` counts hits per tier, misses, coalesced waits and time spent, for
+this process; GET /api/cache/stats/ serves them.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import sharding
+
+KEY_PREFIX = 'resumecache'
+LEASE_SECONDS = 5
+POLL_SECONDS = 0.02
+
+_MISSING = object()
+
+
+class LocalLRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class Metrics:
+    OUTCOMES = ('local_hit', 'shared_hit', 'coalesced', 'miss')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.OUTCOMES, 0)
+            self.seconds = dict.fromkeys(self.OUTCOMES, 0.0)
+
+    def record(self, outcome, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.counts[outcome] += 1
+            self.seconds[outcome] += elapsed
+
+    def snapshot(self):
+        with self._lock:
+            counts, seconds = dict(self.counts), dict(self.seconds)
+        lookups = sum(counts.values())
+        hits = counts['local_hit'] + counts['shared_hit'] + counts['coalesced']
+        return {
+            'lookups': lookups,
+            **counts,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'local_hit_ratio': round(counts['local_hit'] / lookups, 4) if lookups else None,
+            'avg_ms': {outcome: round(seconds[outcome] / counts[outcome] * 1000, 3)
+                       for outcome in self.OUTCOMES if counts[outcome]},
+            'local_entries': len(local),
+        }
+
+
+local = LocalLRU(getattr(settings, 'RESUME_CACHE_LOCAL_SIZE', 512))
+metrics = Metrics()
+_inflight = {}  # key -> threading.Event set when its loader finishes
+_inflight_lock = threading.Lock()
+
+
+def _shared():
+    return caches[getattr(settings, 'RESUME_CACHE', 'default')]
+
+
+def enabled():
+    return getattr(settings, 'RESUME_CACHE_SHARED', True)
+
+
+def _version_key(owner_id):
+    return f'{KEY_PREFIX}:v:{owner_id}'
+
+
+def _fresh_version():
+    # random start: a counter that was evicted must not come back at a value
+    # that entries from its previous life were stored under
+    return random.getrandbits(48)
+
+
+def owner_version(owner_id):
+    cache = _shared()
+    version = cache.get(_version_key(owner_id))
+    if version is None:
+        cache.add(_version_key(owner_id), _fresh_version(), None)
+        version = cache.get(_version_key(owner_id))
+    return version
+
+
+def _bump(owner_ids):
+    cache = _shared()
+    for owner_id in owner_ids:
+        try:
+            cache.incr(_version_key(owner_id))
+        except ValueError:
+            cache.add(_version_key(owner_id), _fresh_version(), None)
+
+
+def invalidate(owner_ids):
+    """Drop every cached read for `owner_ids`, now and again when the current transaction commits."""
+    owner_ids = set(owner_ids)
+    if not owner_ids:
+        return
+    _bump(owner_ids)
+    for alias, owners in sharding.partition(owner_ids).items():
+        transaction.on_commit(partial(_bump, owners), using=alias)
+
+
+def get_or_load(owner_id, name, loader):
+    """
+    The cached value of `name` for `owner_id`, or `loader()` stored in both
+    tiers. Exceptions from the loader (e.g. Http404) propagate and nothing is cached.
+    """
+    started = time.perf_counter()
+    if not enabled():
+        value = loader()
+        metrics.record('miss', started)
+        return value
+    key = f'{KEY_PREFIX}:{owner_id}:{owner_version(owner_id)}:{name}'
+    value = local.get(key, _MISSING)
+    if value is not _MISSING:
+        metrics.record('local_hit', started)
+        return value
+    value = _shared().get(key, _MISSING)
+    if value is not _MISSING:
+        local.set(key, value)
+        metrics.record('shared_hit', started)
+        return value
+
+    with _inflight_lock:
+        done = _inflight.get(key)
+        leader = done is None
+        if leader:
+            done = _inflight[key] = threading.Event()
+    if not leader:
+        done.wait(LEASE_SECONDS)
+        value = local.get(key, _MISSING)
+        if value is not _MISSING:
+            metrics.record('coalesced', started)
+            return value
+        # the first loader failed or timed out: load without coordination
+        return _load(key, loader, started)
+    try:
+        return _load_once(key, loader, started)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        done.set()
+
+
+def _load_once(key, loader, started):
+    """Load under a shared-cache lease so only one process computes `key` at a time."""
+    cache = _shared()
+    lease = f'{key}:lease'
+    if not cache.add(lease, 1, LEASE_SECONDS):
+        deadline = time.monotonic() + LEASE_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(POLL_SECONDS)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                local.set(key, value)
+                metrics.record('coalesced', started)
+                return value
+        return _load(key, loader, started)
+    try:
+        return _load(key, loader, started)
+    finally:
+        cache.delete(lease)
+
+
+def _load(key, loader, started):
+    value = loader()
+    _shared().set(key, value, getattr(settings, 'RESUME_CACHE_TIMEOUT', 300))
+    local.set(key, value)
+    metrics.record('miss', started)
+    return value
+
+
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    # rendered documents show the owner's name, and a new account may reuse
+    # the id of a deleted one on some databases; logins only touch last_login
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        invalidate([instance.pk])
+
+
+User = get_user_model()
+post_save.connect(_user_changed, sender=User, dispatch_uid='resume_cache_user_saved')
+post_delete.connect(_user_changed, sender=User, dispatch_uid='resume_cache_user_deleted')
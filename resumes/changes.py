@@ -0,0 +1,171 @@
+# resumes/changes.py
+"""
+Populates the ResumeChange outbox on every write to a resume or child section.
+
+Single-row writes (save()/delete(), including the webhook and cascades) are
+captured by model signals. Bulk paths (bulk_create/bulk_update) bypass signals,
+so they call `record()` explicitly; set-based deletes use `record_deleted()`
+and `log_deletes()`. Inside `batch()` rows are buffered and written with one
+bulk INSERT when the block exits, keeping bulk endpoints at a constant number
+of queries.
+
+With sharded resume data (resumes/sharding.py) each owner's rows go to the
+owner's shard, numbered from one global counter.
+
+Note: `seq` is assigned at INSERT time, so on databases with concurrent writers
+a lower seq can commit after a higher one. Consumers that need strict
+completeness should re-read a short window behind their cursor.
+"""
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models import CharField, DateTimeField, Value
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from .models import Resume, Project, Experience, Education, Skill, Achievement, ResumeChange
+from . import caching, events, sharding
+
+TRACKED_MODELS = (Resume, Project, Experience, Education, Skill, Achievement)
+
+_state = threading.local()
+
+
+def _snapshot(obj):
+    return {f.attname: f.value_from_object(obj) for f in obj._meta.concrete_fields}
+
+
+def _owner_ids(objects):
+    """Map resume_id -> owner_id for `objects`, querying only for resumes not already loaded."""
+    owners = getattr(_state, 'owners', None)
+    if owners is None:
+        owners = {}
+    missing = set()
+    for obj in objects:
+        if isinstance(obj, Resume):
+            owners[obj.pk] = obj.owner_id
+        elif obj.resume_id not in owners:
+            if type(obj).resume.is_cached(obj):
+                owners[obj.resume_id] = obj.resume.owner_id
+            else:
+                missing.add(obj.resume_id)
+    if missing:
+        owners.update(Resume.objects.filter(pk__in=missing).values_list('pk', 'owner_id'))
+    return owners
+
+
+def record(op, objects):
+    """Log `op` ('create' / 'update' / 'delete') for each tracked model instance in `objects`."""
+    objects = list(objects)
+    if not objects:
+        return
+    owners = _owner_ids(objects)
+    rows = []
+    for obj in objects:
+        resume_id = obj.pk if isinstance(obj, Resume) else obj.resume_id
+        owner_id = owners.get(resume_id)
+        if owner_id is None:
+            # the resume is already gone, so the row belongs to no owner's feed
+            continue
+        rows.append(ResumeChange(
+            owner_id=owner_id,
+            resume_id=resume_id,
+            model=obj._meta.model_name,
+            object_id=obj.pk,
+            op=op,
+            data=None if op == ResumeChange.OP_DELETE else _snapshot(obj),
+        ))
+    if not rows:
+        return
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is not None:
+        buffer.extend(rows)
+    else:
+        _write(rows)
+
+
+def record_deleted(model, rows):
+    """Log deletes from (object_id, resume_id, owner_id) tuples, for set-based deletes that skip signals."""
+    log = [ResumeChange(owner_id=owner_id, resume_id=resume_id, model=model._meta.model_name,
+                        object_id=object_id, op=ResumeChange.OP_DELETE)
+           for object_id, resume_id, owner_id in rows]
+    if not log:
+        return
+    buffer = getattr(_state, 'buffer', None)
+    if buffer is not None:
+        buffer.extend(log)
+    else:
+        _write(log)
+
+
+def log_deletes(queryset, resume_field='resume_id', owner_field='resume__owner_id'):
+    """
+    Log a delete for every row of `queryset` with one INSERT ... SELECT, ahead of
+    a set-based DELETE of those rows. No live events are sent for these rows;
+    callers log the parent resume's delete with record_deleted(), whose event
+    tells subscribers to catch up through the feed. Returns the number of rows logged.
+    """
+    if sharding.enabled():
+        # seqs come from the global counter, so the rows cannot be numbered in SQL
+        rows = list(queryset.values_list('pk', resume_field, owner_field))
+        record_deleted(queryset.model, rows)
+        return len(rows)
+    rows = queryset.order_by().annotate(
+        _log_model=Value(queryset.model._meta.model_name, output_field=CharField()),
+        _log_op=Value(ResumeChange.OP_DELETE, output_field=CharField()),
+        _log_at=Value(timezone.now(), output_field=DateTimeField()),
+    ).values_list(owner_field, resume_field, 'pk', '_log_model', '_log_op', '_log_at')
+    connection = connections[queryset.db]
+    sql, params = rows.query.get_compiler(queryset.db).as_sql()
+    columns = ', '.join(connection.ops.quote_name(c)
+                        for c in ('owner_id', 'resume_id', 'object_id', 'model', 'op', 'created_at'))
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {connection.ops.quote_name(ResumeChange._meta.db_table)} ({columns}) {sql}",
+                       params)
+        return cursor.rowcount
+
+
+def _write(rows):
+    sharding.number(rows)
+    by_shard = sharding.partition(rows, lambda row: row.owner_id)
+    for alias, group in by_shard.items():
+        ResumeChange.objects.using(alias).bulk_create(group)
+    caching.invalidate({row.owner_id for row in rows})
+    for alias, group in by_shard.items():
+        # live subscribers only hear about changes that actually commit
+        transaction.on_commit(partial(events.publish_changes, group), using=alias)
+
+
+@contextmanager
+def batch():
+    """Buffer change rows recorded in this block and insert them with one query on success."""
+    if getattr(_state, 'buffer', None) is not None:
+        # nested: the outermost batch flushes
+        yield
+        return
+    _state.buffer, _state.owners = [], {}
+    try:
+        yield
+        rows = _state.buffer
+    finally:
+        _state.buffer = _state.owners = None
+    if rows:
+        _write(rows)
+
+
+def _record_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record(ResumeChange.OP_CREATE if created else ResumeChange.OP_UPDATE, [instance])
+
+
+def _record_delete(sender, instance, **kwargs):
+    record(ResumeChange.OP_DELETE, [instance])
+
+
+# connect per model: a sender-less post_delete receiver would disable Django's
+# fast-delete path for every model in the project
+for _model in TRACKED_MODELS:
+    post_save.connect(_record_save, sender=_model, dispatch_uid=f'resume_change_save_{_model.__name__}')
+    post_delete.connect(_record_delete, sender=_model, dispatch_uid=f'resume_change_delete_{_model.__name__}')
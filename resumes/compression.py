@@ -0,0 +1,204 @@
+# resumes/compression.py
+"""
+Content-negotiated response compression, in place of Django's GZipMiddleware.
+
+The codec is picked from the request's Accept-Encoding (q-values honoured,
+ties broken by settings.COMPRESSION_ENCODINGS order). zstd and brotli are used
+when the `zstandard` / `brotli` packages are installed, and gzip is always
+available. Responses smaller than settings.COMPRESSION_MIN_SIZE are sent as
+they are, as are already-encoded bodies and content types outside
+COMPRESSION_CONTENT_TYPES. Event streams are never compressed, since buffering
+would hold back live events.
+
+Unlike GZipMiddleware this adds no random padding against BREACH, so only API
+content types are listed by default: HTML (the admin, DRF's browsable API)
+carries CSRF tokens and must not be compressed here.
+
+Levels favour speed (gzip 6, brotli 4, zstd 3): bodies are compressed on every
+request, not once ahead of time.
+"""
+import gzip
+import threading
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+
+class Codec:
+    name = None
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def compressor(self):
+        """Object with compress(chunk) -> bytes and flush() -> bytes, for streaming responses."""
+        raise NotImplementedError
+
+    def stream(self, chunks):
+        compressor = self.compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    async def astream(self, chunks):
+        compressor = self.compressor()
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    level = 6
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class BrotliCodec(Codec):
+    name = 'br'
+    quality = 4
+
+    def __init__(self):
+        import brotli
+        self.brotli = brotli
+
+    def compress(self, data):
+        return self.brotli.compress(data, quality=self.quality)
+
+    def compressor(self):
+        return _BrotliStream(self.brotli.Compressor(quality=self.quality))
+
+
+class _BrotliStream:
+    def __init__(self, compressor):
+        self.compress = compressor.process
+        self.flush = compressor.finish
+
+
+class ZstdCodec(Codec):
+    name = 'zstd'
+    level = 3
+
+    def __init__(self):
+        import zstandard
+        self.zstandard = zstandard
+        # a ZstdCompressor must not be used by two threads at once: one per
+        # thread for whole bodies, and a fresh one per stream, since streams of
+        # several responses interleave on one thread under ASGI
+        self.local = threading.local()
+
+    def compress(self, data):
+        zstd = getattr(self.local, 'zstd', None)
+        if zstd is None:
+            zstd = self.local.zstd = self.zstandard.ZstdCompressor(level=self.level)
+        return zstd.compress(data)
+
+    def compressor(self):
+        return self.zstandard.ZstdCompressor(level=self.level).compressobj()
+
+
+def available_codecs():
+    """{encoding: Codec} for every codec whose library can be imported."""
+    codecs = {}
+    for codec_class in (ZstdCodec, BrotliCodec, GzipCodec):
+        try:
+            codecs[codec_class.name] = codec_class()
+        except ImportError:
+            pass
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """{encoding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header, codecs, preference):
+    """The best codec for an Accept-Encoding header, or None for identity."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for name in preference:
+        q = accepted.get(name, wildcard)
+        if name in codecs and q > best_q:
+            best, best_q = codecs[name], q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with the best codec the client accepts (zstd, br, gzip)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.codecs = available_codecs()
+        self.preference = [name for name in getattr(settings, 'COMPRESSION_ENCODINGS', ('zstd', 'br', 'gzip'))
+                           if name in self.codecs]
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', ('application/json',)))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def _compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type == 'text/event-stream':
+            return False
+        return content_type.startswith(self.content_types)
+
+    def process_response(self, request, response):
+        if not self._compressible(response):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        # from here on the body depends on Accept-Encoding, so caches must key on it
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs, self.preference)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = codec.astream(response.streaming_content)
+            else:
+                response.streaming_content = codec.stream(response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # the representation changed, so a strong ETag no longer matches it
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
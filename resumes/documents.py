@@ -0,0 +1,207 @@
+# resumes/documents.py
+"""
+Resume document tree shared by the HTML and PDF renderers.
+
+`build(resume)` turns a resume and its sections into a plain, format-neutral
+tree (dicts and lists, so it caches well):
+
+    {'title', 'name', 'summary', 'sections': [
+        {'key', 'heading', 'digest', 'items': [
+            {'title', 'subtitle', 'dates', 'body', 'link'}, ...]}, ...]}
+
+`document_for()` caches the tree in the two-tier resume cache
+(resumes/caching.py). The owner's writes invalidate it like any other read.
+
+`render_html()` renders each section through the theme's section template
+and caches the fragment under (theme, section key, section digest). Editing
+one section changes only that section's digest, so only that fragment is
+rendered again; the page template then stitches the fragments together.
+`render_pdf()` walks the same tree with reportlab, using the theme's fonts
+and accent colour, so both formats show the same content in the same order.
+"""
+import hashlib
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import caching
+
+# bump when a theme's section templates change, so cached fragments are not reused
+FRAGMENT_VERSION = 2
+
+THEMES = {
+    'classic': {'label': 'Classic', 'font': 'Times-Roman', 'bold': 'Times-Bold', 'italic': 'Times-Italic',
+                'accent': '#1f3a5f', 'family': 'Georgia, "Times New Roman", serif'},
+    'modern': {'label': 'Modern', 'font': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique',
+               'accent': '#0b7a75', 'family': '"Helvetica Neue", Arial, sans-serif'},
+    'compact': {'label': 'Compact', 'font': 'Helvetica', 'bold': 'Helvetica-Bold', 'italic': 'Helvetica-Oblique',
+                'accent': '#444444', 'family': 'Arial, sans-serif'},
+}
+DEFAULT_THEME = 'classic'
+
+# (related name, heading), in page order
+SECTIONS = (
+    ('experiences', 'Experience'),
+    ('projects', 'Projects'),
+    ('educations', 'Education'),
+    ('skills', 'Skills'),
+    ('achievements', 'Achievements'),
+)
+
+
+def _month(value):
+    return value.strftime('%b %Y') if value else ''
+
+
+def _dates(start, end, open_ended=False):
+    if not start and not end:
+        return ''
+    if start and not end:
+        return f"{_month(start)} - Present" if open_ended else _month(start)
+    return f"{_month(start)} - {_month(end)}" if start else _month(end)
+
+
+def _items(key, rows):
+    if key == 'experiences':
+        rows = sorted(rows, key=lambda e: e.start_date, reverse=True)
+        return [{'title': e.role, 'subtitle': e.company, 'dates': _dates(e.start_date, e.end_date, True),
+                 'body': e.description, 'link': ''} for e in rows]
+    if key == 'projects':
+        return [{'title': p.title, 'subtitle': p.tech_stack, 'dates': _dates(p.start_date, p.end_date),
+                 'body': p.description, 'link': p.link or ''} for p in rows]
+    if key == 'educations':
+        return [{'title': e.degree, 'subtitle': e.institute, 'dates': _dates(e.start_date, e.end_date),
+                 'body': e.details, 'link': ''} for e in rows]
+    if key == 'skills':
+        return [{'title': s.name, 'subtitle': s.level, 'dates': '', 'body': '', 'link': ''} for s in rows]
+    return [{'title': a.title, 'subtitle': a.issuer, 'dates': _month(a.date), 'body': a.description,
+             'link': a.proof_url or ''} for a in rows]
+
+
+def _digest(items):
+    return hashlib.sha1(json.dumps(items, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def build(resume):
+    """The document tree for `resume` (sections read through .all(), so prefetching applies)."""
+    owner = resume.owner
+    sections = []
+    for key, heading in SECTIONS:
+        items = _items(key, getattr(resume, key).all())
+        if items:
+            sections.append({'key': key, 'heading': heading, 'digest': _digest(items), 'items': items})
+    return {
+        'id': resume.pk,
+        'title': resume.title,
+        'name': owner.get_full_name() or owner.username,
+        'summary': resume.summary_text or '',
+        'sections': sections,
+    }
+
+
+def document_for(owner_id, resume_pk, load_resume):
+    """The cached tree of resume `resume_pk`; `load_resume()` fetches the resume on a miss."""
+    return caching.get_or_load(owner_id, f'document:{resume_pk}', lambda: build(load_resume()))
+
+
+def _fragment_cache():
+    return caches[getattr(settings, 'RESUME_CACHE', 'default')]
+
+
+def _fragment_key(theme, section):
+    return f'resumefragment:{FRAGMENT_VERSION}:{theme}:{section["key"]}:{section["digest"]}'
+
+
+def render_html(doc, theme=DEFAULT_THEME):
+    cache = _fragment_cache()
+    keys = [_fragment_key(theme, section) for section in doc['sections']]
+    fragments = cache.get_many(keys)
+    rendered = {}
+    for key, section in zip(keys, doc['sections']):
+        if key not in fragments:
+            rendered[key] = render_to_string(f'resumes/themes/{theme}/section.html', {'section': section})
+    if rendered:
+        cache.set_many(rendered, getattr(settings, 'RESUME_CACHE_TIMEOUT', 300))
+        fragments.update(rendered)
+    return render_to_string(f'resumes/themes/{theme}/page.html', {
+        'doc': doc,
+        'theme': THEMES[theme],
+        'sections': [mark_safe(fragments[key]) for key in keys],
+    })
+
+
+def render_pdf(doc, theme=DEFAULT_THEME):
+    """Lay the document tree out on letter pages with reportlab; returns PDF bytes."""
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    style = THEMES[theme]
+    accent = HexColor(style['accent'])
+    width, height = letter
+    margin = 50
+    text_width = width - 2 * margin
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.setTitle(doc['title'])
+    y = height - margin
+
+    def ensure(space):
+        nonlocal y
+        if y - space < margin:
+            pdf.showPage()
+            y = height - margin
+
+    def paragraph(text, font, size, indent=0, leading=None):
+        nonlocal y
+        leading = leading or size * 1.3
+        for line in simpleSplit(text, font, size, text_width - indent):
+            ensure(leading)
+            pdf.setFont(font, size)
+            pdf.drawString(margin + indent, y, line)
+            y -= leading
+
+    pdf.setFillColor(accent)
+    paragraph(doc['name'], style['bold'], 20)
+    pdf.setFillColorRGB(0, 0, 0)
+    paragraph(doc['title'], style['font'], 12)
+    y -= 6
+    if doc['summary']:
+        for line in doc['summary'].splitlines():
+            paragraph(line, style['italic'], 10)
+        y -= 6
+
+    for section in doc['sections']:
+        ensure(40)
+        pdf.setFillColor(accent)
+        paragraph(section['heading'], style['bold'], 13)
+        pdf.setStrokeColor(accent)
+        pdf.line(margin, y + 9, width - margin, y + 9)
+        pdf.setFillColorRGB(0, 0, 0)
+        if section['key'] == 'skills':
+            names = [f"{i['title']} ({i['subtitle']})" if i['subtitle'] else i['title'] for i in section['items']]
+            paragraph(', '.join(names), style['font'], 10)
+        else:
+            for item in section['items']:
+                ensure(28)
+                heading = f"{item['title']} - {item['subtitle']}" if item['subtitle'] else item['title']
+                paragraph(heading, style['bold'], 10.5)
+                if item['dates']:
+                    pdf.setFont(style['font'], 9)
+                    pdf.drawRightString(width - margin, y + 13.6, item['dates'])
+                if item['body']:
+                    paragraph(item['body'], style['font'], 9.5, indent=10)
+                if item['link']:
+                    paragraph(item['link'], style['italic'], 9, indent=10)
+                y -= 3
+        y -= 8
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,103 @@
+# resumes/events.py
+"""
+In-process pub/sub for live resume notifications (served by the SSE endpoint).
+
+Each subscriber owns a bounded asyncio.Queue on the event loop it subscribed
+from. Publishing is thread-safe: sync code (views, signal handlers) hands events
+to subscriber loops with call_soon_threadsafe. A subscriber whose queue is full
+is a slow consumer and gets evicted: its queue is drained and replaced by a
+single EVICTED marker so the stream can tell the client to reconnect.
+
+Delivery is per process. With several workers, each one only sees writes made
+in that worker; clients fall back to GET /api/changes/ to catch up.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+EVICTED = object()
+
+
+class Subscriber:
+    __slots__ = ('owner_id', 'resume_id', 'queue', 'loop')
+
+    def __init__(self, owner_id, resume_id, queue_size):
+        self.owner_id = owner_id
+        self.resume_id = resume_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+
+    def wants(self, event):
+        return self.resume_id is None or event.get('resume') == self.resume_id
+
+
+class Broker:
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'EVENT_STREAM_QUEUE_SIZE', 100)
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # owner_id -> {Subscriber}
+
+    def subscribe(self, owner_id, resume_id=None):
+        """Register a subscriber; must be called from the loop that will consume it."""
+        sub = Subscriber(owner_id, resume_id, self.queue_size)
+        with self._lock:
+            self._subscribers[owner_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.owner_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.owner_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, owner_id, event):
+        """Fan `event` (a dict with 'type' and usually 'resume') out to the owner's subscribers."""
+        with self._lock:
+            subs = [sub for sub in self._subscribers.get(owner_id, ()) if sub.wants(event)]
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(self._deliver, sub, event)
+            except RuntimeError:
+                # the subscriber's loop is closed
+                self.unsubscribe(sub)
+
+    def _deliver(self, sub, event):
+        # runs on the subscriber's loop
+        try:
+            sub.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.unsubscribe(sub)
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(EVICTED)
+
+
+broker = Broker()
+
+
+def publish_changes(rows):
+    """Notify subscribers about committed ResumeChange rows."""
+    for row in rows:
+        broker.publish(row.owner_id, {
+            'type': 'change',
+            'seq': row.seq,
+            'op': row.op,
+            'model': row.model,
+            'id': row.object_id,
+            'resume': row.resume_id,
+        })
+
+
+def publish_summary(resume):
+    """Tell the owner's subscribers a generated summary was saved (after commit)."""
+    event = {'type': 'summary', 'resume': resume.pk, 'summary': resume.summary_text}
+    transaction.on_commit(lambda: broker.publish(resume.owner_id, event), using=resume._state.db)
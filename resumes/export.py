@@ -0,0 +1,53 @@
+# resumes/export.py
+"""
+Bulk export of every resume with its sections (`manage.py export_resumes`).
+
+Documents have the archive format (resumes/archive.py):
+{"resume": {...}, "sections": {"project": [...], ...}}. Each shard is read by
+its own thread in id order, `chunk_size` resumes (one query per table) at a
+time, and the streams are merged by resume id, so the output is the same
+whatever the shard layout. Memory stays bounded by a few chunks per shard.
+Archived resumes are exported from their stored documents, merged in by id
+without restoring them.
+"""
+import heapq
+
+from . import archive, sharding
+from .models import Resume, ArchivedResume
+
+CHUNK_SIZE = 500
+
+
+def iter_documents(owner_id=None, chunk_size=CHUNK_SIZE):
+    """Every resume (or only `owner_id`'s), hot or archived, as an archive document, in id order."""
+    def hot_documents():
+        resumes = Resume.objects.order_by('pk')
+        if owner_id is not None:
+            resumes = resumes.filter(owner_id=owner_id)
+        after_id = 0
+        while True:
+            ids = list(resumes.filter(pk__gt=after_id).values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return
+            docs = archive.resume_documents(ids)
+            yield from (docs[pk] for pk in ids)
+            after_id = ids[-1]
+
+    def archived_documents():
+        archived = ArchivedResume.objects.order_by('resume_id')
+        if owner_id is not None:
+            archived = archived.filter(owner_id=owner_id)
+        after_id = 0
+        while True:
+            rows = list(archived.filter(resume_id__gt=after_id).values_list('resume_id', 'payload')[:chunk_size])
+            if not rows:
+                return
+            yield from (archive.decode(payload) for _, payload in rows)
+            after_id = rows[-1][0]
+
+    def shard_documents(alias):
+        return heapq.merge(hot_documents(), archived_documents(), key=lambda doc: doc['resume']['id'])
+
+    aliases = None if owner_id is None else [sharding.shard_for(owner_id)]
+    return sharding.merge(shard_documents, key=lambda doc: doc['resume']['id'], aliases=aliases,
+                          buffer=chunk_size)
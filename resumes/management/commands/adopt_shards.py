@@ -0,0 +1,29 @@
+# resumes/management/commands/adopt_shards.py
+from django.core.management.base import BaseCommand, CommandError
+
+from resumes import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Record owners whose resume data already sits on a shard in the shard directory, so they "
+        "are not placed by hash. Run once after setting RESUME_SHARDS over existing data, before "
+        "serving requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would be recorded without changing anything.")
+
+    def handle(self, *args, **options):
+        if len(sharding.shards()) < 2:
+            raise CommandError("Resume data is not sharded; set RESUME_SHARDS to two or more aliases.")
+        changed, split = sharding.adopt(dry_run=options['dry_run'])
+        if options['verbosity'] > 1:
+            for owner_id, alias in sorted(changed.items()):
+                self.stdout.write(f"owner {owner_id}: {alias}")
+        for owner_id, aliases in sorted(split.items()):
+            self.stderr.write(f"owner {owner_id} has rows on {', '.join(aliases)}; left as the directory says. "
+                              f"Finish with `rebalance_shards --owner {owner_id} --to <shard>`.")
+        verb = "Would record" if options['dry_run'] else "Recorded"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(changed)} owners."))
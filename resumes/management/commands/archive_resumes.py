@@ -0,0 +1,39 @@
+# resumes/management/commands/archive_resumes.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from resumes import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move resumes not updated for --days days (RESUME_ARCHIVE_AFTER_DAYS) out of the hot "
+        "tables into compressed archive rows. Archived resumes are restored when accessed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.RESUME_ARCHIVE_AFTER_DAYS,
+                            help="Archive resumes whose last update is older than this.")
+        parser.add_argument('--chunk-size', type=int, default=archive.CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would be archived without changing anything.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        total = raw = stored = 0
+        for archived, raw_bytes, stored_bytes in archive.archive_stale(
+                cutoff, chunk_size=options['chunk_size'], dry_run=options['dry_run']):
+            total, raw, stored = total + archived, raw + raw_bytes, stored + stored_bytes
+            self.stdout.write(f"{total} resumes {'checked' if options['dry_run'] else 'archived'}")
+
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        ratio = f", {raw} -> {stored} bytes" if total else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {total} resumes last updated before {cutoff:%Y-%m-%d}{ratio} "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
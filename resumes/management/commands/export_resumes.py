@@ -0,0 +1,36 @@
+# resumes/management/commands/export_resumes.py
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from resumes import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every resume with its sections as NDJSON, one document per line in id order, "
+        "archived resumes included. Shards are read in parallel and merged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help="File to write; '-' (default) for stdout.")
+        parser.add_argument('--owner', type=int, help="Only resumes of this user id.")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        out = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        total = 0
+        try:
+            for doc in export.iter_documents(owner_id=options['owner'], chunk_size=options['chunk_size']):
+                out.write(json.dumps(doc, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+                total += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {total} resumes in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,50 @@
+# resumes/management/commands/rebalance_shards.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resumes import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Move owners between resume shards (RESUME_SHARDS) while the API stays up: each owner's "
+        "writes pause for the length of their copy. Without --apply only prints the plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, help="Move just this user id (needs --to).")
+        parser.add_argument('--to', help="Target shard alias for --owner.")
+        parser.add_argument('--apply', action='store_true', help="Carry out the balancing plan.")
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help="Stop once shards differ by at most this fraction of the mean resume count.")
+        parser.add_argument('--settle', type=float, default=1.0,
+                            help="Seconds to let in-flight requests finish around each move.")
+
+    def handle(self, *args, **options):
+        if len(sharding.shards()) < 2:
+            raise CommandError("Resume data is not sharded; set RESUME_SHARDS to two or more aliases.")
+        if options['owner'] is not None:
+            if not options['to']:
+                raise CommandError("--owner needs --to.")
+            moves = [(options['owner'], sharding.shard_for(options['owner']), options['to'], None)]
+        else:
+            moves = sharding.plan(options['tolerance'])
+            if not moves:
+                self.stdout.write(self.style.SUCCESS("Shards are balanced."))
+                return
+
+        for owner_id, source, target, resumes in moves:
+            size = f" ({resumes} resumes)" if resumes is not None else ""
+            if options['owner'] is None and not options['apply']:
+                self.stdout.write(f"owner {owner_id}: {source} -> {target}{size}")
+                continue
+            start = time.perf_counter()
+            try:
+                copied = sharding.move_owner(owner_id, target, settle=options['settle'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f"owner {owner_id}: {source} -> {target}, {sum(copied.values())} rows "
+                              f"in {time.perf_counter() - start:.2f}s")
+        if options['owner'] is None and not options['apply']:
+            self.stdout.write(f"{len(moves)} moves planned; run again with --apply to carry them out.")
@@ -0,0 +1,70 @@
+# resumes/management/commands/regenerate_summaries.py
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from resumes.models import Resume
+from resumes import sharding, summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate summary_text for many resumes: inputs are prefetched per chunk, "
+        "summaries computed on a thread pool and written back with bulk_update."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--llm', action='store_true',
+                            help="Use the configured SUMMARY_PROVIDER (falls back to rule-based per resume).")
+        parser.add_argument('--owner', type=int, help="Only resumes of this user id.")
+        parser.add_argument('--only-missing', action='store_true', help="Skip resumes that already have a summary.")
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--checkpoint', help="JSON file recording the last processed resume id; resumes from it.")
+        parser.add_argument('--dry-run', action='store_true', help="Compute summaries but do not write them.")
+
+    def handle(self, *args, **options):
+        qs = Resume.objects.all()
+        if options['owner']:
+            qs = qs.filter(owner_id=options['owner'])
+        if options['only_missing']:
+            qs = qs.filter(Q(summary_text__isnull=True) | Q(summary_text=''))
+
+        # shards are walked one after another, each in id order
+        shards = sharding.shards()
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+        after_id = 0
+        if checkpoint and checkpoint.exists():
+            try:
+                state = json.loads(checkpoint.read_text())
+                after_id = state['last_id']
+            except (ValueError, KeyError) as exc:
+                raise CommandError(f"Unreadable checkpoint {checkpoint}: {exc}")
+            if state.get('shard') in shards:
+                shards = shards[shards.index(state['shard']):]
+            self.stdout.write(f"Resuming after resume id {after_id}")
+
+        total, sources = 0, Counter()
+        start = time.perf_counter()
+        for alias in shards:
+            with sharding.use(alias):
+                for last_id, processed, chunk_sources in summaries.regenerate(
+                        qs, use_provider=options['llm'], workers=options['workers'],
+                        chunk_size=options['chunk_size'], after_id=after_id, dry_run=options['dry_run']):
+                    total += processed
+                    sources.update(chunk_sources)
+                    if checkpoint and not options['dry_run']:
+                        checkpoint.write_text(json.dumps({'last_id': last_id, 'shard': alias}))
+                    self.stdout.write(f"  ... {total} resumes (last id {last_id})")
+            after_id = 0
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Computed' if options['dry_run'] else 'Regenerated'} {total} summaries in {elapsed:.2f}s "
+            f"({rate:.1f}/s); sources: {dict(sources) or '-'}"
+        ))
@@ -0,0 +1,34 @@
+# resumes/management/commands/rollup_analytics.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resumes import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold resume changes since the last run into the precomputed analytics tables "
+        "(run periodically, e.g. from cron). --check rebuilds from scratch and diffs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every owner, not just changed ones.")
+        parser.add_argument('--check', action='store_true',
+                            help="Only verify: rebuild in memory and report differences (exit 1 if any).")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['check']:
+            problems = analytics.check()
+            for problem in problems[:50]:
+                self.stdout.write(problem)
+            if problems:
+                raise CommandError(f"{len(problems)} analytics differences found")
+            self.stdout.write(self.style.SUCCESS("Analytics tables are consistent."))
+            return
+
+        refreshed = analytics.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed analytics for {refreshed} owners in {time.perf_counter() - start:.2f}s"
+        ))
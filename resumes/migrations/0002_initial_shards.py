@@ -0,0 +1,68 @@
+# Stands in for 0002_initial on databases that have not applied it yet
+# (Django's `replaces`), so a new shard gets Resume.owner without its foreign
+# key constraint: users live in default only, and PostgreSQL refuses a
+# reference to a table the shard does not have. Databases that already
+# applied 0002_initial keep it as it was. Default is constrained either way.
+
+import copy
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+
+class AddOwnerField(migrations.AddField):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        to_model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, to_model):
+            field = copy.copy(to_model._meta.get_field(self.name))
+            field.db_constraint = False
+            schema_editor.add_field(from_state.apps.get_model(app_label, self.model_name), field)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    replaces = [('resumes', '0002_initial')]
+
+    dependencies = [
+        ('resumes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddOwnerField(
+            model_name='resume',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='resume',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='projects', to='resumes.resume'),
+        ),
+        migrations.AddField(
+            model_name='experience',
+            name='resume',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='experiences', to='resumes.resume'),
+        ),
+        migrations.AddField(
+            model_name='education',
+            name='resume',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='educations', to='resumes.resume'),
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='resume',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='achievements', to='resumes.resume'),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='resume',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='resumes.resume'),
+        ),
+    ]
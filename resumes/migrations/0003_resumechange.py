@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:18
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('owner_id', models.BigIntegerField()),
+                ('resume_id', models.BigIntegerField()),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', 'seq'], name='resumes_res_owner_i_b36f00_idx')],
+            },
+        ),
+    ]
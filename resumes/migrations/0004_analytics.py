@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0003_resumechange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OwnerStats',
+            fields=[
+                ('owner_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('resume_count', models.PositiveIntegerField(default=0)),
+                ('skill_count', models.PositiveIntegerField(default=0)),
+                ('achievement_count', models.PositiveIntegerField(default=0)),
+                ('experience_count', models.PositiveIntegerField(default=0)),
+                ('experience_days', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OwnerIssuerCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.BigIntegerField()),
+                ('issuer', models.CharField(blank=True, max_length=200)),
+                ('count', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', '-count'], name='resumes_own_owner_i_eded89_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_id', 'issuer'), name='uniq_owner_issuer')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OwnerSkillCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', '-count'], name='resumes_own_owner_i_ef55cb_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_id', 'name'), name='uniq_owner_skill')],
+            },
+        ),
+    ]
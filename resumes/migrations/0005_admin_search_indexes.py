@@ -0,0 +1,42 @@
+# Indexes serving the admin's prefix ('^field') searches. Django runs those as
+# UPPER(col) LIKE UPPER('term%'), which only a pattern-ops expression index can
+# answer on PostgreSQL; other backends are left unchanged.
+
+from django.db import migrations
+
+INDEXES = (
+    ('resumes_resume', 'title'),
+    ('resumes_project', 'title'),
+    ('resumes_experience', 'company'),
+    ('resumes_education', 'institute'),
+    ('resumes_skill', 'name'),
+    ('resumes_achievement', 'title'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{column}_upper_like" '
+            f'ON "{table}" (UPPER("{column}") varchar_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{column}_upper_like"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0004_analytics'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
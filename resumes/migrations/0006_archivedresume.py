@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0005_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedResume',
+            fields=[
+                ('resume_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('owner_id', models.BigIntegerField(db_index=True)),
+                ('title', models.CharField(max_length=200)),
+                ('last_updated', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Archived resumes of users deleted before user deletion purged them. They
+# hold a plain owner id, so nothing cascaded to them, and restoring one failed
+# on the missing owner. The users table lives on the default database.
+
+from django.db import DEFAULT_DB_ALIAS, migrations
+
+CHUNK_SIZE = 500
+
+
+def purge_orphans(apps, schema_editor):
+    ArchivedResume = apps.get_model('resumes', 'ArchivedResume')
+    User = apps.get_model('users', 'User')
+    archived = ArchivedResume.objects.using(schema_editor.connection.alias)
+    owner_ids = list(archived.values_list('owner_id', flat=True).distinct())
+    for start in range(0, len(owner_ids), CHUNK_SIZE):
+        chunk = owner_ids[start:start + CHUNK_SIZE]
+        existing = set(User.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=chunk).values_list('pk', flat=True))
+        archived.filter(owner_id__in=set(chunk) - existing).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0007_sharding'),
+        ('users', '0002_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_orphans, migrations.RunPython.noop, hints={'model_name': 'archivedresume'}),
+    ]
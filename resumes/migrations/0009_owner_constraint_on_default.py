@@ -0,0 +1,35 @@
+# 0007 dropped Resume.owner's foreign key constraint everywhere. Put it back
+# on default, where the users table lives; shards keep the column
+# unconstrained (see 0002_initial_shards). A later migration that rebuilds
+# resumes_resume on a SQLite shard needs the same treatment.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+
+class AlterOwnerField(migrations.AlterField):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0008_purge_orphaned_archives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AlterOwnerField(
+            model_name='resume',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumes', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
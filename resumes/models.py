@@ -1,8 +1,12 @@
 # resumes/models.py
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 
 class Resume(models.Model):
+    # constrained on default only: with sharding (resumes/sharding.py) users
+    # live in the default database and resumes in their owner's shard
+    # (migrations 0002_initial_shards and 0009)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resumes')
     title = models.CharField(max_length=200, default='My Resume')
     summary_text = models.TextField(blank=True, null=True)
@@ -63,3 +67,112 @@ class Achievement(models.Model):
 
     def __str__(self):
         return self.title
+
+class ResumeChange(models.Model):
+    """
+    Append-only change log (outbox) for resumes and their child sections.
+    `seq` increases monotonically, so clients sync with `GET /api/changes/?since=<seq>`.
+    Rows keep plain ids rather than foreign keys so deletes stay visible after the
+    source rows are gone.
+    """
+    OP_CREATE = 'create'
+    OP_UPDATE = 'update'
+    OP_DELETE = 'delete'
+    OP_CHOICES = ((OP_CREATE, 'Create'), (OP_UPDATE, 'Update'), (OP_DELETE, 'Delete'))
+
+    seq = models.BigAutoField(primary_key=True)
+    owner_id = models.BigIntegerField()
+    resume_id = models.BigIntegerField()
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    data = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['owner_id', 'seq'])]
+
+    def __str__(self):
+        return f"#{self.seq} {self.op} {self.model}:{self.object_id}"
+
+
+#
+# Precomputed analytics (maintained by resumes/analytics.py). Rows are keyed by
+# plain owner ids; owner_id 0 holds the global totals.
+#
+GLOBAL_OWNER_ID = 0
+
+class OwnerStats(models.Model):
+    owner_id = models.BigIntegerField(primary_key=True)
+    resume_count = models.PositiveIntegerField(default=0)
+    skill_count = models.PositiveIntegerField(default=0)
+    achievement_count = models.PositiveIntegerField(default=0)
+    # tenure covers completed experiences (those with an end_date)
+    experience_count = models.PositiveIntegerField(default=0)
+    experience_days = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def avg_tenure_days(self):
+        return round(self.experience_days / self.experience_count, 1) if self.experience_count else None
+
+    def __str__(self):
+        return f"stats for owner {self.owner_id}"
+
+class OwnerSkillCount(models.Model):
+    owner_id = models.BigIntegerField()
+    name = models.CharField(max_length=200)  # lower-cased skill name
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['owner_id', 'name'], name='uniq_owner_skill')]
+        indexes = [models.Index(fields=['owner_id', '-count'])]
+
+class OwnerIssuerCount(models.Model):
+    owner_id = models.BigIntegerField()
+    issuer = models.CharField(max_length=200, blank=True)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['owner_id', 'issuer'], name='uniq_owner_issuer')]
+        indexes = [models.Index(fields=['owner_id', '-count'])]
+
+class AnalyticsWatermark(models.Model):
+    """Single row: the last ResumeChange.seq folded into the analytics tables."""
+    seq = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(blank=True, null=True)
+
+
+class ArchivedResume(models.Model):
+    """
+    Cold copy of a resume that has not been updated for a long time, moved out
+    of the hot tables by `manage.py archive_resumes` (resumes/archive.py). The
+    resume and all its section rows are stored as one zlib-compressed JSON
+    document and restored, with their original ids, when the resume is accessed.
+    """
+    resume_id = models.BigIntegerField(primary_key=True)
+    owner_id = models.BigIntegerField(db_index=True)
+    title = models.CharField(max_length=200)
+    last_updated = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField()
+
+    def __str__(self):
+        return f"archived #{self.resume_id} - {self.title}"
+
+
+#
+# Shard directory (maintained by resumes/sharding.py); both tables live in the
+# default database only.
+#
+class OwnerShard(models.Model):
+    """The database alias holding one owner's resume data."""
+    owner_id = models.BigIntegerField(primary_key=True)
+    shard = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"owner {self.owner_id} on {self.shard}"
+
+class ChangeSequence(models.Model):
+    """Single row: the last ResumeChange.seq handed out while resume data is sharded."""
+    value = models.BigIntegerField(default=0)
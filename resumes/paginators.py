@@ -0,0 +1,50 @@
+# resumes/paginators.py
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    Cheap row-count estimate for `model`'s table, or None when the backend has
+    no estimate. PostgreSQL/MySQL read planner statistics; SQLite reads
+    MAX(rowid), an upper bound found with one b-tree descent.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute("SELECT table_rows FROM information_schema.tables "
+                           "WHERE table_schema = DATABASE() AND table_name = %s", [table])
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin changelist paginator for large tables. An unfiltered list uses the
+    table estimate instead of a full COUNT(*). A filtered or searched list
+    counts at most `max_exact` rows, so later pages of a huge result set are
+    not reachable by number. Narrow the search instead.
+    """
+    max_exact = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not isinstance(qs, QuerySet):
+            return super().count
+        if not qs.query.where:
+            estimate = estimate_table_rows(qs.model, qs.db)
+            if estimate is not None and estimate > self.max_exact:
+                return estimate
+        return qs.order_by()[:self.max_exact].count()
@@ -13,13 +13,14 @@ class IsOwnerOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
 
-        owner = getattr(obj, 'owner', None)
-        if owner is not None:
-            return owner == request.user
+        # compare ids so the check does not load the related user row
+        owner_id = getattr(obj, 'owner_id', None)
+        if owner_id is not None:
+            return owner_id == request.user.pk
 
         resume = getattr(obj, 'resume', None)
         if resume is not None:
-            return resume.owner == request.user
+            return resume.owner_id == request.user.pk
 
         # default deny
         return False
@@ -1,36 +1,99 @@
 # resumes/serializers.py
 from rest_framework import serializers
-from .models import Resume, Project, Experience, Education, Skill, Achievement
+from .models import Resume, Project, Experience, Education, Skill, Achievement, ResumeChange
+from . import changes, sharding
 
-class ProjectSerializer(serializers.ModelSerializer):
+
+class ResumeLookupField(serializers.PrimaryKeyRelatedField):
+    """
+    Resume PK field that resolves against resumes preloaded into the serializer
+    context (``context['resumes']`` -> {pk: Resume}) when present, so validating
+    a list of items does not issue one SELECT per item.
+    """
+
+    def to_internal_value(self, data):
+        resumes = self.context.get('resumes')
+        if resumes is None:
+            return super().to_internal_value(data)
+        try:
+            return resumes[int(data)]
+        except (KeyError, TypeError, ValueError):
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer that writes with bulk_create / bulk_update instead of
+    one INSERT or UPDATE per item. For updates, `instance` must be a list of
+    model instances in the same order as the payload items.
+    """
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = model.objects.bulk_create([model(**attrs) for attrs in validated_data])
+        changes.record(ResumeChange.OP_CREATE, objs)
+        return objs
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        for obj, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+                fields.add(attr)
+        if fields:
+            model.objects.bulk_update(instances, sorted(fields))
+            changes.record(ResumeChange.OP_UPDATE, instances)
+        return instances
+
+
+class ChildSerializer(serializers.ModelSerializer):
+    resume = ResumeLookupField(queryset=Resume.objects.all())
+
+
+class ProjectSerializer(ChildSerializer):
     class Meta:
         model = Project
         fields = '__all__'
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
-class ExperienceSerializer(serializers.ModelSerializer):
+class ExperienceSerializer(ChildSerializer):
     class Meta:
         model = Experience
         fields = '__all__'
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(ChildSerializer):
     class Meta:
         model = Education
         fields = '__all__'
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(ChildSerializer):
     class Meta:
         model = Skill
         fields = '__all__'
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
-class AchievementSerializer(serializers.ModelSerializer):
+class AchievementSerializer(ChildSerializer):
     class Meta:
         model = Achievement
         fields = '__all__'
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
+
+# child section name (Resume related_name) -> serializer
+CHILD_SERIALIZERS = {
+    'projects': ProjectSerializer,
+    'experiences': ExperienceSerializer,
+    'educations': EducationSerializer,
+    'skills': SkillSerializer,
+    'achievements': AchievementSerializer,
+}
 
 class ResumeSerializer(serializers.ModelSerializer):
     projects = ProjectSerializer(many=True, read_only=True)
@@ -44,3 +107,103 @@ class ResumeSerializer(serializers.ModelSerializer):
         fields = ('id', 'owner', 'title', 'summary_text', 'last_updated',
                   'projects', 'experiences', 'educations', 'skills', 'achievements')
         read_only_fields = ('id', 'owner', 'last_updated')
+
+
+def _section_item_serializer(child_class):
+    """
+    Nested item serializer for ResumeDocumentSerializer: the child's fields minus
+    `resume` (implied by the parent), with a writable optional `id` used to match
+    items against existing rows.
+    """
+    model = child_class.Meta.model
+    meta = type('Meta', (), {'model': model, 'exclude': ('resume',)})
+    return type(f'{model.__name__}ItemSerializer', (serializers.ModelSerializer,), {
+        'Meta': meta,
+        'id': serializers.IntegerField(required=False),
+    })
+
+
+SECTION_ITEM_SERIALIZERS = {name: _section_item_serializer(cls) for name, cls in CHILD_SERIALIZERS.items()}
+
+
+class ResumeDocumentSerializer(serializers.ModelSerializer):
+    """
+    Writable whole-resume document. On update every submitted section is diffed
+    against the stored rows: items without `id` are inserted, items with an `id`
+    are updated only if a field changed, and stored items missing from the list
+    are deleted. Each section costs at most one DELETE, one bulk UPDATE and one
+    bulk INSERT. A PUT treats omitted sections as empty; a PATCH leaves them alone.
+    The applied changes are exposed on `.diff` after save().
+    """
+    projects = SECTION_ITEM_SERIALIZERS['projects'](many=True, required=False)
+    experiences = SECTION_ITEM_SERIALIZERS['experiences'](many=True, required=False)
+    educations = SECTION_ITEM_SERIALIZERS['educations'](many=True, required=False)
+    skills = SECTION_ITEM_SERIALIZERS['skills'](many=True, required=False)
+    achievements = SECTION_ITEM_SERIALIZERS['achievements'](many=True, required=False)
+
+    class Meta:
+        model = Resume
+        fields = ResumeSerializer.Meta.fields
+        read_only_fields = ResumeSerializer.Meta.read_only_fields
+
+    def validate(self, attrs):
+        # a PATCH makes nested fields optional too; new items still need them all
+        errors = {}
+        for name in CHILD_SERIALIZERS:
+            required = [f.field_name for f in self.fields[name].child.fields.values()
+                        if f.required and not f.read_only]
+            for index, item in enumerate(attrs.get(name, [])):
+                missing = [f for f in required if f not in item]
+                if 'id' not in item and missing:
+                    errors.setdefault(name, {})[index] = {f: ['This field is required.'] for f in missing}
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def update(self, instance, validated_data):
+        sections = {name: validated_data.pop(name, []) for name in CHILD_SERIALIZERS
+                    if name in validated_data or not self.partial}
+        self.diff = {}
+        with sharding.atomic(), changes.batch():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            for name, items in sections.items():
+                self.diff[name] = self._sync_section(instance, name, items)
+        return instance
+
+    def _sync_section(self, resume, name, items):
+        model = CHILD_SERIALIZERS[name].Meta.model
+        existing = {obj.pk: obj for obj in getattr(resume, name).all()}
+        to_create, to_update, fields, seen = [], [], set(), set()
+
+        for attrs in items:
+            attrs = dict(attrs)
+            pk = attrs.pop('id', None)
+            if pk is None:
+                to_create.append(model(resume=resume, **attrs))
+                continue
+            obj = existing.get(pk)
+            if obj is None or pk in seen:
+                raise serializers.ValidationError({name: [f"Item {pk} is not part of this resume or is duplicated."]})
+            seen.add(pk)
+            changed = [attr for attr, value in attrs.items() if getattr(obj, attr) != value]
+            for attr in changed:
+                setattr(obj, attr, attrs[attr])
+            if changed:
+                to_update.append(obj)
+                fields.update(changed)
+
+        deleted = [pk for pk in existing if pk not in seen]
+        if deleted:
+            model.objects.filter(pk__in=deleted).delete()
+        if to_update:
+            model.objects.bulk_update(to_update, sorted(fields))
+            changes.record(ResumeChange.OP_UPDATE, to_update)
+        created = model.objects.bulk_create(to_create) if to_create else []
+        changes.record(ResumeChange.OP_CREATE, created)
+        return {
+            'created': [obj.pk for obj in created],
+            'updated': [obj.pk for obj in to_update],
+            'deleted': deleted,
+        }
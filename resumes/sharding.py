@@ -0,0 +1,631 @@
+# resumes/sharding.py
+"""
+Resume data partitioned by owner across several databases.
+
+settings.RESUME_SHARDS lists the database aliases holding resume data:
+resumes, their sections, the change feed and the archive (SHARDED_MODELS).
+All of one owner's rows live on one shard, so every per-owner query and
+transaction stays on a single database. Users, the shard directory and the
+analytics tables stay in `default`. With RESUME_SHARDS = ['default'] (the
+default) the router steps aside and nothing changes.
+
+Placement: the directory (OwnerShard, in default) maps owners to aliases. An
+owner seen for the first time is placed by hashing their id over the shard
+list and recorded, so adding a shard later moves nobody. Rows written before
+sharding was turned on are not where the hash would put them: `adopt()`
+(`manage.py adopt_shards`) records their owners under the shard holding
+them, and must run before the first request. Lookups are cached
+in the shared cache (settings.RESUME_CACHE) when every worker sees it
+(settings.RESUME_CACHE_SHARED); otherwise each lookup reads the directory,
+and moves are refused, since other workers would not see the write pause.
+
+Routing (ShardRouter in settings.DATABASE_ROUTERS), first match wins:
+
+  1. an instance hint: related managers, saves and deletes follow the row
+  2. the innermost `use(alias)` / `for_owner(owner_id)` block
+  3. the authenticated user of the current request (ShardRoutingMiddleware)
+  4. the first shard
+
+`Model.objects.create()` and `bulk_create()` carry no instance hint, so
+outside a request create rows through a related manager
+(`user.resumes.create()`, `resume.skills.create()`) or inside `for_owner()`.
+
+The viewsets always filter by request.user, so their queries need no
+changes; their transactions use `atomic()`, which opens the transaction on
+the routed shard instead of on default.
+
+Ids stay unique across shards, so rows can move without renumbering: each
+shard's auto-increment counters start at its position in settings.DATABASES
+times ID_BLOCK (set after every migrate, SQLite and PostgreSQL). Change-feed
+seqs come from one counter in default instead (ChangeSequence), so an
+owner's seqs keep increasing across a move and `since` cursors stay valid.
+Resume.owner has no foreign key constraint on a shard (migrations
+0002_initial_shards and 0009), since users only exist in default.
+
+`move_owner()` rebalances online, one owner at a time: that owner's writes
+get 503 with Retry-After while their rows are copied, reads carry on from
+the old shard until the directory entry flips, and every other owner is
+unaffected. It refuses to run when the owner's rows are not on the shard the
+directory names, since any purge would then delete the only copy. `plan()` picks moves that even out resume counts
+(`manage.py rebalance_shards`).
+
+Cross-shard work (search, analytics, bulk export) goes through `fan_out()`
+and `merge()`, which run one thread per shard.
+"""
+import heapq
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Count, F, Max
+from django.db.models.signals import post_delete, post_migrate
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import (Resume, Project, Experience, Education, Skill, Achievement, ResumeChange,
+                     ArchivedResume, OwnerShard, ChangeSequence)
+
+SECTION_MODELS = (Project, Experience, Education, Skill, Achievement)
+SHARDED_MODELS = (Resume,) + SECTION_MODELS + (ResumeChange, ArchivedResume)
+# tables whose auto-increment ids get a per-shard range
+RANGED_MODELS = (Resume,) + SECTION_MODELS
+ID_BLOCK = 1 << 40
+CHUNK_SIZE = 500
+MOVE_TIMEOUT = 300  # seconds a crashed move may keep an owner read-only
+
+_scope = ContextVar('resume_shard_scope', default=None)  # (alias, owner_id)
+_request = ContextVar('resume_shard_request', default=None)
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "These resumes are being moved to another database; retry shortly."
+    default_code = 'shard_moving'
+    wait = 1  # sent as Retry-After
+
+
+def shards():
+    return list(getattr(settings, 'RESUME_SHARDS', [DEFAULT_DB_ALIAS]))
+
+
+def enabled():
+    return shards() != [DEFAULT_DB_ALIAS]
+
+
+def _cache():
+    return caches[getattr(settings, 'RESUME_CACHE', 'default')]
+
+
+def _cache_shared():
+    return getattr(settings, 'RESUME_CACHE_SHARED', True)
+
+
+def _directory_key(owner_id):
+    return f'resume-shard:{owner_id}'
+
+
+def _moving_key(owner_id):
+    return f'resume-shard-moving:{owner_id}'
+
+
+def hash_shard(owner_id, aliases=None):
+    """Where an owner not yet in the directory is placed."""
+    aliases = shards() if aliases is None else aliases
+    return aliases[zlib.crc32(str(owner_id).encode()) % len(aliases)]
+
+
+def shards_for(owner_ids):
+    """{owner_id: alias} for `owner_ids`, placing and recording owners seen for the first time."""
+    owner_ids = set(owner_ids)
+    aliases = shards()
+    if len(aliases) == 1:
+        return dict.fromkeys(owner_ids, aliases[0])
+    shared = _cache_shared()
+    if shared:
+        keys = {_directory_key(owner_id): owner_id for owner_id in owner_ids}
+        found = {keys[key]: alias for key, alias in _cache().get_many(list(keys)).items()}
+    else:
+        found = dict(OwnerShard.objects.filter(owner_id__in=owner_ids).values_list('owner_id', 'shard'))
+    missing = owner_ids - set(found)
+    if missing:
+        OwnerShard.objects.bulk_create([OwnerShard(owner_id=owner_id, shard=hash_shard(owner_id, aliases))
+                                        for owner_id in missing], ignore_conflicts=True)
+        placed = dict(OwnerShard.objects.filter(owner_id__in=missing).values_list('owner_id', 'shard'))
+        if shared:
+            _cache().set_many({_directory_key(owner_id): alias for owner_id, alias in placed.items()}, None)
+        found.update(placed)
+    return found
+
+
+def shard_for(owner_id):
+    aliases = shards()
+    if len(aliases) == 1:
+        return aliases[0]
+    return shards_for([owner_id])[owner_id]
+
+
+def partition(items, owner_of=lambda item: item):
+    """Group `items` by the shard of their owner: {alias: [item, ...]}."""
+    items = list(items)
+    placement = shards_for({owner_of(item) for item in items})
+    groups = {}
+    for item in items:
+        groups.setdefault(placement[owner_of(item)], []).append(item)
+    return groups
+
+
+@contextmanager
+def use(alias):
+    """Route resume data to shard `alias` inside this block."""
+    token = _scope.set((alias, None))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+@contextmanager
+def for_owner(owner_id):
+    """Route resume data to `owner_id`'s shard inside this block."""
+    token = _scope.set((None, owner_id))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _owner_of(instance):
+    if isinstance(instance, (Resume, ResumeChange, ArchivedResume)):
+        return instance.owner_id
+    if type(instance).resume.is_cached(instance):
+        return instance.resume.owner_id
+    return None
+
+
+def _request_owner():
+    request = _request.get()
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None, None
+    # one directory lookup per request
+    cached = getattr(request, '_resume_shard', None)
+    if cached is None or cached[0] != user.pk:
+        cached = request._resume_shard = (user.pk, shard_for(user.pk))
+    return cached[1], user.pk
+
+
+def route(hints=None):
+    """(alias, owner_id or None) for resume data, by the rules in the module docstring."""
+    aliases = shards()
+    if len(aliases) == 1:
+        return aliases[0], None
+    instance = (hints or {}).get('instance')
+    if isinstance(instance, SHARDED_MODELS):
+        owner_id = _owner_of(instance)
+        if instance._state.db:
+            return instance._state.db, owner_id
+        if owner_id is not None:
+            return shard_for(owner_id), owner_id
+    elif isinstance(instance, get_user_model()):
+        return shard_for(instance.pk), instance.pk
+    scope = _scope.get()
+    if scope is not None:
+        alias, owner_id = scope
+        return (alias, None) if alias else (shard_for(owner_id), owner_id)
+    alias, owner_id = _request_owner()
+    if alias is not None:
+        return alias, owner_id
+    return aliases[0], None
+
+
+def current():
+    """The shard resume data is routed to right now."""
+    return route()[0] if enabled() else DEFAULT_DB_ALIAS
+
+
+def atomic(**kwargs):
+    """transaction.atomic() on the shard in scope, for blocks that write resume data."""
+    return transaction.atomic(using=current(), **kwargs)
+
+
+class ShardRouter:
+    """Sends SHARDED_MODELS to their owner's shard and everything else to default."""
+
+    def db_for_read(self, model, **hints):
+        if not enabled():
+            return None
+        if model not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        return route(hints)[0]
+
+    def db_for_write(self, model, **hints):
+        if not enabled():
+            return None
+        if model not in SHARDED_MODELS:
+            return DEFAULT_DB_ALIAS
+        alias, owner_id = route(hints)
+        if owner_id is not None and _cache().get(_moving_key(owner_id)):
+            raise ShardMoving()
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # a user (default) owns resumes on any shard; resume rows only relate within one shard
+        if enabled() and isinstance(obj1, SHARDED_MODELS) != isinstance(obj2, SHARDED_MODELS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return None
+        # every other database is a shard: resume data only (resumes' data
+        # migrations just add indexes to the section tables)
+        if app_label != 'resumes':
+            return False
+        return model_name is None or model_name in {m._meta.model_name for m in SHARDED_MODELS}
+
+
+class ShardRoutingMiddleware:
+    """Puts the request in scope, so queries go to the shard of its authenticated user."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+
+#
+# Fan-out
+#
+def _run(fn, alias):
+    with use(alias):
+        return fn(alias)
+
+
+def _run_in_thread(fn, alias):
+    try:
+        return _run(fn, alias)
+    finally:
+        connections.close_all()
+
+
+def _inline(aliases):
+    # inside a transaction the work must see its uncommitted writes, so it
+    # stays on the caller's connections
+    return len(aliases) <= 1 or any(connections[alias].in_atomic_block for alias in aliases)
+
+
+def fan_out(fn, aliases=None):
+    """Call fn(alias) for every shard, inside use(alias), one thread each. Returns {alias: result}."""
+    aliases = shards() if aliases is None else list(aliases)
+    if _inline(aliases):
+        return {alias: _run(fn, alias) for alias in aliases}
+    with ThreadPoolExecutor(max_workers=len(aliases), thread_name_prefix='shard') as pool:
+        futures = {alias: pool.submit(_run_in_thread, fn, alias) for alias in aliases}
+        return {alias: future.result() for alias, future in futures.items()}
+
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _scoped(fn, alias):
+    # the scope is only set while the shard's iterator runs, not while the caller does
+    with use(alias):
+        iterator = iter(fn(alias))
+    while True:
+        with use(alias):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _produce(fn, alias, items, stop):
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        with use(alias):
+            for item in fn(alias):
+                if not put(item):
+                    return
+    except BaseException as exc:
+        put(_Failed(exc))
+    finally:
+        put(_DONE)
+        connections.close_all()
+
+
+def _consume(items):
+    while True:
+        item = items.get()
+        if item is _DONE:
+            return
+        if isinstance(item, _Failed):
+            raise item.exc
+        yield item
+
+
+def merge(fn, key, aliases=None, buffer=CHUNK_SIZE):
+    """
+    Iterate fn(alias) (an iterable sorted by `key`) on every shard and yield
+    one stream sorted by `key`. Each shard is read ahead by its own thread, at
+    most `buffer` items ahead of the consumer.
+    """
+    aliases = shards() if aliases is None else list(aliases)
+    if _inline(aliases):
+        yield from heapq.merge(*(_scoped(fn, alias) for alias in aliases), key=key)
+        return
+    stop = threading.Event()
+    streams = []
+    for alias in aliases:
+        items = queue.Queue(buffer)
+        threading.Thread(target=_produce, args=(fn, alias, items, stop), daemon=True,
+                         name=f'shard-{alias}').start()
+        streams.append(_consume(items))
+    try:
+        yield from heapq.merge(*streams, key=key)
+    finally:
+        stop.set()
+
+
+def locate_resume(resume_id):
+    """The shard holding resume `resume_id`, hot or archived; the first shard if none does."""
+    aliases = shards()
+    if len(aliases) == 1:
+        return aliases[0]
+    try:
+        resume_id = int(resume_id)
+    except (TypeError, ValueError):
+        return aliases[0]
+
+    def holds(alias):
+        return (Resume.objects.filter(pk=resume_id).exists()
+                or ArchivedResume.objects.filter(resume_id=resume_id).exists())
+
+    found = fan_out(holds)
+    return next((alias for alias in aliases if found[alias]), aliases[0])
+
+
+#
+# Change-feed seqs
+#
+def _max_seq():
+    return max(fan_out(lambda alias: ResumeChange.objects.aggregate(m=Max('seq'))['m'] or 0).values())
+
+
+def number(rows):
+    """Give new ResumeChange rows their seqs from the global counter, when sharded."""
+    if not rows or not enabled():
+        return
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if not ChangeSequence.objects.filter(pk=1).update(value=F('value') + len(rows)):
+            # first sharded write: continue after the seqs already handed out
+            ChangeSequence.objects.create(pk=1, value=_max_seq() + len(rows))
+        last = ChangeSequence.objects.values_list('value', flat=True).get(pk=1)
+    for seq, row in enumerate(rows, last - len(rows) + 1):
+        row.seq = seq
+
+
+#
+# Rebalancing
+#
+def _owner_querysets(owner_id, alias):
+    resume_ids = list(Resume.objects.using(alias).filter(owner_id=owner_id).values_list('pk', flat=True))
+    return ([model.objects.using(alias).filter(resume_id__in=resume_ids) for model in SECTION_MODELS]
+            + [Resume.objects.using(alias).filter(pk__in=resume_ids),
+               ResumeChange.objects.using(alias).filter(owner_id=owner_id),
+               ArchivedResume.objects.using(alias).filter(owner_id=owner_id)])
+
+
+def _purge(owner_id, aliases):
+    for alias in aliases:
+        with transaction.atomic(using=alias):
+            for qs in _owner_querysets(owner_id, alias):
+                qs._raw_delete(alias)
+
+
+def _copy(queryset, target):
+    model = queryset.model
+    fields = model._meta.local_concrete_fields
+    copied, batch = 0, []
+    for obj in queryset.order_by('pk').iterator(chunk_size=CHUNK_SIZE):
+        batch.append(obj)
+        if len(batch) == CHUNK_SIZE:
+            # raw: keep auto_now / auto_now_add values as they are
+            model._base_manager._insert(batch, fields=fields, using=target, raw=True)
+            copied, batch = copied + len(batch), []
+    if batch:
+        model._base_manager._insert(batch, fields=fields, using=target, raw=True)
+    return copied + len(batch)
+
+
+def move_owner(owner_id, target, settle=1.0):
+    """
+    Move one owner's resume data to shard `target`, online. The owner's
+    writes are refused (ShardMoving) from `settle` seconds before the copy
+    until the directory points at `target`; the old copy is deleted `settle`
+    seconds after that, once requests already reading it are done.
+    Returns {model_name: rows copied}.
+    """
+    from . import caching
+
+    if target not in shards():
+        raise ValueError(f"Unknown shard '{target}'.")
+    if not _cache_shared():
+        raise ValueError("Moving owners needs a cache shared by every worker (REDIS_URL), "
+                         "or a single worker (SINGLE_PROCESS=True).")
+    source = shard_for(owner_id)
+    held = holdings(owner_id)
+    if held and source not in held:
+        raise ValueError(f"Owner {owner_id}'s rows are on {', '.join(held)}, not on {source} where the "
+                         f"directory places them; run `manage.py adopt_shards` first.")
+    if source == target:
+        # finish an interrupted move: only the directory's copy counts
+        _purge(owner_id, [alias for alias in held if alias != target])
+        return {}
+
+    cache = _cache()
+    cache.set(_moving_key(owner_id), target, MOVE_TIMEOUT)
+    try:
+        time.sleep(settle)  # writes routed before the flag was set commit meanwhile
+        _purge(owner_id, [target])  # leftovers of an earlier, failed attempt
+        copied = {}
+        with transaction.atomic(using=source), transaction.atomic(using=target):
+            # on backends with row locks, wait for writers that are still open
+            list(Resume.objects.using(source).select_for_update().filter(owner_id=owner_id).values_list('pk'))
+            for qs in _owner_querysets(owner_id, source):
+                copied[qs.model._meta.model_name] = _copy(qs, target)
+        OwnerShard.objects.update_or_create(owner_id=owner_id, defaults={'shard': target})
+        cache.set(_directory_key(owner_id), target, None)
+    finally:
+        cache.delete(_moving_key(owner_id))
+    time.sleep(settle)
+    _purge(owner_id, [source])
+    caching.invalidate([owner_id])
+    return copied
+
+
+def holdings(owner_id):
+    """{alias: rows} for the shards holding any of `owner_id`'s resumes, archived resumes or feed rows."""
+    def count(alias):
+        return sum(model.objects.filter(owner_id=owner_id).count() for model in (Resume, ArchivedResume, ResumeChange))
+
+    return {alias: n for alias, n in fan_out(count).items() if n}
+
+
+def adopt(dry_run=False):
+    """
+    Record every owner with rows on exactly one shard in the directory under
+    that shard, for data written before sharding was turned on (or a lost
+    directory). Owners with rows on several shards, e.g. after an interrupted
+    move, are left as they are. Returns ({owner_id: alias} recorded or
+    corrected, {owner_id: [aliases]} left).
+    """
+    def owners(alias):
+        found = set()
+        for model in (Resume, ArchivedResume, ResumeChange):
+            found.update(model.objects.order_by().values_list('owner_id', flat=True).distinct())
+        return found
+
+    where = {}
+    for alias, found in fan_out(owners).items():
+        for owner_id in found:
+            where.setdefault(owner_id, []).append(alias)
+    placed = {owner_id: aliases[0] for owner_id, aliases in where.items() if len(aliases) == 1}
+    split = {owner_id: sorted(aliases) for owner_id, aliases in where.items() if len(aliases) > 1}
+
+    changed = {}
+    owner_ids = sorted(placed)
+    for start in range(0, len(owner_ids), CHUNK_SIZE):
+        chunk = owner_ids[start:start + CHUNK_SIZE]
+        recorded = dict(OwnerShard.objects.filter(owner_id__in=chunk).values_list('owner_id', 'shard'))
+        changed.update({owner_id: placed[owner_id] for owner_id in chunk
+                        if recorded.get(owner_id) != placed[owner_id]})
+    if changed and not dry_run:
+        OwnerShard.objects.bulk_create(
+            [OwnerShard(owner_id=owner_id, shard=alias) for owner_id, alias in changed.items()],
+            update_conflicts=True, unique_fields=['owner_id'], update_fields=['shard'], batch_size=CHUNK_SIZE)
+        _cache().delete_many([_directory_key(owner_id) for owner_id in changed])
+    return changed, split
+
+
+def plan(tolerance=0.1):
+    """
+    Moves that even out the number of resumes per shard, as
+    [(owner_id, source, target, resumes)]: while the fullest and emptiest
+    shards differ by more than `tolerance` of the mean, the owner on the
+    fullest shard whose size is closest to half the gap moves.
+    """
+    counts = fan_out(lambda alias: dict(Resume.objects.values('owner_id').annotate(n=Count('id'))
+                                        .values_list('owner_id', 'n')))
+    load = {alias: sum(owners.values()) for alias, owners in counts.items()}
+    mean = sum(load.values()) / len(load)
+    moves = []
+    while len(load) > 1:
+        source, target = max(load, key=load.get), min(load, key=load.get)
+        gap = load[source] - load[target]
+        if gap <= max(tolerance * mean, 1):
+            break
+        fits = [(abs(gap / 2 - n), owner_id) for owner_id, n in counts[source].items() if n < gap]
+        if not fits:
+            break
+        owner_id = min(fits)[1]
+        n = counts[source].pop(owner_id)
+        counts[target][owner_id] = n
+        load[source] -= n
+        load[target] += n
+        moves.append((owner_id, source, target, n))
+    return moves
+
+
+#
+# Signal receivers
+#
+def _reserve_ids(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Start each shard's id counters at its own block, so ids are unique across shards."""
+    if sender.name != 'resumes':
+        return
+    start = list(settings.DATABASES).index(using) * ID_BLOCK
+    if not start:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in RANGED_MODELS:
+            if not router.allow_migrate_model(using, model):
+                continue
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s",
+                               [start, table, start])
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s WHERE NOT EXISTS "
+                               "(SELECT 1 FROM sqlite_sequence WHERE name = %s)", [table, start, table])
+            elif connection.vendor == 'postgresql':
+                pk = model._meta.pk.column
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, "
+                               f"(SELECT COALESCE(MAX({quote(pk)}), 0) + 1 FROM {quote(table)})), false)",
+                               [table, pk, start + 1])
+
+
+def _owner_deleted(sender, instance, **kwargs):
+    from . import analytics
+
+    # Django's delete collector only cascades within the user's database, and
+    # archived resumes and change-feed rows hold plain owner ids. With the
+    # feed rows gone the rollup would never revisit the owner, so their
+    # analytics rows go now.
+    _purge(instance.pk, [shard_for(instance.pk)])
+    analytics.refresh_owners([instance.pk])
+    if not enabled():
+        return
+    OwnerShard.objects.filter(owner_id=instance.pk).delete()
+    _cache().delete(_directory_key(instance.pk))
+
+
+post_migrate.connect(_reserve_ids, dispatch_uid='resume_shard_reserve_ids')
+post_delete.connect(_owner_deleted, sender=settings.AUTH_USER_MODEL, dispatch_uid='resume_shard_owner_deleted')
@@ -0,0 +1,343 @@
+# resumes/summaries.py
+"""
+Resume summary generation.
+
+`summarize()` / `summarize_many()` try the configured LLM provider
+(settings.SUMMARY_PROVIDER) and fall back to the rule-based summary for any
+resume the provider could not handle. Providers:
+
+- 'openai': one persistent OpenAI client per process (pooled keep-alive HTTP
+  connections), a per-call timeout, and several resumes per request when
+  summarising in bulk.
+- 'stub': deterministic local provider with configurable latency and failure
+  pattern, for tests and benchmarks without network access.
+
+Every provider sits behind a circuit breaker: after `failure_threshold`
+consecutive failures calls are skipped (rule-based fallback) until
+`reset_timeout` seconds have passed, then a single trial call is let through.
+
+Inputs are read through `resume.<section>.all()`, so callers that prefetch
+skills/projects/experiences pay no per-resume queries.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from . import changes, sharding
+from .models import Resume, ResumeChange
+
+logger = logging.getLogger(__name__)
+
+PROMPT_HEADER = (
+    "Write a short (2-3 sentence) professional resume summary for a backend developer "
+    "given the following details. Use a confident, concise tone.\n\n"
+)
+
+
+def _display_name(user):
+    return user.first_name or user.username
+
+
+def rule_based_summary(user, resume):
+    """Summary built from skills/projects/experiences; always available."""
+    top_skills = [s.name for s in resume.skills.all()[:8]]
+    projects = [p.title for p in resume.projects.all()[:3]]
+    recent = sorted(resume.experiences.all(), key=lambda e: e.start_date, reverse=True)[:2]
+    roles = [f"{e.role} at {e.company}" for e in recent]
+
+    parts = []
+    name = _display_name(user)
+    parts.append(f"{name} is a backend developer experienced in {', '.join(top_skills) if top_skills else 'web development and backend systems'}.")
+    if roles:
+        parts.append("Recent roles: " + "; ".join(roles) + ".")
+    if projects:
+        parts.append("Recent projects: " + ", ".join(projects) + ".")
+    return " ".join(parts)
+
+
+def build_prompt(user, resume):
+    return (
+        f"Name: {_display_name(user)}\n"
+        f"Skills: {', '.join(s.name for s in resume.skills.all()[:10])}\n"
+        f"Top Projects: {', '.join(p.title for p in resume.projects.all()[:5])}\n"
+        f"Recent Roles: {', '.join(f'{e.role} at {e.company}' for e in resume.experiences.all()[:3])}\n"
+    )
+
+
+class SummaryProviderError(Exception):
+    """A provider call failed (transport error, timeout, bad response)."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # half-open: let one trial call through, re-open on failure
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class SummaryProvider:
+    """
+    Base provider. Subclasses implement `complete(prompt)` and may override
+    `complete_batch(prompts)` to serve several prompts with one call; both
+    return summary text and raise SummaryProviderError on failure.
+    """
+    name = None
+
+    def __init__(self, timeout=10.0, batch_size=1, failure_threshold=5, reset_timeout=30.0):
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def complete(self, prompt):
+        raise NotImplementedError
+
+    def complete_batch(self, prompts):
+        return [self.complete(prompt) for prompt in prompts]
+
+    def summarize_many(self, prompts):
+        """Return one summary (or None where the provider failed) per prompt."""
+        results = []
+        for start in range(0, len(prompts), self.batch_size):
+            chunk = prompts[start:start + self.batch_size]
+            if not self.breaker.allow():
+                results.extend([None] * len(chunk))
+                continue
+            try:
+                texts = self.complete_batch(chunk) if len(chunk) > 1 else [self.complete(chunk[0])]
+            except SummaryProviderError as exc:
+                logger.warning("summary provider %s failed: %s", self.name, exc)
+                self.breaker.record_failure()
+                results.extend([None] * len(chunk))
+                continue
+            self.breaker.record_success()
+            results.extend((text or '').strip() or None for text in texts)
+        return results
+
+
+class OpenAIProvider(SummaryProvider):
+    name = 'openai'
+
+    def __init__(self, api_key='', model='gpt-3.5-turbo', max_tokens=120, max_connections=10, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_connections = max_connections
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # created on first use: importing openai adds ~0.5s to process startup
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        import httpx
+                        import openai
+                    except ImportError as exc:
+                        raise SummaryProviderError(f"the openai package is not installed: {exc}") from exc
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key,
+                        timeout=self.timeout,
+                        max_retries=0,  # the circuit breaker decides when to try again
+                        http_client=httpx.Client(
+                            timeout=self.timeout,
+                            limits=httpx.Limits(max_connections=self.max_connections,
+                                                max_keepalive_connections=self.max_connections),
+                        ),
+                    )
+        return self._client
+
+    def _chat(self, content, max_tokens):
+        client = self.client  # SummaryProviderError without the openai package
+        import openai
+        try:
+            resp = client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": content}],
+                max_tokens=max_tokens,
+                n=1,
+                timeout=self.timeout,
+            )
+        except openai.APIError as exc:  # includes connection errors and timeouts
+            raise SummaryProviderError(str(exc)) from exc
+        try:
+            return resp.choices[0].message.content or ''
+        except (AttributeError, IndexError, TypeError) as exc:
+            raise SummaryProviderError(f"malformed completion: {exc!r}") from exc
+
+    def complete(self, prompt):
+        return self._chat(PROMPT_HEADER + prompt + "\nSummary:", self.max_tokens)
+
+    def complete_batch(self, prompts):
+        numbered = "\n".join(f"### Candidate {i}\n{prompt}" for i, prompt in enumerate(prompts, 1))
+        content = (
+            PROMPT_HEADER
+            + f"Do this for each of the {len(prompts)} candidates below. Reply with only a JSON "
+            "array of strings, one summary per candidate, in the same order.\n\n" + numbered
+        )
+        raw = self._chat(content, self.max_tokens * len(prompts))
+        try:
+            texts = json.loads(raw)
+        except ValueError as exc:
+            raise SummaryProviderError(f"batch reply is not JSON: {exc}") from exc
+        if not isinstance(texts, list) or len(texts) != len(prompts):
+            raise SummaryProviderError("batch reply does not match the number of prompts")
+        return [str(text) for text in texts]
+
+
+class StubProvider(SummaryProvider):
+    """
+    Deterministic offline provider. `latency` seconds are slept per call (one
+    call per batch); with `fail_every=k` every k-th call raises, which lets the
+    circuit breaker and fallback paths be exercised without a network.
+    """
+    name = 'stub'
+
+    def __init__(self, latency=0.0, fail_every=0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            raise SummaryProviderError(f"stub failure on call {calls}")
+
+    def _text(self, prompt):
+        name = prompt.splitlines()[0].removeprefix('Name: ')
+        digest = hashlib.sha1(prompt.encode()).hexdigest()[:8]
+        return f"{name} is a backend developer (stub summary {digest})."
+
+    def complete(self, prompt):
+        self._call()
+        return self._text(prompt)
+
+    def complete_batch(self, prompts):
+        self._call()
+        return [self._text(prompt) for prompt in prompts]
+
+
+PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+def check_settings():
+    """Reject an unknown settings.SUMMARY_PROVIDER at startup (called from AppConfig.ready)."""
+    name = getattr(settings, 'SUMMARY_PROVIDER', '')
+    if name and name not in PROVIDERS:
+        raise ImproperlyConfigured(
+            f"SUMMARY_PROVIDER={name!r} is not one of {', '.join(map(repr, PROVIDERS))} or ''.")
+
+
+@lru_cache(maxsize=None)
+def get_provider():
+    """The process-wide provider (reused so its HTTP pool stays warm), or None for rule-based only."""
+    name = getattr(settings, 'SUMMARY_PROVIDER', '')
+    if not name:
+        return None
+    if name not in PROVIDERS:
+        logger.error("unknown summary provider %r; using rule-based summaries", name)
+        return None
+    options = dict(getattr(settings, 'SUMMARY_PROVIDER_OPTIONS', {}).get(name, {}))
+    return PROVIDERS[name](**options)
+
+
+def summarize_many(pairs, use_provider=True):
+    """
+    Summaries for a list of (user, resume) pairs, batched through the provider
+    where possible. Returns a list of (summary_text, source) where source is the
+    provider name or 'rule_based'.
+    """
+    provider = get_provider() if use_provider else None
+    texts = provider.summarize_many([build_prompt(u, r) for u, r in pairs]) if provider else [None] * len(pairs)
+    return [
+        (text, provider.name) if text else (rule_based_summary(user, resume), 'rule_based')
+        for (user, resume), text in zip(pairs, texts)
+    ]
+
+
+def summarize(user, resume):
+    return summarize_many([(user, resume)])[0]
+
+
+def regenerate(queryset, use_provider=False, workers=4, chunk_size=500, after_id=0, dry_run=False):
+    """
+    (Re)generate summaries for every resume in `queryset` with pk > after_id.
+
+    Resumes are read in pk order in chunks of `chunk_size`, with owner and the
+    summary inputs prefetched (a fixed number of queries per chunk). Each chunk
+    is split across a thread pool of `workers` (summaries are I/O-bound when an
+    LLM provider is used; the rule-based path needs no database access) and
+    written back with one bulk_update. Yields (last_pk, processed, sources)
+    after each chunk commits so callers can checkpoint and report progress.
+    """
+    base = queryset.order_by('pk').prefetch_related('owner', 'skills', 'projects', 'experiences')
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            resumes = list(base.filter(pk__gt=after_id)[:chunk_size])
+            if not resumes:
+                return
+            step = -(-len(resumes) // max(1, workers))
+            parts = [resumes[i:i + step] for i in range(0, len(resumes), step)]
+            results = []
+            for part_results in pool.map(
+                    lambda part: summarize_many([(r.owner, r) for r in part], use_provider), parts):
+                results.extend(part_results)
+
+            now = timezone.now()
+            for resume, (text, _source) in zip(resumes, results):
+                resume.summary_text = text
+                resume.last_updated = now
+            if not dry_run:
+                with sharding.atomic(), changes.batch():
+                    Resume.objects.bulk_update(resumes, ['summary_text', 'last_updated'])
+                    changes.record(ResumeChange.OP_UPDATE, resumes)
+
+            after_id = resumes[-1].pk
+            yield after_id, len(resumes), Counter(source for _text, source in results)
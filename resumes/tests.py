@@ -1,20 +1,79 @@
 # resumes/tests.py
-from django.urls import reverse
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+
+from django.urls import URLResolver, get_resolver
+from drf_spectacular.drainage import GENERATOR_STATS
+from rest_framework.exceptions import Throttled
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from resumes import (analytics, archive, caching, changes, compression, documents, events, export, sharding,
+                     summaries, webhooks)
+from resumes.models import (Resume, Project, Experience, Education, Skill, Achievement, OwnerStats, OwnerSkillCount,
+                            ArchivedResume, ResumeChange, OwnerShard, GLOBAL_OWNER_ID)
+from resumes.paginators import EstimatedCountPaginator
+from resumes.throttling import SummaryRateThrottle, WebhookRateThrottle, limit_concurrency
 
 User = get_user_model()
 
-class ResumeApiTests(APITestCase):
+def signed_webhook(payload, secret='s3cret', nonce='', timestamp=None, source='hackathon_platform'):
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    return body, {
+        'HTTP_X_WEBHOOK_SOURCE': source,
+        'HTTP_X_WEBHOOK_TIMESTAMP': timestamp,
+        'HTTP_X_WEBHOOK_NONCE': nonce,
+        'HTTP_X_WEBHOOK_SIGNATURE': webhooks.sign(secret, timestamp, body, nonce),
+    }
+
+
+def bearer(user):
+    """JWT auth header for `user`, minted directly instead of through /api/token/."""
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+class FreshCacheTestCase(APITestCase):
+    """
+    Fixtures built once per class in setUpTestData are rolled back to the
+    same rows (and ids) before every test, but caches are not; start each
+    test with empty ones so reads cached by one test cannot leak into the next.
+    """
     def setUp(self):
-        # create user
-        self.user = User.objects.create_user(username='testuser', password='Testpass123')
-        self.token_url = reverse('token_obtain_pair')
-        resp = self.client.post(self.token_url, {'username': 'testuser', 'password': 'Testpass123'}, format='json')
-        self.assertIn('access', resp.data)
-        self.access = resp.data['access']
-        self.auth_header = {'HTTP_AUTHORIZATION': f'Bearer {self.access}'}
+        cache.clear()
+        caching.local.clear()
+        webhooks.replays.clear()
+
+
+class ResumeApiTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='Testpass123')
+        cls.auth_header = bearer(cls.user)
 
     def test_create_resume_and_project_and_generate_summary(self):
         # create resume
@@ -39,10 +98,6 @@ class ResumeApiTests(APITestCase):
         self.assertEqual(resp.status_code, 201)
         resume_id = resp.data['id']
 
-        # prepare webhook header secret from settings
-        secret = settings.WEBHOOK_SECRET
-        headers = {'HTTP_X_WEBHOOK_SECRET': secret}
-
         payload = {
             "source": "hackathon_platform",
             "external_id": "hack_0001",
@@ -56,6 +111,1400 @@ class ResumeApiTests(APITestCase):
             "target_resume_id": resume_id
         }
 
-        resp2 = self.client.post('/api/integrations/webhook/', payload, format='json', **headers)
+        body, headers = signed_webhook(payload)
+        with override_settings(WEBHOOK_SOURCES={'hackathon_platform': ['s3cret']}):
+            resp2 = self.client.post('/api/integrations/webhook/', body, content_type='application/json', **headers)
         self.assertIn(resp2.status_code, (200, 201))
         self.assertIn('created', resp2.data)
+
+
+class BulkChildApiTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bulkuser', password='Testpass123')
+        cls.auth_header = bearer(cls.user)
+        cls.resume_id = Resume.objects.create(owner=cls.user, title='Bulk Resume').pk
+
+    def _bulk_create_skills(self, n):
+        payload = [{'resume': self.resume_id, 'name': f'Skill {i}'} for i in range(n)]
+        return self.client.post('/api/skills/bulk/', payload, format='json', **self.auth_header)
+
+    def test_bulk_create_update_delete(self):
+        resp = self._bulk_create_skills(3)
+        self.assertEqual(resp.status_code, 201)
+        ids = [item['id'] for item in resp.data]
+        self.assertEqual(len(ids), 3)
+
+        resp = self.client.patch('/api/skills/bulk/', [{'id': pk, 'level': 'Expert'} for pk in ids],
+                                 format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(all(item['level'] == 'Expert' for item in resp.data))
+
+        resp = self.client.delete('/api/skills/bulk/', {'ids': ids[:2]}, format='json', **self.auth_header)
+        self.assertEqual(resp.data['deleted'], 2)
+
+    def test_bulk_create_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self._bulk_create_skills(2)
+        with CaptureQueriesContext(connection) as large:
+            self._bulk_create_skills(25)
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_create_rejects_foreign_resume(self):
+        other = User.objects.create_user(username='other', password='Testpass123')
+        foreign = Resume.objects.create(owner=other, title='Not mine')
+        payload = [{'resume': self.resume_id, 'name': 'ok'}, {'resume': foreign.pk, 'name': 'nope'}]
+        resp = self.client.post('/api/skills/bulk/', payload, format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 403)
+
+    def test_replace_section(self):
+        self._bulk_create_skills(4)
+        resp = self.client.put(f'/api/resumes/{self.resume_id}/sections/skills/',
+                               [{'name': 'Python'}, {'name': 'Django'}], format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(f'/api/resumes/{self.resume_id}/', **self.auth_header)
+        self.assertEqual(sorted(s['name'] for s in resp.data['skills']), ['Django', 'Python'])
+
+
+class ResumeDocumentApiTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='docuser', password='Testpass123')
+        cls.auth_header = bearer(cls.user)
+        cls.resume = Resume.objects.create(owner=cls.user, title='Doc Resume')
+        cls.url = f'/api/resumes/{cls.resume.pk}/document/'
+
+    def test_put_document_diffs_sections(self):
+        keep = self.resume.skills.create(name='Python')
+        change = self.resume.skills.create(name='Djnago')
+        drop = self.resume.skills.create(name='COBOL')
+
+        payload = {
+            'title': 'Renamed',
+            'skills': [
+                {'id': keep.pk, 'name': 'Python'},
+                {'id': change.pk, 'name': 'Django'},
+                {'name': 'PostgreSQL'},
+            ],
+            'projects': [{'title': 'Resume API'}],
+        }
+        resp = self.client.put(self.url, payload, format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        diff = resp.data['diff']
+        self.assertEqual(diff['skills']['updated'], [change.pk])
+        self.assertEqual(diff['skills']['deleted'], [drop.pk])
+        self.assertEqual(len(diff['skills']['created']), 1)
+        self.assertEqual(diff['experiences'], {'created': [], 'updated': [], 'deleted': []})
+        self.assertEqual(resp.data['resume']['title'], 'Renamed')
+        self.assertEqual(sorted(s['name'] for s in resp.data['resume']['skills']), ['Django', 'PostgreSQL', 'Python'])
+
+    def test_patch_leaves_other_sections_and_rolls_back_on_foreign_id(self):
+        self.resume.projects.create(title='Untouched')
+        other = Resume.objects.create(owner=self.user, title='Other')
+        foreign = other.skills.create(name='Elsewhere')
+
+        resp = self.client.patch(self.url, {'title': 'Patched', 'skills': [{'id': foreign.pk, 'name': 'x'}]},
+                                 format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 400)
+        self.resume.refresh_from_db()
+        self.assertEqual(self.resume.title, 'Doc Resume')
+
+        resp = self.client.patch(self.url, {'skills': [{'name': 'Go'}]}, format='json', **self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('projects', resp.data['diff'])
+        self.assertEqual(self.resume.projects.count(), 1)
+
+
+class ChangeFeedApiTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='feeduser', password='Testpass123')
+        cls.auth_header = bearer(cls.user)
+
+    def test_feed_reports_creates_updates_and_deletes_incrementally(self):
+        resume = Resume.objects.create(owner=self.user, title='Feed')
+        skill = resume.skills.create(name='Python')
+        resp = self.client.get('/api/changes/', **self.auth_header)
+        self.assertEqual([(c['model'], c['op']) for c in resp.data['results']],
+                         [('resume', 'create'), ('skill', 'create')])
+        cursor = resp.data['next_since']
+
+        self.client.post('/api/skills/bulk/', [{'resume': resume.pk, 'name': 'Go'}], format='json', **self.auth_header)
+        skill.delete()
+        resp = self.client.get(f'/api/changes/?since={cursor}', **self.auth_header)
+        self.assertEqual([(c['model'], c['op']) for c in resp.data['results']],
+                         [('skill', 'create'), ('skill', 'delete')])
+        self.assertIsNone(resp.data['results'][-1]['data'])
+
+    def test_feed_pages_and_is_scoped_to_owner(self):
+        other = User.objects.create_user(username='feedother', password='Testpass123')
+        Resume.objects.create(owner=other, title='Not mine')
+        for i in range(3):
+            Resume.objects.create(owner=self.user, title=f'R{i}')
+        resp = self.client.get('/api/changes/?limit=2', **self.auth_header)
+        self.assertEqual(len(resp.data['results']), 2)
+        self.assertTrue(resp.data['has_more'])
+        resp = self.client.get(f"/api/changes/?since={resp.data['next_since']}", **self.auth_header)
+        self.assertEqual(len(resp.data['results']), 1)
+        self.assertFalse(resp.data['has_more'])
+
+    def test_resume_delete_logs_cascade_in_one_insert(self):
+        resume = Resume.objects.create(owner=self.user, title='Gone')
+        for i in range(5):
+            resume.projects.create(title=f'P{i}')
+        resp = self.client.delete(f'/api/resumes/{resume.pk}/', **self.auth_header)
+        self.assertEqual(resp.status_code, 204)
+        resp = self.client.get('/api/changes/?stream=1', **self.auth_header)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        ops = [json.loads(line)['op'] for line in lines]
+        self.assertEqual(ops.count('delete'), 6)
+
+    def test_rows_of_a_missing_resume_are_not_logged(self):
+        before = ResumeChange.objects.count()
+        changes.record(ResumeChange.OP_DELETE, [Skill(pk=1, resume_id=999999, name='Orphan')])
+        self.assertEqual(ResumeChange.objects.count(), before)
+        self.assertFalse(ResumeChange.objects.filter(owner_id=GLOBAL_OWNER_ID).exists())
+
+
+class EventStreamTests(APITestCase):
+    def test_broker_delivers_across_threads_and_evicts_slow_consumers(self):
+        broker = events.Broker(queue_size=2)
+
+        async def scenario():
+            sub = broker.subscribe(owner_id=1)
+            other = broker.subscribe(owner_id=2)
+            thread = threading.Thread(target=broker.publish, args=(1, {'type': 'change', 'resume': 5}))
+            thread.start()
+            thread.join()
+            first = await asyncio.wait_for(sub.queue.get(), 1)
+            for i in range(3):
+                broker.publish(1, {'type': 'change', 'resume': i})
+            await asyncio.sleep(0)
+            return first, sub.queue.get_nowait(), other.queue.empty(), broker.subscriber_count()
+
+        first, after_overflow, other_empty, remaining = asyncio.run(scenario())
+        self.assertEqual(first['resume'], 5)
+        self.assertIs(after_overflow, events.EVICTED)
+        self.assertTrue(other_empty)
+        self.assertEqual(remaining, 1)
+
+    def test_committed_changes_are_published(self):
+        user = User.objects.create_user(username='streamuser', password='Testpass123')
+        with mock.patch.object(events.broker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Resume.objects.create(owner=user, title='Live')
+        owner_id, event = publish.call_args.args
+        self.assertEqual(owner_id, user.pk)
+        self.assertEqual((event['model'], event['op']), ('resume', 'create'))
+
+    async def test_event_stream_requires_auth(self):
+        resp = await self.async_client.get('/api/events/')
+        self.assertEqual(resp.status_code, 401)
+
+    def test_event_stream_is_refused_under_wsgi(self):
+        user = User.objects.create_user(username='wsgistreamer')
+        resp = self.client.get('/api/events/', **bearer(user))
+        self.assertEqual(resp.status_code, 501)
+
+    async def test_event_stream_pushes_published_events(self):
+        user = await User.objects.acreate(username='streamer')
+        token = str(RefreshToken.for_user(user).access_token)
+        resp = await self.async_client.get(f'/api/events/?token={token}')
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        stream = aiter(resp.streaming_content)
+        self.assertIn(b'retry', await anext(stream))
+        events.broker.publish(user.pk, {'type': 'change', 'resume': 1})
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        self.assertTrue(chunk.startswith(b'event: change'))
+        await stream.aclose()
+
+
+class ThrottlingTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='throttled', password='Testpass123')
+        cls.resume = Resume.objects.create(owner=cls.user, title='Throttled')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_summary_bucket_returns_429_with_retry_after(self):
+        url = f'/api/resumes/{self.resume.pk}/generate_summary/'
+        with mock.patch.object(SummaryRateThrottle, 'THROTTLE_RATES', {'summary': '2/min'}):
+            codes = [self.client.post(url).status_code for _ in range(2)]
+            resp = self.client.post(url)
+        self.assertEqual(codes, [200, 200])
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp['Retry-After'], '30')
+
+    def test_forwarded_for_does_not_pick_the_bucket(self):
+        url = '/api/integrations/webhook/'
+        with mock.patch.object(WebhookRateThrottle, 'THROTTLE_RATES', {'webhook': '2/min'}):
+            codes = [self.client.post(url, {}, HTTP_X_FORWARDED_FOR=f'10.0.0.{n}').status_code for n in range(3)]
+        self.assertEqual(codes, [403, 403, 429])
+
+    @override_settings(WEBHOOK_SOURCES={'hackathon_platform': ['s3cret']})
+    def test_webhook_bucket_follows_the_signed_source(self):
+        payload = {'source': 'hackathon_platform', 'external_id': 'e', 'type': 'achievement',
+                   'data': {'title': 'Prize'}, 'target_resume_id': self.resume.pk}
+        url = '/api/integrations/webhook/'
+        with mock.patch.object(WebhookRateThrottle, 'THROTTLE_RATES', {'webhook': '2/min'}):
+            codes = []
+            for n, addr in enumerate(('10.0.0.1', '10.0.0.2', '10.0.0.3')):
+                body, headers = signed_webhook(payload, nonce=f'n{n}')
+                codes.append(self.client.post(url, body, content_type='application/json',
+                                              REMOTE_ADDR=addr, **headers).status_code)
+            # a forged delivery naming the source does not spend its budget
+            body, headers = signed_webhook(payload, secret='wrong', nonce='forged')
+            forged = self.client.post(url, body, content_type='application/json', REMOTE_ADDR='10.0.0.4', **headers)
+        self.assertEqual(codes, [201, 201, 429])
+        self.assertEqual(forged.status_code, 403)
+
+    @override_settings(CONCURRENCY_LIMITS={'pdf': 2})
+    def test_pdf_concurrency_cap(self):
+        url = f'/api/resumes/{self.resume.pk}/export_pdf/'
+        cache.set_many({'concurrency_pdf_0': 'a', 'concurrency_pdf_1': 'b'})
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn('Retry-After', resp)
+
+        cache.delete('concurrency_pdf_1')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((cache.get('concurrency_pdf_0'), cache.get('concurrency_pdf_1')), ('a', None))
+
+    @override_settings(CONCURRENCY_LIMITS={'probe': 2})
+    def test_expired_slots_never_raise_the_cap(self):
+        def view():
+            # both slots expire mid-request and another request takes one
+            cache.delete_many(['concurrency_probe_0', 'concurrency_probe_1'])
+            cache.set('concurrency_probe_0', 'other')
+            return 'done'
+
+        limited = limit_concurrency('probe')(view)
+        self.assertEqual(limited(), 'done')
+        self.assertEqual(cache.get('concurrency_probe_0'), 'other')  # not released by the expired holder
+        cache.set('concurrency_probe_1', 'third')
+        with self.assertRaises(Throttled):
+            limited()
+
+
+class ImportTimeTests(SimpleTestCase):
+    """Guard worker/command startup: URLconf import must stay lean (measured with -X importtime)."""
+    # ~0.4s locally with openai/reportlab lazy, ~1.0s when they were imported eagerly
+    BUDGET_MS = 800
+    LAZY_MODULES = ('openai', 'reportlab', 'pydantic', 'httpx')
+
+    @classmethod
+    def import_profile(cls):
+        """(modules imported, top-level cumulative import time in us) for a fresh `import config.urls`."""
+        if not hasattr(cls, '_profile'):
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'}
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', 'import django; django.setup(); import config.urls'],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            imported, total_us = set(), 0
+            for line in proc.stderr.splitlines():
+                if not line.startswith('import time:') or 'cumulative' in line:
+                    continue
+                _, cumulative, name = line[len('import time:'):].split('|')
+                imported.add(name.strip())
+                if not name.startswith('  '):  # top-level imports only
+                    total_us += int(cumulative)
+            cls._profile = imported, total_us
+        return cls._profile
+
+    def test_heavy_dependencies_are_imported_lazily(self):
+        imported, _total_us = self.import_profile()
+        eager = [m for m in self.LAZY_MODULES if m in imported]
+        self.assertEqual(eager, [], f"imported at startup: {eager}")
+
+    @tag('perf')
+    def test_urlconf_import_time(self):
+        # wall-clock, so only with --tag perf: it fails when other processes share the CPU
+        _imported, total_us = self.import_profile()
+        self.assertLess(total_us / 1000, self.BUDGET_MS * settings.PERF_BUDGET_SCALE)
+
+
+class SummaryProviderTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        summaries.get_provider.cache_clear()
+
+    def test_stub_batches_prompts_into_fewer_calls(self):
+        provider = summaries.StubProvider(batch_size=10)
+        results = provider.summarize_many([f'Name: user{i}\n' for i in range(25)])
+        self.assertEqual(provider.calls, 3)
+        self.assertTrue(all(r.startswith(f'user{i} ') for i, r in enumerate(results)))
+        # deterministic
+        self.assertEqual(results, summaries.StubProvider(batch_size=10).summarize_many([f'Name: user{i}\n' for i in range(25)]))
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        provider = summaries.StubProvider(fail_every=1, failure_threshold=2, reset_timeout=60)
+        with self.assertLogs('resumes.summaries', 'WARNING'):
+            results = provider.summarize_many([f'Name: u{i}\n' for i in range(5)])
+        self.assertEqual(results, [None] * 5)
+        self.assertEqual(provider.calls, 2)  # the rest short-circuited
+        self.assertTrue(provider.breaker.is_open)
+
+    def test_missing_openai_package_falls_back_to_rule_based(self):
+        provider = summaries.OpenAIProvider(api_key='sk-test')
+        with mock.patch.dict(sys.modules, {'openai': None}), self.assertLogs('resumes.summaries', 'WARNING'):
+            self.assertEqual(provider.summarize_many(['Name: a\n']), [None])
+        user = User.objects.create_user(username='noopenai')
+        resume = Resume.objects.create(owner=user, title='No SDK')
+        with mock.patch.object(summaries, 'get_provider', return_value=provider), \
+                mock.patch.dict(sys.modules, {'openai': None}), self.assertLogs('resumes.summaries', 'WARNING'):
+            self.assertEqual(summaries.summarize(user, resume)[1], 'rule_based')
+
+    @skipUnless(find_spec('openai'), "openai is not installed")
+    def test_malformed_completions_count_as_provider_failures(self):
+        provider = summaries.OpenAIProvider(api_key='sk-test')
+        provider._client = mock.Mock()
+        for resp in (mock.Mock(choices=[]), mock.Mock(choices=[mock.Mock(message=None)]), None):
+            provider._client.chat.completions.create.return_value = resp
+            with self.assertLogs('resumes.summaries', 'WARNING') as logs:
+                self.assertEqual(provider.summarize_many(['Name: a\n']), [None])
+            self.assertIn('malformed completion', logs.output[0])
+
+    def test_unknown_provider_is_rejected_at_startup(self):
+        with override_settings(SUMMARY_PROVIDER='gpt-local'):
+            with self.assertRaises(ImproperlyConfigured):
+                summaries.check_settings()
+            with self.assertLogs('resumes.summaries', 'ERROR'):
+                self.assertIsNone(summaries.get_provider())
+
+    @override_settings(SUMMARY_PROVIDER='stub', SUMMARY_PROVIDER_OPTIONS={'stub': {'fail_every': 2}})
+    def test_generate_summary_uses_provider_and_falls_back(self):
+        summaries.get_provider.cache_clear()
+        user = User.objects.create_user(username='llmuser', password='Testpass123')
+        resume = Resume.objects.create(owner=user, title='LLM')
+        self.client.force_authenticate(user)
+        url = f'/api/resumes/{resume.pk}/generate_summary/'
+        first = self.client.post(url).data['summary']
+        with self.assertLogs('resumes.summaries', 'WARNING'):
+            second = self.client.post(url).data['summary']
+        self.assertIn('stub summary', first)
+        self.assertEqual(second, summaries.rule_based_summary(user, resume))
+
+
+class RegenerateSummariesCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bulksummary', first_name='Ada')
+        for i in range(12):
+            resume = Resume.objects.create(owner=cls.user, title=f'R{i}')
+            resume.skills.create(name=f'Skill{i}')
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command('regenerate_summaries', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        out = self._run('--dry-run', '--chunk-size', '5')
+        self.assertIn('Computed 12 summaries', out)
+        self.assertFalse(Resume.objects.exclude(summary_text=None).exists())
+
+    def test_regenerates_in_chunks_with_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._run('--chunk-size', '6', '--workers', '3')
+        # per chunk: resumes, 4 prefetches (owner too), bulk update, change-log insert (+ savepoint bookkeeping)
+        self.assertLess(len(ctx), 30)
+        summaries_ = list(Resume.objects.order_by('pk').values_list('summary_text', flat=True))
+        self.assertTrue(all(s.startswith('Ada is a backend developer experienced in Skill') for s in summaries_))
+
+    def test_checkpoint_resumes_after_last_id(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ckpt.json')
+            last = Resume.objects.order_by('pk')[7].pk
+            with open(path, 'w') as fh:
+                json.dump({'last_id': last}, fh)
+            out = self._run('--checkpoint', path)
+            self.assertIn('Regenerated 4 summaries', out)
+            with open(path) as fh:
+                self.assertEqual(json.load(fh)['last_id'], Resume.objects.order_by('pk').last().pk)
+
+
+class AnalyticsTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice')
+        cls.bob = User.objects.create_user(username='bob')
+        r1 = Resume.objects.create(owner=cls.alice, title='A1')
+        Resume.objects.create(owner=cls.alice, title='A2')
+        r3 = Resume.objects.create(owner=cls.bob, title='B1')
+        r1.skills.create(name='Python')
+        r3.skills.create(name='python')
+        r3.skills.create(name='Go')
+        r1.experiences.create(company='X', role='Dev', start_date=datetime.date(2020, 1, 1),
+                              end_date=datetime.date(2020, 1, 31))
+        r1.achievements.create(title='Won', issuer='hackathon_platform')
+
+    def test_rollup_serves_owner_and_global_stats(self):
+        analytics.refresh()
+        self.assertEqual(analytics.check(), [])
+
+        self.client.force_authenticate(self.alice)
+        data = self.client.get('/api/analytics/me/').data
+        self.assertEqual(data['resume_count'], 2)
+        self.assertEqual(data['avg_experience_tenure_days'], 30)
+        self.assertEqual(data['achievements_by_issuer'], [{'issuer': 'hackathon_platform', 'count': 1}])
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 403)
+
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        with self.assertNumQueries(4):
+            data = self.client.get('/api/analytics/').data
+        self.assertEqual(data['resume_count'], 3)
+        self.assertEqual(data['top_skills'][0], {'name': 'python', 'count': 2})
+
+    def test_incremental_refresh_only_touches_changed_owners_and_check_detects_drift(self):
+        analytics.refresh()
+        Resume.objects.create(owner=self.bob, title='B2')
+        self.assertNotEqual(analytics.check(), [])
+        self.assertEqual(analytics.refresh(), 1)
+        self.assertEqual(analytics.check(), [])
+        self.assertEqual(analytics.stats_payload(self.bob.pk)['resume_count'], 2)
+
+        OwnerStats.objects.filter(owner_id=self.alice.pk).update(resume_count=99)
+        self.assertEqual(len(analytics.check()), 1)
+        out = StringIO()
+        call_command('rollup_analytics', '--full', stdout=out)
+        self.assertEqual(analytics.check(), [])
+
+    def test_deleted_owners_leave_the_rollup(self):
+        analytics.refresh()
+        self.bob.delete()
+        analytics.refresh()
+        self.assertEqual(analytics.check(), [])
+        self.assertEqual(analytics.stats_payload(GLOBAL_OWNER_ID)['resume_count'], 2)
+        self.assertFalse(OwnerSkillCount.objects.filter(owner_id=self.bob.pk).exists())
+
+
+class AdminPerformanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='root', password='x', email='root@example.com')
+        owners = User.objects.bulk_create([User(username=f'owner{i}') for i in range(30)])
+        cls.resumes = Resume.objects.bulk_create([Resume(owner=o, title=f'Resume {o.username}') for o in owners])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelists_do_not_query_per_row(self):
+        for url in ('/admin/resumes/resume/', '/admin/resumes/skill/'):
+            with CaptureQueriesContext(connection) as few:
+                self.client.get(url)
+            Skill.objects.bulk_create([Skill(resume=r, name='Python') for r in self.resumes])
+            with CaptureQueriesContext(connection) as many:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(len(few), len(many), url)
+
+    def test_searches_match_whole_values_not_substrings(self):
+        # icontains ('%term%') can only be answered by scanning the table
+        for url, term, expected in (('/admin/resumes/resume/', 'OWNER3', 'Resume owner3'),
+                                    ('/admin/users/user/', 'Owner3', 'owner3'),
+                                    ('/admin/resumes/archivedresume/', '7', None)):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url, {'q': term})
+            self.assertEqual(resp.status_code, 200)
+            if expected:
+                self.assertContains(resp, expected)
+            self.assertFalse(any(f'%{term}%' in q['sql'] for q in ctx.captured_queries), url)
+        self.assertNotContains(self.client.get('/admin/users/user/', {'q': 'owner'}), 'owner3')
+        self.assertEqual(self.client.get('/admin/resumes/archivedresume/', {'q': 'abc'}).status_code, 200)
+
+    def test_estimated_count_skips_full_count(self):
+        paginator = EstimatedCountPaginator(Resume.objects.order_by('pk'), 100)
+        paginator.max_exact = 10
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertGreaterEqual(paginator.count, 30)
+        self.assertNotIn('COUNT', ctx.captured_queries[0]['sql'].upper())
+        paginator = EstimatedCountPaginator(Resume.objects.filter(title__startswith='Resume').order_by('pk'), 100)
+        paginator.max_exact = 10
+        self.assertEqual(paginator.count, 10)
+
+    def test_inline_rows_are_paginated(self):
+        resume = self.resumes[0]
+        Skill.objects.bulk_create([Skill(resume=resume, name=f'S{i}') for i in range(45)])
+        resp = self.client.get(f'/admin/resumes/resume/{resume.pk}/change/')
+        self.assertEqual(resp.context['inline_admin_formsets'][3].formset.initial_form_count(), 20)
+        self.assertContains(resp, 'page 1 of 3')
+        resp = self.client.get(f'/admin/resumes/resume/{resume.pk}/change/?skills-page=3')
+        self.assertEqual(resp.context['inline_admin_formsets'][3].formset.initial_form_count(), 5)
+
+
+class ArchiveTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='archiver')
+        cls.resume = Resume.objects.create(owner=cls.user, title='Old')
+        cls.resume.skills.create(name='Cobol', level='Expert')
+        cls.resume.experiences.create(company='Y', role='Dev', start_date=datetime.date(1999, 1, 1))
+        Resume.objects.filter(pk=cls.resume.pk).update(last_updated=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        cls.fresh = Resume.objects.create(owner=cls.user, title='New')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_section_models_cover_every_reference_to_resume(self):
+        self.assertEqual({rel.related_model for rel in Resume._meta.related_objects}, set(archive.SECTION_MODELS))
+
+    def test_export_includes_archived_resumes_without_restoring_them(self):
+        call_command('archive_resumes', '--days', '365', stdout=StringIO())
+        docs = list(export.iter_documents(owner_id=self.user.pk))
+        self.assertEqual([doc['resume']['id'] for doc in docs], [self.resume.pk, self.fresh.pk])
+        self.assertEqual([s['name'] for s in docs[0]['sections']['skill']], ['Cobol'])
+        self.assertTrue(ArchivedResume.objects.filter(pk=self.resume.pk).exists())
+        self.assertEqual(len(list(export.iter_documents())), 2)
+
+    def test_stale_resumes_are_archived_and_restored_on_access(self):
+        analytics.refresh()
+        out = StringIO()
+        call_command('archive_resumes', '--days', '365', stdout=out)
+        self.assertIn('Archived 1 resumes', out.getvalue())
+        self.assertFalse(Resume.objects.filter(pk=self.resume.pk).exists())
+        self.assertFalse(Skill.objects.exists())
+        self.assertEqual(analytics.check(), [])
+        self.assertEqual([r['id'] for r in self.client.get('/api/resumes/archived/').data], [self.resume.pk])
+
+        other = User.objects.create_user(username='nosy')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/resumes/{self.resume.pk}/').status_code, 404)
+
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(f'/api/resumes/{self.resume.pk}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['title'], 'Old')
+        self.assertFalse(ArchivedResume.objects.exists())
+        restored = Resume.objects.get(pk=self.resume.pk)
+        self.assertGreater(restored.last_updated.year, 2020)
+        self.assertEqual(list(restored.skills.values_list('name', 'level')), [('Cobol', 'Expert')])
+        self.assertEqual(restored.experiences.get().start_date, datetime.date(1999, 1, 1))
+
+    def archive(self, days):
+        list(archive.archive_stale(timezone.now() - datetime.timedelta(days=days)))
+
+    def test_listing_shows_archived_resumes_without_restoring_them(self):
+        self.archive(days=365)
+        data = self.client.get('/api/resumes/').data
+        self.assertEqual([(r['id'], r.get('archived')) for r in data], [(self.fresh.pk, None), (self.resume.pk, True)])
+        self.assertEqual(data[1]['title'], 'Old')
+        self.assertEqual(self.client.get('/api/skills/').data, [])
+        self.assertTrue(ArchivedResume.objects.filter(resume_id=self.resume.pk).exists())
+
+    def test_child_item_restores_only_its_own_resume(self):
+        skill = self.resume.skills.get()
+        self.archive(days=0)
+        resp = self.client.get(f'/api/skills/{skill.pk}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['name'], 'Cobol')
+        self.assertEqual(list(ArchivedResume.objects.values_list('resume_id', flat=True)), [self.fresh.pk])
+        self.assertEqual(self.client.get('/api/skills/999999/').status_code, 404)
+
+    def test_analytics_count_archived_resumes(self):
+        self.resume.experiences.create(company='Z', role='Lead', start_date=datetime.date(2000, 1, 1),
+                                       end_date=datetime.date(2000, 1, 31))
+        self.resume.achievements.create(title='Prize', issuer='acm')
+        before = analytics.compute()
+        self.archive(days=365)
+        self.assertEqual(ArchivedResume.objects.count(), 1)
+        self.assertEqual(analytics.compute(), before)
+
+    def test_deleting_the_owner_removes_archived_resumes(self):
+        self.archive(days=365)
+        self.user.delete()
+        self.assertFalse(ArchivedResume.objects.exists())
+        self.assertFalse(ResumeChange.objects.filter(owner_id=self.user.pk).exists())
+
+    def test_hard_delete_uses_one_statement_per_table_and_logs_deletes(self):
+        for i in range(20):
+            self.resume.projects.create(title=f'P{i}')
+        with CaptureQueriesContext(connection) as ctx:
+            deleted = archive.hard_delete([self.resume.pk, self.fresh.pk])
+        self.assertEqual(deleted['project'], 20)
+        self.assertEqual(deleted['resume'], 2)
+        # per table: one SELECT for the change log and one DELETE, then one log INSERT
+        statements = [q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 2 * len(archive.SECTION_MODELS + (Resume,)) + 1)
+        logged = ResumeChange.objects.filter(op='delete', model='project')
+        self.assertEqual(set(logged.values_list('owner_id', 'resume_id')), {(self.user.pk, self.resume.pk)})
+        self.assertEqual(logged.count(), 20)
+
+
+class CompressionTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bigresume')
+        cls.resume = Resume.objects.create(owner=cls.user, title='Big')
+        Skill.objects.bulk_create([Skill(resume=cls.resume, name=f'Skill {i}', level='Expert') for i in range(200)])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_large_responses_are_compressed_and_small_ones_are_not(self):
+        resp = self.client.get(f'/api/resumes/{self.resume.pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        body = json.loads(gzip.decompress(resp.content))
+        self.assertEqual(len(body['skills']), 200)
+        self.assertLess(len(resp.content), len(json.dumps(body)) / 3)
+
+        resp = self.client.get('/api/analytics/me/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        resp = self.client.get(f'/api/resumes/{self.resume.pk}/')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
+    def test_html_pages_are_not_compressed(self):
+        admin = User.objects.create_superuser(username='root', password='x')
+        self.client.force_login(admin)
+        resp = self.client.get(f'/admin/resumes/skill/?resume__id__exact={self.resume.pk}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('csrfmiddlewaretoken', resp.content.decode())
+        self.assertGreater(len(resp.content), settings.COMPRESSION_MIN_SIZE)
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
+    def test_streamed_change_feed_is_compressed(self):
+        resp = self.client.get('/api/changes/?stream=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(resp.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 1)  # bulk_create above bypasses the feed
+
+    @skipUnless(find_spec('zstandard'), "zstandard is not installed")
+    def test_codecs_compress_from_many_threads(self):
+        import zstandard
+        codec = compression.ZstdCodec()
+        bodies = [json.dumps({'n': i, 'items': list(range(i, i + 2000))}).encode() for i in range(16)]
+
+        def work(body):
+            whole = codec.compress(body)
+            streamed = b''.join(codec.stream([body[:1000], body[1000:]]))
+            return whole, streamed
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(work, bodies * 8))
+        decompressor = zstandard.ZstdDecompressor()
+        for body, (whole, streamed) in zip(bodies * 8, results):
+            self.assertEqual(decompressor.decompress(whole), body)
+            self.assertEqual(decompressor.decompressobj().decompress(streamed), body)
+
+    def test_accept_encoding_negotiation(self):
+        codecs = {'zstd': 'z', 'br': 'b', 'gzip': 'g'}
+        preference = ('zstd', 'br', 'gzip')
+        self.assertEqual(compression.negotiate('gzip, deflate, br', codecs, preference), 'b')
+        self.assertEqual(compression.negotiate('gzip;q=1.0, br;q=0.5', codecs, preference), 'g')
+        self.assertEqual(compression.negotiate('*', codecs, preference), 'z')
+        self.assertEqual(compression.negotiate('*, zstd;q=0', codecs, preference), 'b')
+        self.assertIsNone(compression.negotiate('identity, deflate', codecs, preference))
+        self.assertIsNone(compression.negotiate('', codecs, preference))
+
+    @skipUnless(find_spec('msgpack'), "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        import msgpack
+        resp = self.client.post('/api/resumes/', msgpack.packb({'title': 'Packed'}),
+                                content_type='application/msgpack', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(resp.content)
+        self.assertEqual(data['title'], 'Packed')
+        self.assertIsInstance(data['last_updated'], str)
+
+        resp = self.client.post('/api/resumes/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(resp.status_code, 400)
+
+
+class ResumeCacheTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cached')
+        cls.resume = Resume.objects.create(owner=cls.user, title='Cached')
+        cls.resume.skills.create(name='Python')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_are_cached_and_invalidated_by_every_write_path(self):
+        url = f'/api/resumes/{self.resume.pk}/'
+        self.assertEqual(len(self.client.get(url).data['skills']), 1)
+        self.assertEqual(len(self.client.get('/api/skills/').data), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).data['skills']), 1)
+            self.assertEqual(len(self.client.get('/api/skills/').data), 1)
+
+        self.client.post('/api/skills/', {'resume': self.resume.pk, 'name': 'Go'}, format='json')
+        self.assertEqual(len(self.client.get(url).data['skills']), 2)
+        self.client.post('/api/skills/bulk/', [{'resume': self.resume.pk, 'name': 'Rust'}], format='json')
+        self.assertEqual(len(self.client.get('/api/skills/').data), 3)
+        self.client.put(f'{url}sections/skills/', [], format='json')
+        self.assertEqual(self.client.get(url).data['skills'], [])
+        archive.hard_delete([self.resume.pk])
+        self.assertEqual(self.client.get('/api/resumes/').data, [])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_shared_tier_serves_other_processes_and_hot_keys_load_once(self):
+        self.client.get('/api/resumes/')
+        caching.local.clear()  # as seen from another worker
+        caching.metrics.reset()
+        with self.assertNumQueries(0):
+            self.client.get('/api/resumes/')
+        self.assertEqual(caching.metrics.snapshot()['shared_hit'], 1)
+
+        calls = []
+        started = threading.Event()
+
+        def slow_loader():
+            calls.append(1)
+            started.wait(1)
+            return {'value': 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(caching.get_or_load(0, 'hot', slow_loader)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        started.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 8)
+
+    @override_settings(RESUME_CACHE_SHARED=False)
+    def test_cache_is_bypassed_when_workers_do_not_share_it(self):
+        self.client.get('/api/resumes/')
+        caching.metrics.reset()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/resumes/')
+        self.assertTrue(ctx.captured_queries)
+        self.assertEqual(caching.metrics.snapshot()['miss'], 1)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+        self.client.force_authenticate(User.objects.create_user(username='ops', is_staff=True))
+        data = self.client.get('/api/cache/stats/').data
+        self.assertIn('hit_ratio', data)
+
+
+class ResumeRenderingTests(FreshCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='render', first_name='Ada', last_name='Lovelace')
+        cls.resume = Resume.objects.create(owner=cls.user, title='Engineer', summary_text='Writes programs.')
+        cls.resume.skills.create(name='Python', level='Expert')
+        cls.resume.experiences.create(company='Analytical Engines', role='Programmer',
+                                      start_date=datetime.date(2020, 1, 1), description='Wrote the first program.')
+        cls.url = f'/api/resumes/{cls.resume.pk}/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_every_theme_renders_the_same_document(self):
+        for theme in documents.THEMES:
+            response = self.client.get(f'{self.url}html/?theme={theme}')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/html'))
+            html = response.content.decode()
+            for text in ('Ada Lovelace', 'Engineer', 'Programmer', 'Analytical Engines', 'Python', 'Jan 2020'):
+                self.assertIn(text, html)
+            self.assertLess(html.index('Experience'), html.index('Skills'))
+        self.assertEqual(self.client.get(f'{self.url}html/?theme=nope').status_code, 400)
+
+    def test_editing_a_section_renders_only_that_fragment(self):
+        self.client.get(f'{self.url}html/')
+        with mock.patch('resumes.documents.render_to_string', wraps=documents.render_to_string) as render:
+            self.client.get(f'{self.url}html/')
+            self.assertEqual([c.args[0] for c in render.call_args_list], ['resumes/themes/classic/page.html'])
+            render.reset_mock()
+            self.client.post('/api/skills/', {'resume': self.resume.pk, 'name': 'Go'}, format='json')
+            html = self.client.get(f'{self.url}html/').content.decode()
+        self.assertIn('Go', html)
+        self.assertEqual([c.args[0] for c in render.call_args_list],
+                         ['resumes/themes/classic/section.html', 'resumes/themes/classic/page.html'])
+        self.assertEqual(render.call_args_list[0].args[1]['section']['key'], 'skills')
+
+    def test_only_http_links_are_rendered(self):
+        self.resume.projects.create(title='Trap', link='javascript:alert(1)')
+        self.resume.achievements.create(title='Prize', proof_url='https://example.org/proof')
+        for theme in ('classic', 'modern'):
+            html = self.client.get(f'{self.url}html/?theme={theme}').content.decode()
+            self.assertIn('Trap', html)
+            self.assertNotIn('javascript:', html)
+            self.assertIn('href="https://example.org/proof"', html)
+
+    def test_pdf_uses_the_document_tree(self):
+        response = self.client.get(f'{self.url[:-1]}/export_pdf/?theme=modern')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertIn(f'resume_{self.resume.pk}.pdf', response['Content-Disposition'])
+        self.assertEqual(self.client.get(f'{self.url}export_pdf/?theme=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/resumes/999999/export_pdf/').status_code, 404)
+
+
+@override_settings(WEBHOOK_SOURCES={'hackathon_platform': ['new-secret', 'old-secret'], 'other': ['x']})
+class WebhookSignatureTests(FreshCacheTestCase):
+    url = '/api/integrations/webhook/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.resume = Resume.objects.create(owner=User.objects.create_user(username='hooked'), title='Hooked')
+        cls.payload = {'source': 'hackathon_platform', 'external_id': 'e1', 'type': 'achievement',
+                       'data': {'title': 'Prize'}, 'target_resume_id': cls.resume.pk}
+
+    def post(self, body, headers):
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def test_links_must_be_http_urls(self):
+        for field, type_ in (('link', 'project'), ('proof_url', 'achievement')):
+            payload = dict(self.payload, type=type_, external_id=f'bad-{field}',
+                           data={'title': 'X', field: 'javascript:alert(document.cookie)'})
+            resp = self.post(*signed_webhook(payload, secret='new-secret'))
+            self.assertEqual(resp.status_code, 400)
+            self.assertIn(field, resp.data)
+        self.assertFalse(self.resume.projects.exists() or self.resume.achievements.exists())
+
+        payload = dict(self.payload, type='project', data={'title': 'X', 'link': 'https://example.org/x'})
+        self.assertEqual(self.post(*signed_webhook(payload, secret='new-secret')).status_code, 201)
+
+    def test_rejects_bad_signatures_sources_and_timestamps(self):
+        body, headers = signed_webhook(self.payload, secret='wrong')
+        self.assertEqual(self.post(body, headers).status_code, 403)
+        body, headers = signed_webhook(self.payload, secret='x', source='other')
+        self.assertEqual(self.post(body, headers).status_code, 403)  # signed by another source
+        body, headers = signed_webhook(self.payload, secret='new-secret', source='unknown')
+        self.assertEqual(self.post(body, headers).status_code, 403)
+        body, headers = signed_webhook(self.payload, secret='new-secret', timestamp=int(time.time()) - 3600)
+        self.assertEqual(self.post(body, headers).status_code, 403)
+        body, headers = signed_webhook(self.payload, secret='new-secret')
+        self.assertEqual(self.post(body.replace(b'Prize', b'Prise'), headers).status_code, 403)
+        self.assertFalse(self.resume.achievements.exists())
+
+        # either secret works while rotating
+        for n, secret in enumerate(('new-secret', 'old-secret')):
+            body, headers = signed_webhook(self.payload, secret=secret, nonce=f'n{n}')
+            self.assertEqual(self.post(body, headers).status_code, 201)
+        self.assertEqual(self.resume.achievements.count(), 2)
+
+    def test_replays_are_rejected_before_any_query(self):
+        body, headers = signed_webhook(self.payload, secret='new-secret', nonce='once')
+        self.assertEqual(self.post(body, headers).status_code, 201)
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.assertEqual(self.post(body, headers).status_code, 409)
+        # another worker only shares the cache, not the in-process replay set
+        webhooks.replays.clear()
+        self.assertEqual(self.post(body, headers).status_code, 409)
+        # same nonce with a fresh signature is still a replay
+        body, headers = signed_webhook(self.payload, secret='new-secret', nonce='once',
+                                       timestamp=int(time.time()) + 1)
+        self.assertEqual(self.post(body, headers).status_code, 409)
+        self.assertEqual(self.resume.achievements.count(), 1)
+
+    def test_failed_delivery_can_be_retried(self):
+        payload = {**self.payload, 'target_resume_id': self.resume.pk + 1000}
+        body, headers = signed_webhook(payload, secret='new-secret', nonce='retry')
+        self.assertEqual(self.post(body, headers).status_code, 404)
+        Resume.objects.create(pk=self.resume.pk + 1000, owner=self.resume.owner, title='Late')
+        self.assertEqual(self.post(body, headers).status_code, 201)
+
+    def test_replay_cache_is_bounded_and_expires(self):
+        replays = webhooks.ReplayCache(maxsize=3, window=10)
+        self.assertTrue(all(replays.add(key, now=0) for key in 'abcd'))
+        self.assertEqual(len(replays), 3)
+        self.assertFalse(replays.add('d', now=5))
+        self.assertTrue(replays.add('d', now=11))
+        self.assertEqual(len(replays), 1)
+
+
+# (url name, method) -> (max queries, max median ms) for an owner with
+# PERF_ITEMS + 1 resumes of PERF_ITEMS entries per section, with cold caches. Query budgets are exact
+# upper bounds, so an N+1 fails at once; latency budgets are several times the
+# local median and scale with settings.PERF_BUDGET_SCALE. Every API route
+# needs an entry (None = not measurable as a single request, with the reason).
+PERF_ITEMS = 20
+SECTION_BUDGETS = {
+    'list': {'get': (1, 100), 'post': (3, 25)},
+    'detail': {'get': (1, 25), 'put': (5, 25), 'patch': (4, 25), 'delete': (4, 25)},
+    'bulk': {'post': (3, 50), 'patch': (4, 50), 'delete': (4, 25)},
+}
+ENDPOINT_BUDGETS = {
+    **{(f'{basename}-{route}', method): budget
+       for basename in ('project', 'experience', 'education', 'skill', 'achievement')
+       for route, methods in SECTION_BUDGETS.items() for method, budget in methods.items()},
+    ('api-root', 'get'): (0, 25),
+    ('resume-list', 'get'): (7, 300),  # includes the archived stubs
+    ('resume-list', 'post'): (7, 30),
+    ('resume-detail', 'get'): (6, 60),
+    ('resume-detail', 'put'): (8, 60),
+    ('resume-detail', 'patch'): (8, 60),
+    ('resume-detail', 'delete'): (14, 40),
+    ('resume-archived', 'get'): (1, 25),
+    ('resume-generate-summary', 'post'): (6, 40),
+    ('resume-document', 'put'): (29, 200),
+    ('resume-document', 'patch'): (12, 100),
+    ('resume-replace-section', 'put'): (5, 50),
+    ('resume-html', 'get'): (7, 60),
+    ('resume-export-pdf', 'get'): (7, 100),
+    ('resume-changes', 'get'): (1, 25),
+    ('resume-events', 'get'): None,  # an open-ended stream; EventStreamTests covers it
+    ('analytics-me', 'get'): (4, 25),
+    ('analytics-global', 'get'): (4, 25),
+    ('analytics-user', 'get'): (4, 25),
+    ('cache-stats', 'get'): (0, 25),
+    ('resume-search', 'get'): (3, 25),
+    ('auth-register', 'post'): (2, 25),  # with the fast test hasher
+    ('auth-me', 'get'): (0, 25),
+    ('token_obtain_pair', 'post'): (1, 25),
+    ('token_refresh', 'post'): (1, 25),
+    ('integration-webhook', 'post'): (3, 25),
+    ('schema', 'get'): (0, 1000),
+    ('swagger-ui', 'get'): (0, 25),
+}
+
+
+def api_routes():
+    """Names of every route in config/urls.py outside the admin site."""
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if getattr(pattern, 'app_name', None) != 'admin':
+                    yield from walk(pattern.url_patterns)
+            elif pattern.name:
+                yield pattern.name
+    return set(walk(get_resolver().url_patterns))
+
+
+@tag('perf')
+@override_settings(WEBHOOK_SOURCES={'hackathon_platform': ['s3cret']})
+class PerformanceBudgetTests(FreshCacheTestCase):
+    """
+    Regression gate for hot paths: every endpoint is called RUNS times with
+    cold caches and must stay within its query and latency budget. Run it on
+    its own for stable timings: python manage.py test --tag perf
+    """
+    RUNS = 5
+    SECTIONS = {
+        'project': (Project, 'projects', lambda i: {'title': f'P{i}'}),
+        'experience': (Experience, 'experiences', lambda i: {'company': f'C{i}', 'role': 'Dev', 'start_date': '2020-01-01'}),
+        'education': (Education, 'educations', lambda i: {'institute': f'U{i}', 'degree': 'BSc'}),
+        'skill': (Skill, 'skills', lambda i: {'name': f'S{i}'}),
+        'achievement': (Achievement, 'achievements', lambda i: {'title': f'A{i}'}),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='budget', password='Budget-pass-123', first_name='Bud')
+        cls.admin = User.objects.create_user(username='budget-admin', is_staff=True)
+        cls.resume = Resume.objects.create(owner=cls.user, title='Budgeted', summary_text='Measured.')
+        others = Resume.objects.bulk_create([Resume(owner=cls.user, title=f'Other {n}') for n in range(PERF_ITEMS)])
+        for model, related, fields in cls.SECTIONS.values():
+            model.objects.bulk_create([model(resume=resume, **fields(i))
+                                       for resume in [cls.resume, *others] for i in range(PERF_ITEMS)])
+        analytics.refresh()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_every_api_route_has_a_budget(self):
+        budgeted = {name for name, _method in ENDPOINT_BUDGETS}
+        self.assertEqual(sorted(api_routes() - budgeted), [], "add a budget to ENDPOINT_BUDGETS")
+        self.assertEqual(sorted(budgeted - api_routes()), [])
+
+    def test_endpoints_stay_within_budget(self):
+        cases = self.cases()
+        self.assertEqual(set(cases), {key for key, budget in ENDPOINT_BUDGETS.items() if budget})
+        for (name, method), prepare in cases.items():
+            max_queries, max_ms = ENDPOINT_BUDGETS[name, method]
+            with self.subTest(endpoint=name, method=method), GENERATOR_STATS.silence():
+                queries, ms = self.measure(method, prepare)
+                self.assertLessEqual(queries, max_queries, f"{method.upper()} {name}: {queries} queries")
+                self.assertLessEqual(ms, max_ms * settings.PERF_BUDGET_SCALE, f"{method.upper()} {name}: {ms:.1f} ms")
+
+    def measure(self, method, prepare):
+        counts, timings = [], []
+        for i in range(self.RUNS):
+            path, body, headers, user = prepare(i)
+            self.client.force_authenticate(user)
+            cache.clear()
+            caching.local.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = self.client.generic(method.upper(), path, json.dumps(body) if body is not None else '',
+                                               content_type='application/json', **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.assertLess(response.status_code, 400, f"{method.upper()} {path}: {response.status_code}")
+            counts.append(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]))
+        return max(counts), statistics.median(timings)
+
+    def cases(self):
+        """(url name, method) -> prepare(i) returning (path, body, headers, user) for run i."""
+        user, admin, r = self.user, self.admin, self.resume.pk
+
+        def call(path, body=None, headers=None, as_user=None):
+            return lambda i: (path, body(i) if callable(body) else body, headers or {}, as_user or user)
+
+        def fresh_resume(i):
+            return Resume.objects.create(owner=user, title=f'Fresh {i}').pk
+
+        def webhook(i):
+            payload = {'source': 'hackathon_platform', 'external_id': f'e{i}', 'type': 'achievement',
+                       'data': {'title': 'Prize'}, 'target_resume_id': r}
+            body, headers = signed_webhook(payload, nonce=f'budget-{i}')
+            return '/api/integrations/webhook/', payload, headers, None
+
+        cases = {
+            ('api-root', 'get'): call('/api/'),
+            ('resume-list', 'get'): call('/api/resumes/'),
+            ('resume-list', 'post'): call('/api/resumes/', {'title': 'New'}),
+            ('resume-detail', 'get'): call(f'/api/resumes/{r}/'),
+            ('resume-detail', 'put'): call(f'/api/resumes/{r}/', {'title': 'Put'}),
+            ('resume-detail', 'patch'): call(f'/api/resumes/{r}/', {'title': 'Patched'}),
+            ('resume-detail', 'delete'): lambda i: (f'/api/resumes/{fresh_resume(i)}/', None, {}, user),
+            ('resume-archived', 'get'): call('/api/resumes/archived/'),
+            ('resume-generate-summary', 'post'): call(f'/api/resumes/{r}/generate_summary/'),
+            ('resume-document', 'put'): call(f'/api/resumes/{r}/document/', lambda i: {
+                'title': 'Document', **{related: [fields(n) for n in range(PERF_ITEMS)]
+                                        for _model, related, fields in self.SECTIONS.values()}}),
+            ('resume-document', 'patch'): call(f'/api/resumes/{r}/document/', lambda i: {
+                'skills': [{'name': f'S{n}'} for n in range(PERF_ITEMS)]}),
+            ('resume-replace-section', 'put'): call(f'/api/resumes/{r}/sections/skills/',
+                                                    lambda i: [{'name': f'S{n}'} for n in range(PERF_ITEMS)]),
+            ('resume-html', 'get'): call(f'/api/resumes/{r}/html/'),
+            ('resume-export-pdf', 'get'): call(f'/api/resumes/{r}/export_pdf/'),
+            ('resume-changes', 'get'): call('/api/changes/?limit=100'),
+            ('analytics-me', 'get'): call('/api/analytics/me/'),
+            ('analytics-global', 'get'): call('/api/analytics/', as_user=admin),
+            ('analytics-user', 'get'): call(f'/api/analytics/users/{user.pk}/', as_user=admin),
+            ('cache-stats', 'get'): call('/api/cache/stats/', as_user=admin),
+            ('resume-search', 'get'): call('/api/search/resumes/?q=other', as_user=admin),
+            ('auth-register', 'post'): call('/api/auth/register/', lambda i: {
+                'username': f'new{i}', 'email': f'new{i}@example.com', 'password': 'Register-pass-123'}),
+            ('auth-me', 'get'): call('/api/auth/me/'),
+            ('token_obtain_pair', 'post'): call('/api/token/', {'username': 'budget', 'password': 'Budget-pass-123'}),
+            ('token_refresh', 'post'): call('/api/token/refresh/', lambda i: {
+                'refresh': str(RefreshToken.for_user(user))}),
+            ('integration-webhook', 'post'): webhook,
+            ('schema', 'get'): call('/api/schema/'),
+            ('swagger-ui', 'get'): call('/api/docs/'),
+        }
+        for basename, (model, related, fields) in self.SECTIONS.items():
+            url = f'/api/{related}/'
+
+            def row(i, model=model, fields=fields):
+                return model.objects.create(resume=self.resume, **fields(1000 + i)).pk
+
+            def rows(i, row=row):
+                return [row(i * 10 + n) for n in range(3)]
+
+            cases.update({
+                (f'{basename}-list', 'get'): call(url),
+                (f'{basename}-list', 'post'): call(url, lambda i, fields=fields: {'resume': r, **fields(i)}),
+                (f'{basename}-detail', 'get'): lambda i, row=row, url=url: (f'{url}{row(i)}/', None, {}, user),
+                (f'{basename}-detail', 'put'): lambda i, row=row, url=url, fields=fields: (
+                    f'{url}{row(i)}/', {'resume': r, **fields(i)}, {}, user),
+                (f'{basename}-detail', 'patch'): lambda i, row=row, url=url, fields=fields: (
+                    f'{url}{row(i)}/', fields(i), {}, user),
+                (f'{basename}-detail', 'delete'): lambda i, row=row, url=url: (f'{url}{row(i)}/', None, {}, user),
+                (f'{basename}-bulk', 'post'): call(f'{url}bulk/', lambda i, fields=fields: [
+                    {'resume': r, **fields(n)} for n in range(PERF_ITEMS)]),
+                (f'{basename}-bulk', 'patch'): lambda i, rows=rows, url=url, fields=fields: (
+                    f'{url}bulk/', [{'id': pk, **fields(i)} for pk in rows(i)], {}, user),
+                (f'{basename}-bulk', 'delete'): lambda i, rows=rows, url=url: (
+                    f'{url}bulk/', {'ids': rows(i)}, {}, user),
+            })
+        return cases
+
+
+@override_settings(RESUME_SHARDS=['shard1', 'shard2'], WEBHOOK_SOURCES={'hackathon_platform': ['s3cret']})
+class ShardingTests(FreshCacheTestCase):
+    databases = {'default', 'shard1', 'shard2'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice', first_name='Alice')
+        cls.bob = User.objects.create_user(username='bob', first_name='Bob')
+        cls.admin = User.objects.create_user(username='shard-admin', is_staff=True)
+        # saving a user already placed them by hash; pin them for the tests
+        sharding.move_owner(cls.alice.pk, 'shard1', settle=0)
+        sharding.move_owner(cls.bob.pk, 'shard2', settle=0)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.alice)
+
+    def create_resume(self, user, title, skills=()):
+        self.client.force_authenticate(user)
+        pk = self.client.post('/api/resumes/', {'title': title}, format='json').data['id']
+        self.client.post('/api/skills/bulk/', [{'resume': pk, 'name': name} for name in skills], format='json')
+        self.client.force_authenticate(self.alice)
+        return pk
+
+    def rows_on(self, alias, model, **filters):
+        return model.objects.using(alias).filter(**filters).count()
+
+    @override_settings(RESUME_CACHE_SHARED=False)
+    def test_directory_is_read_through_when_workers_do_not_share_the_cache(self):
+        self.assertEqual(sharding.shard_for(self.alice.pk), 'shard1')
+        OwnerShard.objects.filter(owner_id=self.alice.pk).update(shard='shard2')  # as another worker's move
+        self.assertEqual(sharding.shard_for(self.alice.pk), 'shard2')
+        with self.assertRaisesMessage(ValueError, 'REDIS_URL'):
+            sharding.move_owner(self.bob.pk, 'shard1', settle=0)
+
+    def test_api_reads_and_writes_stay_on_the_owners_shard(self):
+        alice_resume = self.create_resume(self.alice, 'Alice CV', ['Go', 'SQL'])
+        bob_resume = self.create_resume(self.bob, 'Bob CV', ['Rust'])
+        resp = self.client.put(f'/api/resumes/{alice_resume}/sections/skills/', [{'name': 'Python'}], format='json')
+        self.assertEqual(resp.status_code, 200)
+
+        self.assertEqual((self.rows_on('shard1', Resume), self.rows_on('shard2', Resume),
+                          self.rows_on('default', Resume)), (1, 1, 0))
+        self.assertEqual(self.rows_on('shard1', Skill), 1)
+        self.assertEqual(self.rows_on('shard2', ResumeChange, owner_id=self.alice.pk), 0)
+        # each shard hands out ids from its own block, so rows can move without clashing
+        self.assertEqual((alice_resume // sharding.ID_BLOCK, bob_resume // sharding.ID_BLOCK), (1, 2))
+
+        resp = self.client.get('/api/resumes/')
+        self.assertEqual([(r['title'], [s['name'] for s in r['skills']]) for r in resp.data],
+                         [('Alice CV', ['Python'])])
+        self.assertEqual(self.client.get(f'/api/resumes/{bob_resume}/').status_code, 404)
+        feed = self.client.get('/api/changes/').data['results']
+        self.assertEqual([c['seq'] for c in feed], sorted(c['seq'] for c in feed))
+        self.assertEqual({c['resume'] for c in feed}, {alice_resume})
+        self.assertEqual(self.client.get(f'/api/resumes/{alice_resume}/html/').status_code, 200)
+
+    def test_shards_get_no_constraint_to_the_users_table(self):
+        # users only exist in default; PostgreSQL refuses a reference to a missing table
+        def owner_references(alias):
+            with connections[alias].cursor() as cursor:
+                found = connections[alias].introspection.get_constraints(cursor, 'resumes_resume').values()
+            return [c['foreign_key'] for c in found if c['foreign_key'] and c['columns'] == ['owner_id']]
+
+        self.assertEqual(owner_references('default'), [('users_user', 'id')])
+        self.assertEqual(owner_references('shard1'), [])
+
+    def test_databases_that_applied_0002_do_not_run_its_replacement(self):
+        applied = {('resumes', '0001_initial'): None, ('resumes', '0002_initial'): None}
+        with mock.patch.object(MigrationRecorder, 'applied_migrations', return_value=applied):
+            loader = MigrationLoader(connections['default'])
+        self.assertIn(('resumes', '0002_initial_shards'), loader.applied_migrations)
+
+    def test_new_owners_are_placed_by_hash_and_stay_put(self):
+        carol = User.objects.create_user(username='carol')
+        alias = sharding.shard_for(carol.pk)
+        self.assertEqual(alias, sharding.hash_shard(carol.pk))
+        self.assertEqual(OwnerShard.objects.get(owner_id=carol.pk).shard, alias)
+        cache.clear()
+        with self.settings(RESUME_SHARDS=['shard1', 'shard2', 'default']):
+            self.assertEqual(sharding.shard_for(carol.pk), alias)
+
+    def test_existing_rows_are_adopted_and_never_purged_by_a_move(self):
+        carol = User.objects.create_user(username='carol')
+        home = sharding.shard_for(carol.pk)
+        other = 'shard1' if home == 'shard2' else 'shard2'
+        # written before sharding was turned on: not where the hash put carol
+        Resume.objects.using(other).bulk_create([Resume(owner=carol, title='Legacy')])
+        for target in (other, home):
+            with self.assertRaisesMessage(ValueError, 'adopt_shards'):
+                sharding.move_owner(carol.pk, target, settle=0)
+        self.assertEqual(self.rows_on(other, Resume, owner_id=carol.pk), 1)
+
+        out = StringIO()
+        call_command('adopt_shards', stdout=out)
+        self.assertIn('Recorded 1 owners', out.getvalue())
+        self.assertEqual(sharding.shard_for(carol.pk), other)
+        self.client.force_authenticate(carol)
+        self.assertEqual([r['title'] for r in self.client.get('/api/resumes/').data], ['Legacy'])
+
+        # rows on two shards (an interrupted move) are reported, not guessed at
+        Resume.objects.using(home).bulk_create([Resume(owner=carol, title='Half-moved')])
+        err = StringIO()
+        call_command('adopt_shards', stdout=StringIO(), stderr=err)
+        self.assertIn(f'owner {carol.pk} has rows on shard1, shard2', err.getvalue())
+        self.assertEqual(sharding.move_owner(carol.pk, other, settle=0), {})
+        self.assertEqual(self.rows_on(home, Resume, owner_id=carol.pk), 0)
+        self.assertEqual(self.rows_on(other, Resume, owner_id=carol.pk), 1)
+
+    def test_move_owner_keeps_ids_history_and_feed_cursor(self):
+        pk = self.create_resume(self.alice, 'Mover', ['Go', 'SQL'])
+        Resume.objects.using('shard1').filter(pk=pk).update(
+            last_updated=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        cursor = self.client.get('/api/changes/').data['next_since']
+
+        copied = sharding.move_owner(self.alice.pk, 'shard2', settle=0)
+        self.assertEqual((copied['resume'], copied['skill'], copied['resumechange']), (1, 2, 3))
+        self.assertEqual(self.rows_on('shard1', Skill) + self.rows_on('shard1', ResumeChange), 0)
+        moved = Resume.objects.using('shard2').get(pk=pk)
+        self.assertEqual(moved.last_updated.year, 2024)
+        self.assertEqual(sharding.shard_for(self.alice.pk), 'shard2')
+
+        self.assertEqual(self.client.get(f'/api/resumes/{pk}/').data['title'], 'Mover')
+        self.client.post('/api/skills/', {'resume': pk, 'name': 'Zig'}, format='json')
+        self.assertEqual(self.rows_on('shard2', Skill, resume_id=pk), 3)
+        feed = self.client.get(f'/api/changes/?since={cursor}').data['results']
+        self.assertEqual([(c['op'], c['model']) for c in feed], [('create', 'skill')])
+        self.assertEqual(len(self.client.get('/api/changes/').data['results']), 4)
+
+    def test_owner_writes_pause_while_their_data_moves(self):
+        pk = self.create_resume(self.alice, 'Busy', ['Go'])
+        bob_resume = self.create_resume(self.bob, 'Unaffected')
+        seen = []
+
+        def during_move(seconds):
+            if seen:
+                return
+            write = self.client.post('/api/skills/', {'resume': pk, 'name': 'Late'}, format='json')
+            read = self.client.get(f'/api/resumes/{pk}/')
+            self.client.force_authenticate(self.bob)
+            other = self.client.post('/api/skills/', {'resume': bob_resume, 'name': 'Fine'}, format='json')
+            self.client.force_authenticate(self.alice)
+            seen.append((write.status_code, write.get('Retry-After'), read.status_code, other.status_code))
+
+        with mock.patch('resumes.sharding.time.sleep', side_effect=during_move):
+            sharding.move_owner(self.alice.pk, 'shard2')
+        self.assertEqual(seen, [(503, '1', 200, 201)])
+        resp = self.client.post('/api/skills/', {'resume': pk, 'name': 'Later'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(sorted(Skill.objects.using('shard2').filter(resume_id=pk).values_list('name', flat=True)),
+                         ['Go', 'Later'])
+
+    def test_rebalance_command_evens_out_shards(self):
+        owners = [User.objects.create_user(username=f'owner{i}') for i in range(4)]
+        for owner in owners:
+            sharding.move_owner(owner.pk, 'shard1', settle=0)
+        for n, owner in enumerate(owners, 1):
+            for i in range(n):
+                self.create_resume(owner, f'R{i}')
+        out = StringIO()
+        call_command('rebalance_shards', stdout=out)
+        self.assertIn('moves planned', out.getvalue())
+        self.assertEqual(self.rows_on('shard2', Resume), 0)
+
+        call_command('rebalance_shards', '--apply', '--settle', '0', stdout=StringIO())
+        load = (self.rows_on('shard1', Resume), self.rows_on('shard2', Resume))
+        self.assertEqual(sum(load), 10)
+        self.assertLessEqual(abs(load[0] - load[1]), 2)
+        self.assertEqual(sharding.plan(), [])
+
+    def test_search_fans_out_and_merges_newest_first(self):
+        first = self.create_resume(self.alice, 'Backend engineer')
+        second = self.create_resume(self.bob, 'Backend lead')
+        self.create_resume(self.bob, 'Designer')
+        self.assertEqual(self.client.get('/api/search/resumes/?q=backend').status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        resp = self.client.get('/api/search/resumes/?q=backend')
+        self.assertEqual([(r['id'], r['owner']) for r in resp.data], [(second, 'bob'), (first, 'alice')])
+        resp = self.client.get('/api/search/resumes/?q=BOB&limit=1')
+        self.assertEqual([r['title'] for r in resp.data], ['Designer'])
+        self.assertEqual(self.client.get('/api/search/resumes/').status_code, 400)
+
+    def test_admin_works_on_the_picked_shard(self):
+        alpha = self.create_resume(self.alice, 'Alpha', ['Go'])
+        beta = self.create_resume(self.bob, 'Beta', ['Rust'])
+        self.client.force_login(User.objects.create_superuser(username='root', password='x'))
+
+        resp = self.client.get('/admin/resumes/resume/', {'shard': 'shard2'})
+        self.assertContains(resp, 'Beta')
+        self.assertNotContains(resp, 'Alpha')
+        self.assertContains(self.client.get('/admin/resumes/resume/', {'q': 'bob'}), 'Beta')  # kept in the session
+        resp = self.client.get(f'/admin/resumes/resume/{beta}/change/')
+        self.assertContains(resp, 'Rust')
+        self.assertNotIn('owner', resp.context['adminform'].form.fields)
+
+        resp = self.client.post('/admin/resumes/resume/',
+                                {'action': 'regenerate_summaries', '_selected_action': [beta]})
+        self.assertEqual(resp.status_code, 302)
+        self.assertNotEqual(Resume.objects.using('shard2').get(pk=beta).summary_text, '')
+
+        resp = self.client.get('/admin/resumes/skill/', {'shard': 'shard1'})
+        self.assertContains(resp, 'Go')
+        self.assertNotContains(resp, 'Rust')
+        self.assertEqual(self.client.get(f'/admin/resumes/resume/{alpha}/change/').status_code, 200)
+
+    def test_analytics_and_export_cover_every_shard(self):
+        first = self.create_resume(self.alice, 'A', ['Go', 'SQL'])
+        second = self.create_resume(self.bob, 'B', ['go'])
+        analytics.refresh()
+        self.assertEqual(analytics.check(), [])
+        stats = analytics.stats_payload(GLOBAL_OWNER_ID)
+        self.assertEqual((stats['resume_count'], stats['top_skills'][0]), (2, {'name': 'go', 'count': 2}))
+
+        self.create_resume(self.bob, 'C')
+        self.assertEqual(analytics.refresh(), 1)
+        self.assertEqual(analytics.stats_payload(self.bob.pk)['resume_count'], 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'export.ndjson')
+            call_command('export_resumes', '--output', path, stderr=StringIO())
+            with open(path) as fh:
+                docs = [json.loads(line) for line in fh]
+        self.assertEqual([doc['resume']['id'] for doc in docs][:2], [first, second])
+        self.assertEqual(len(docs), 3)
+        self.assertEqual([s['name'] for s in docs[0]['sections']['skill']], ['Go', 'SQL'])
+
+    def test_webhooks_archive_and_user_deletes_follow_the_owner(self):
+        pk = self.create_resume(self.bob, 'Hooked')
+        payload = {'source': 'hackathon_platform', 'external_id': 'e1', 'type': 'achievement',
+                   'data': {'title': 'Prize'}, 'target_resume_id': pk}
+        body, headers = signed_webhook(payload)
+        resp = self.client.post('/api/integrations/webhook/', body, content_type='application/json', **headers)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.rows_on('shard2', Achievement, resume_id=pk), 1)
+
+        Resume.objects.using('shard2').update(last_updated=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        self.create_resume(self.alice, 'Fresh')
+        self.assertEqual(sum(n for n, _raw, _stored in archive.archive_stale(timezone.now() - datetime.timedelta(days=1))), 1)
+        self.assertEqual(self.rows_on('shard2', ArchivedResume, resume_id=pk), 1)
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.get(f'/api/resumes/{pk}/').data['achievements'][0]['title'], 'Prize')
+
+        self.bob.delete()
+        self.assertEqual(self.rows_on('shard2', Resume) + self.rows_on('shard2', ResumeChange), 0)
+        self.assertFalse(OwnerShard.objects.filter(owner_id=self.bob.pk).exists())
+        self.assertEqual(self.rows_on('shard1', Resume), 1)
+
+
+@override_settings(RESUME_SHARDS=['shard1', 'shard2'])
+class ShardFanOutTests(TransactionTestCase):
+    """Outside a transaction fan-out really runs one thread per shard."""
+    databases = {'default', 'shard1', 'shard2'}
+
+    def setUp(self):
+        cache.clear()
+        self.owners = [User.objects.create_user(username=f'fan{i}') for i in range(2)]
+        for owner, alias in zip(self.owners, ('shard1', 'shard2')):
+            sharding.move_owner(owner.pk, alias, settle=0)
+        for owner in self.owners:
+            for i in range(3):
+                owner.resumes.create(title=f'{owner.username}-{i}').skills.create(name='Go')
+
+    def test_fan_out_runs_a_thread_per_shard(self):
+        results = sharding.fan_out(lambda alias: (threading.current_thread().name, Resume.objects.count()))
+        self.assertEqual({alias: count for alias, (_thread, count) in results.items()}, {'shard1': 3, 'shard2': 3})
+        self.assertTrue(all(name.startswith('shard') for name, _count in results.values()))
+
+    def test_merge_streams_shards_in_key_order_and_reraises(self):
+        ids = [doc['resume']['id'] for doc in export.iter_documents(chunk_size=2)]
+        self.assertEqual(ids, sorted(Resume.objects.using('shard1').values_list('pk', flat=True))
+                         + sorted(Resume.objects.using('shard2').values_list('pk', flat=True)))
+
+        def broken(alias):
+            yield 1
+            raise RuntimeError(alias)
+
+        with self.assertRaises(RuntimeError):
+            list(sharding.merge(broken, key=lambda item: item))
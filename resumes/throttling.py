@@ -0,0 +1,134 @@
+# resumes/throttling.py
+"""
+Rate limiting and concurrency caps for the expensive endpoints.
+
+- TokenBucketThrottle: a token-bucket variant of DRF's SimpleRateThrottle. A
+  rate of "10/min" is a bucket of 10 tokens refilled continuously at 10 per
+  minute, so clients get short bursts without a hard window reset. Each
+  request costs one cache get and at most one set.
+- limit_concurrency: caps in-flight executions of a view across workers
+  (settings.CONCURRENCY_LIMITS) with a fixed set of shared slot keys.
+
+State lives in the cache named by settings.RATE_LIMIT_CACHE. The default
+local-memory cache is a per-process stand-in; point it at a shared backend
+(Redis/Memcached) in production. Bucket updates are read-modify-write, so
+concurrent requests for one key may both pass; that is an accepted
+approximation for a throttle.
+"""
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import SimpleRateThrottle
+
+from resumes import webhooks
+
+
+def _cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache_format = 'bucket_%(scope)s_%(ident)s'
+
+    def __init__(self):
+        super().__init__()
+        self.cache = _cache()
+        self._wait = None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        refill = self.num_requests / self.duration
+        tokens, stamp = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - stamp) * refill)
+        if tokens < 1:
+            self._wait = (1 - tokens) / refill
+            return False
+        # an untouched bucket is full again after `duration`, so it may expire
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class AnonBucketThrottle(TokenBucketThrottle):
+    """Per client address, for unauthenticated requests only."""
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request, view)
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+
+class SummaryRateThrottle(TokenBucketThrottle):
+    scope = 'summary'
+
+
+class PdfRateThrottle(TokenBucketThrottle):
+    scope = 'pdf'
+
+
+class WebhookRateThrottle(TokenBucketThrottle):
+    """
+    One bucket per webhook source once the delivery's signature checks out, so
+    a sender behind rotating addresses still shares one budget; unsigned or
+    badly signed requests fall back to a bucket per client address.
+    """
+    scope = 'webhook'
+
+    def get_cache_key(self, request, view):
+        source = webhooks.signed_source(request.headers, request.body)
+        ident = f'source:{source}' if source else self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+def limit_concurrency(scope):
+    """
+    Allow at most settings.CONCURRENCY_LIMITS[scope] concurrent executions of the
+    wrapped view; callers over the cap get 429 with Retry-After. Each execution
+    holds one of `limit` slot keys, taken with cache.add(), so the count can
+    neither drift nor go negative. A slot expires after CONCURRENCY_SLOT_TIMEOUT
+    seconds, so slots leaked by a killed worker heal on their own.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            limit = getattr(settings, 'CONCURRENCY_LIMITS', {}).get(scope)
+            if not limit:
+                return func(*args, **kwargs)
+            cache = _cache()
+            token = uuid.uuid4().hex
+            timeout = getattr(settings, 'CONCURRENCY_SLOT_TIMEOUT', 300)
+            slot = next((key for key in (f'concurrency_{scope}_{i}' for i in range(limit))
+                         if cache.add(key, token, timeout)), None)
+            if slot is None:
+                raise Throttled(wait=1, detail="Too many concurrent requests for this endpoint.")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # the slot may have expired and gone to another request meanwhile
+                if cache.get(slot) == token:
+                    cache.delete(slot)
+        return wrapper
+    return decorator
@@ -1,33 +1,79 @@
 # resumes/views.py
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import PermissionDenied, ParseError, NotFound
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.exceptions import PermissionDenied, ParseError, NotFound, ValidationError
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
 from django.conf import settings
-from django.http import HttpResponse
-
-from .models import Resume, Project, Experience, Education, Skill, Achievement
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.validators import URLValidator
+from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import (Resume, Project, Experience, Education, Skill, Achievement, ResumeChange,
+                     ArchivedResume, GLOBAL_OWNER_ID)
 from .serializers import (ResumeSerializer, ProjectSerializer,
                           ExperienceSerializer, EducationSerializer,
-                          SkillSerializer, AchievementSerializer)
+                          SkillSerializer, AchievementSerializer,
+                          ResumeDocumentSerializer, CHILD_SERIALIZERS)
 from .permissions import IsOwnerOrReadOnly
+from . import analytics, archive, caching, changes, documents, events, sharding, summaries, webhooks
+from .throttling import (SummaryRateThrottle, PdfRateThrottle, WebhookRateThrottle,
+                         limit_concurrency)
+
+import asyncio
+import heapq
+import json
+from itertools import islice
+
+
+def _parse_pks(values, field='id'):
+    """Coerce a list of primary keys from a payload, rejecting junk and duplicate ids."""
+    try:
+        pks = [int(v) for v in values]
+    except (TypeError, ValueError):
+        raise ParseError(f"Every item needs an integer '{field}'.")
+    if field == 'id' and len(set(pks)) != len(pks):
+        raise ParseError("Duplicate ids in payload.")
+    return pks
+
+
+def _list_payload(data):
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise ParseError("Expected a list of objects.")
+    return data
 
-# PDF generation
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from io import BytesIO
 
-# optional OpenAI usage
-OPENAI_AVAILABLE = False
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-    openai.api_key = settings.OPENAI_API_KEY or None
-except Exception:
-    OPENAI_AVAILABLE = False
+def _theme(request):
+    theme = request.query_params.get('theme', documents.DEFAULT_THEME)
+    if theme not in documents.THEMES:
+        raise ParseError(f"Unknown theme '{theme}'; choose one of: {', '.join(documents.THEMES)}.")
+    return theme
+
+
+def _owned_resumes(user, items):
+    """
+    Load every resume referenced by `items` in one query and check ownership once
+    per resume instead of once per item. Returns {pk: Resume}.
+    """
+    pks = set(_parse_pks([item['resume'] for item in items if item.get('resume') is not None], 'resume'))
+    if not pks:
+        return {}
+    resumes = Resume.objects.filter(pk__in=pks, owner=user).in_bulk()
+    for pk in pks - set(resumes):
+        restored = archive.restore(pk, owner_id=user.pk)
+        if restored is not None:
+            resumes[pk] = restored
+    if len(resumes) != len(pks):
+        raise PermissionDenied("You can only add items to your own resumes.")
+    return resumes
 
 
 class ResumeViewSet(viewsets.ModelViewSet):
@@ -36,84 +82,130 @@ class ResumeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
 
     def get_queryset(self):
-        return Resume.objects.filter(owner=self.request.user)
+        qs = Resume.objects.filter(owner=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            qs = qs.prefetch_related(*CHILD_SERIALIZERS)
+        elif self.action == 'html':
+            # owner is prefetched, not joined: users may live in another database (resumes/sharding.py)
+            qs = qs.prefetch_related('owner', *CHILD_SERIALIZERS)
+        return qs
+
+    # reads are served from the two-tier cache (resumes/caching.py); any write
+    # to the owner's resumes invalidates them through the change feed
+    def list(self, request, *args, **kwargs):
+        # archived resumes are listed as stubs, without restoring them; fetching one restores it
+        def load():
+            stubs = (ArchivedResume.objects.filter(owner_id=request.user.pk).order_by('-last_updated')
+                     .values('resume_id', 'title', 'last_updated'))
+            return (list(self.get_serializer(self.get_queryset(), many=True).data)
+                    + [{'id': row.pop('resume_id'), **row, 'archived': True} for row in stubs])
+
+        return Response(caching.get_or_load(request.user.pk, 'resume:list', load))
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get(self.lookup_field, ''))
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        data = caching.get_or_load(request.user.pk, f'resume:{pk}',
+                                   lambda: dict(self.get_serializer(self.get_object()).data))
+        return Response(data)
+
+    def get_object(self):
+        # resumes moved to the archive tier come back transparently on access
+        try:
+            return super().get_object()
+        except Http404:
+            if archive.restore(self.kwargs.get(self.lookup_field), owner_id=self.request.user.pk) is None:
+                raise
+            return super().get_object()
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-    @action(detail=True, methods=['post'])
+    def perform_destroy(self, instance):
+        # one DELETE per section table instead of a per-row cascade with signals
+        archive.hard_delete([instance.pk])
+
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """
+        GET /api/resumes/archived/
+        The caller's archived resumes. Any request naming one of these ids
+        (retrieve, document, sections, summary, PDF) or one of their section
+        rows restores it first.
+        """
+        rows = (ArchivedResume.objects.filter(owner_id=request.user.pk).order_by('-last_updated')
+                .values('resume_id', 'title', 'last_updated', 'archived_at'))
+        return Response([{'id': row.pop('resume_id'), **row} for row in rows])
+
+    @action(detail=True, methods=['get'])
+    def html(self, request, pk=None):
+        """
+        GET /api/resumes/{id}/html/?theme=classic|modern|compact
+        The resume rendered as a standalone HTML page. The document tree is
+        cached per owner and each section's HTML per theme, so after an edit
+        only the changed section is rendered again.
+        """
+        theme = _theme(request)
+        if not str(pk).isdigit():
+            raise Http404
+        doc = documents.document_for(request.user.pk, pk, self.get_object)
+        return HttpResponse(documents.render_html(doc, theme), content_type='text/html; charset=utf-8')
+
+    @action(detail=True, methods=['post'], throttle_classes=[SummaryRateThrottle])
+    @limit_concurrency('summary')
     def generate_summary(self, request, pk=None):
         """
         Generate a professional summary for the resume.
         Behavior:
-          - If OPENAI_API_KEY is configured and openai package is available -> try calling OpenAI (non-blocking fallback).
-          - Otherwise -> fallback to rule-based summary built from skills/projects/experiences.
+          - If a summary provider is configured (settings.SUMMARY_PROVIDER, e.g. OpenAI) -> try it first.
+          - If it fails, times out or its circuit is open -> rule-based summary built from skills/projects/experiences.
         """
         resume = self.get_object()
-
-        # RULE-BASED summary builder (always available)
-        def rule_based_summary(user, resume_obj):
-            skills_qs = resume_obj.skills.all()[:8]
-            top_skills = [s.name for s in skills_qs]
-            proj_qs = resume_obj.projects.all()[:3]
-            projects = [p.title for p in proj_qs]
-            exp_qs = resume_obj.experiences.all().order_by('-start_date')[:2]
-            roles = [f"{e.role} at {e.company}" for e in exp_qs]
-
-            parts = []
-            name = user.first_name or user.username
-            parts.append(f"{name} is a backend developer experienced in {', '.join(top_skills) if top_skills else 'web development and backend systems'}.")
-            if roles:
-                parts.append("Recent roles: " + "; ".join(roles) + ".")
-            if projects:
-                parts.append("Recent projects: " + ", ".join(projects) + ".")
-            return " ".join(parts)
-
-        # If OpenAI available and key set, attempt improved summary
-        if OPENAI_AVAILABLE and settings.OPENAI_API_KEY:
-            try:
-                prompt = (
-                    "Write a short (2-3 sentence) professional resume summary for a backend developer "
-                    "given the following details. Use a confident, concise tone.\n\n"
-                    f"Name: {request.user.first_name or request.user.username}\n"
-                    f"Skills: {', '.join([s.name for s in resume.skills.all()[:10]])}\n"
-                    f"Top Projects: {', '.join([p.title for p in resume.projects.all()[:5]])}\n"
-                    f"Recent Roles: {', '.join([f'{e.role} at {e.company}' for e in resume.experiences.all()[:3]])}\n\n"
-                    "Summary:"
-                )
-                # Use completion call depending on openai client version
-                if hasattr(openai, "ChatCompletion"):
-                    # for new OpenAI package
-                    resp = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=120,
-                        n=1,
-                    )
-                    summary_text = resp.choices[0].message.content.strip()
-                else:
-                    resp = openai.Completion.create(
-                        engine="text-davinci-003",
-                        prompt=prompt,
-                        max_tokens=120,
-                        n=1,
-                    )
-                    summary_text = resp.choices[0].text.strip()
-
-                if summary_text:
-                    resume.summary_text = summary_text
-                    resume.save()
-                    return Response({'summary': summary_text}, status=status.HTTP_200_OK)
-            except Exception:
-                # if anything fails, fallback to rule-based summary (do not crash)
-                pass
-
-        # fallback
-        summary = rule_based_summary(request.user, resume)
+        summary, _source = summaries.summarize(request.user, resume)
         resume.summary_text = summary
         resume.save()
+        events.publish_summary(resume)
         return Response({'summary': summary}, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['put', 'patch'], serializer_class=ResumeDocumentSerializer)
+    def document(self, request, pk=None):
+        """
+        PUT/PATCH /api/resumes/{id}/document/
+        Save a complete resume (fields plus nested sections) in one atomic request.
+        The server diffs each submitted section against the stored rows and applies
+        only the needed inserts/updates/deletes; the response reports that diff.
+        """
+        resume = self.get_object()
+        serializer = self.get_serializer(resume, data=request.data, partial=request.method == 'PATCH')
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response({
+            'resume': ResumeSerializer(resume, context=self.get_serializer_context()).data,
+            'diff': serializer.diff,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['put'], url_path=r'sections/(?P<section>[a-z]+)')
+    def replace_section(self, request, pk=None, section=None):
+        """
+        PUT /api/resumes/{id}/sections/{section}/
+        Replace a whole child section (e.g. all skills) with the given list in one
+        transaction: one DELETE plus one bulk INSERT.
+        """
+        serializer_class = CHILD_SERIALIZERS.get(section)
+        if serializer_class is None:
+            raise NotFound(f"Unknown section '{section}'.")
+        resume = self.get_object()
+
+        items = [{**item, 'resume': resume.pk} for item in _list_payload(request.data)]
+        context = {**self.get_serializer_context(), 'resumes': {resume.pk: resume}}
+        serializer = serializer_class(data=items, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        with sharding.atomic(), changes.batch():
+            getattr(resume, section).all().delete()
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 #
 # Child viewsets and fix to permission handling (use DRF exceptions)
@@ -125,13 +217,85 @@ class BaseChildViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset()
         return qs.filter(resume__owner=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        name = f'{self.queryset.model._meta.model_name}:list'
+        data = caching.get_or_load(request.user.pk, name,
+                                   lambda: list(self.get_serializer(self.get_queryset(), many=True).data))
+        return Response(data)
+
+    def get_object(self):
+        # the item may belong to an archived resume: restore just that one
+        try:
+            return super().get_object()
+        except Http404:
+            owner_id = self.request.user.pk
+            resume_id = archive.archived_resume_of(owner_id, self.queryset.model, self.kwargs.get(self.lookup_field))
+            if resume_id is None or archive.restore(resume_id, owner_id=owner_id) is None:
+                raise
+            return super().get_object()
+
     def perform_create(self, serializer):
         resume = serializer.validated_data.get('resume')
-        if resume.owner != self.request.user:
-            from rest_framework.exceptions import PermissionDenied
+        if resume.owner_id != self.request.user.pk:
             raise PermissionDenied("You can only add items to your own resumes.")
         serializer.save()
 
+    def perform_update(self, serializer):
+        resume = serializer.validated_data.get('resume')
+        if resume is not None and resume.owner_id != self.request.user.pk:
+            raise PermissionDenied("You can only move items to your own resumes.")
+        serializer.save()
+
+    #
+    # Bulk endpoints: /api/<section>/bulk/
+    #   POST   [{...}, ...]            -> bulk_create
+    #   PATCH  [{"id": 1, ...}, ...]   -> bulk_update
+    #   DELETE {"ids": [1, 2, ...]}    -> one DELETE
+    # Ownership is checked once per referenced resume, so each batch costs a
+    # constant number of queries regardless of its size.
+    #
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'POST':
+            return self.bulk_create(request)
+        if request.method == 'PATCH':
+            return self.bulk_update(request)
+        return self.bulk_destroy(request)
+
+    def bulk_create(self, request):
+        items = _list_payload(request.data)
+        context = {**self.get_serializer_context(), 'resumes': _owned_resumes(request.user, items)}
+        serializer = self.get_serializer(data=items, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        with sharding.atomic(), changes.batch():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request):
+        items = _list_payload(request.data)
+        pks = _parse_pks([item.get('id') for item in items])
+        instances = self.get_queryset().in_bulk(pks)
+        missing = [pk for pk in pks if pk not in instances]
+        if missing:
+            raise NotFound(f"Items not found: {missing}")
+
+        context = {**self.get_serializer_context(), 'resumes': _owned_resumes(request.user, items)}
+        serializer = self.get_serializer([instances[pk] for pk in pks], data=items,
+                                         many=True, partial=True, context=context)
+        serializer.is_valid(raise_exception=True)
+        with sharding.atomic(), changes.batch():
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def bulk_destroy(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            raise ParseError("Expected {\"ids\": [...]}.")
+        pks = _parse_pks(ids)
+        with sharding.atomic(), changes.batch():
+            deleted, _ = self.get_queryset().filter(pk__in=pks).delete()
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
 
 class ProjectViewSet(BaseChildViewSet):
     queryset = Project.objects.all()
@@ -154,13 +318,208 @@ class AchievementViewSet(BaseChildViewSet):
     serializer_class = AchievementSerializer
 
 
+#
+# Change feed (delta sync)
+#
+class ChangeFeedAPIView(APIView):
+    """
+    GET /api/changes/?since=<seq>&limit=<n>
+    Returns the caller's resume changes with seq > since, oldest first:
+    {"results": [{"seq", "op", "model", "id", "resume", "data"}, ...],
+     "next_since": <seq to pass next time>, "has_more": bool}
+    `data` holds the row's fields for create/update and is null for delete.
+    With ?stream=1 every remaining change is streamed as NDJSON instead.
+    """
+    permission_classes = (IsAuthenticated,)
+    default_limit = 500
+    max_limit = 5000
+    fields = ('seq', 'op', 'model', 'object_id', 'resume_id', 'data')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ParseError("'since' and 'limit' must be integers.")
+        if limit < 1:
+            raise ParseError("'limit' must be positive.")
+
+        # bound to the caller's shard now: a stream is read after the request has returned
+        qs = (ResumeChange.objects.using(sharding.shard_for(request.user.pk))
+              .filter(owner_id=request.user.pk, seq__gt=since).order_by('seq').values_list(*self.fields))
+
+        if request.query_params.get('stream'):
+            lines = (json.dumps(self.as_delta(row)) + '\n'
+                     for row in qs.iterator(chunk_size=self.default_limit))
+            return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+        rows = list(qs[:limit + 1])
+        results = [self.as_delta(row) for row in rows[:limit]]
+        return Response({
+            'results': results,
+            'next_since': results[-1]['seq'] if results else since,
+            'has_more': len(rows) > limit,
+        })
+
+    @staticmethod
+    def as_delta(row):
+        seq, op, model, object_id, resume_id, data = row
+        return {'seq': seq, 'op': op, 'model': model, 'id': object_id, 'resume': resume_id, 'data': data}
+
+
+class CacheStatsAPIView(APIView):
+    """GET /api/cache/stats/ (admins) - this worker's resume cache hit ratios and latencies."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(caching.metrics.snapshot())
+
+
+class ResumeSearchAPIView(APIView):
+    """
+    GET /api/search/resumes/?q=<text>&limit=<n> (admins)
+    Resumes of every owner whose title starts with q, or whose owner's username
+    is q, most recently updated first. Each shard is searched in parallel
+    (resumes/sharding.py) and the results merged:
+    [{"id", "owner", "title", "last_updated"}, ...]
+    """
+    permission_classes = (IsAdminUser,)
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ParseError("'q' is required.")
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ParseError("'limit' must be an integer.")
+        if limit < 1:
+            raise ParseError("'limit' must be positive.")
+
+        # users live in the default database, so they are matched first, not joined
+        owners = list(get_user_model().objects.filter(username__iexact=query).values_list('pk', flat=True))
+        match = Q(title__istartswith=query) | Q(owner_id__in=owners)
+
+        def search(alias):
+            return list(Resume.objects.filter(match).order_by('-last_updated', '-pk')
+                        .values('id', 'owner_id', 'title', 'last_updated')[:limit])
+
+        rows = list(islice(heapq.merge(*sharding.fan_out(search).values(),
+                                       key=lambda row: (row['last_updated'], row['id']), reverse=True), limit))
+        usernames = dict(get_user_model().objects.filter(pk__in={row['owner_id'] for row in rows})
+                         .values_list('pk', 'username'))
+        return Response([{'id': row['id'], 'owner': usernames.get(row['owner_id']), 'title': row['title'],
+                          'last_updated': row['last_updated']} for row in rows])
+
+
+#
+# Analytics (precomputed by `manage.py rollup_analytics`, see resumes/analytics.py)
+#
+class MyAnalyticsAPIView(APIView):
+    """GET /api/analytics/me/ - the caller's own resume stats."""
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(analytics.stats_payload(request.user.pk))
+
+
+class AnalyticsAPIView(APIView):
+    """
+    GET /api/analytics/                 - global stats (admins)
+    GET /api/analytics/users/{user_id}/ - one user's stats (admins)
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, user_id=None, *args, **kwargs):
+        return Response(analytics.stats_payload(GLOBAL_OWNER_ID if user_id is None else user_id))
+
+
+#
+# Live event stream (Server-Sent Events). Needs an ASGI server (config/asgi.py):
+# each connection is a coroutine parked on a queue, not a worker thread. Under
+# WSGI the never-ending stream would be drained in a worker that then never
+# returns, so it is refused with 501 there.
+#
+def _authenticate_stream_user(request):
+    """Session user, JWT from the Authorization header, or ?token=<jwt> (EventSource cannot set headers)."""
+    if request.user.is_authenticated:
+        return request.user
+    auth = JWTAuthentication()
+    try:
+        result = auth.authenticate(request)
+        if result is None and request.GET.get('token'):
+            token = auth.get_validated_token(request.GET['token'])
+            return auth.get_user(token)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+async def _event_stream(sub, heartbeat):
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if event is events.EVICTED:
+                # slow consumer: the client should reconnect and catch up via /api/changes/
+                yield 'event: evicted\ndata: {}\n\n'
+                return
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        events.broker.unsubscribe(sub)
+
+
+async def resume_events_view(request):
+    """
+    GET /api/events/?resume=<id>
+    Server-Sent Events stream of change notifications (`event: change`) and saved
+    summaries (`event: summary`) for the caller's resumes, optionally limited to
+    one resume. Idle streams receive a heartbeat comment every
+    EVENT_STREAM_HEARTBEAT_SECONDS. Events carry ids only; fetch full rows via
+    /api/changes/?since=<seq>.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'The event stream is only served over ASGI; poll /api/changes/ instead.'},
+                            status=501)
+    user = await sync_to_async(_authenticate_stream_user)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    resume_id = request.GET.get('resume')
+    if resume_id is not None:
+        try:
+            resume_id = int(resume_id)
+        except ValueError:
+            return JsonResponse({'detail': "'resume' must be an integer."}, status=400)
+        with sharding.for_owner(user.pk):
+            found = await Resume.objects.filter(pk=resume_id, owner=user).aexists()
+        if not found:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    sub = events.broker.subscribe(user.pk, resume_id)
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    return StreamingHttpResponse(_event_stream(sub, heartbeat), content_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 #
 # Webhook integration endpoint
 #
 class IntegrationWebhookAPIView(APIView):
     """
     POST /api/integrations/webhook/
-    Secure with HEADER: X-WEBHOOK-SECRET: <secret>
+    Signed per source with HMAC-SHA256 (see resumes/webhooks.py):
+      X-Webhook-Source, X-Webhook-Timestamp, X-Webhook-Nonce (optional), X-Webhook-Signature: v1=<hex>
     Payload example:
     {
       "source":"hackathon_platform",
@@ -175,25 +534,51 @@ class IntegrationWebhookAPIView(APIView):
       "target_resume_id": 1
     }
     The endpoint will attempt to attach the incoming data to the resume (create Achievement or Project).
+    A replayed delivery gets 409 before any database work.
     """
 
-    permission_classes = (AllowAny,)  # we'll validate secret manually
+    permission_classes = (AllowAny,)  # deliveries are verified by signature instead
+    throttle_classes = (WebhookRateThrottle,)
 
     def post(self, request, *args, **kwargs):
-        secret = request.headers.get('X-WEBHOOK-SECRET') or request.headers.get('X-Webhook-Secret')
-        if not secret or secret != settings.WEBHOOK_SECRET:
-            raise PermissionDenied("Invalid webhook secret")
+        delivery = webhooks.verify(request.headers, request.body)
+        try:
+            return self.deliver(request, delivery)
+        except Exception:
+            # let the sender retry a delivery we failed to process
+            webhooks.release(delivery)
+            raise
+
+    # links end up in href attributes of rendered resumes
+    web_url = URLValidator(schemes=['http', 'https'])
+
+    def link(self, data, field):
+        value = data.get(field) or None
+        if value is not None:
+            try:
+                self.web_url(value)
+            except DjangoValidationError:
+                raise ValidationError({field: "Enter an http(s) URL."})
+        return value
 
+    def deliver(self, request, delivery):
         payload = request.data
         required_keys = ('source', 'external_id', 'type', 'data', 'target_resume_id')
-        if not all(k in payload for k in required_keys):
+        if not isinstance(payload, dict) or not all(k in payload for k in required_keys):
             raise ParseError("Missing required fields in payload")
+        if payload['source'] != delivery.source:
+            raise PermissionDenied("Payload source does not match the signing source.")
 
         target_id = payload.get('target_resume_id')
-        try:
-            resume = Resume.objects.get(pk=target_id)
-        except Resume.DoesNotExist:
-            raise NotFound("Target resume not found")
+        # no user in scope: look on the shard that holds the resume; rows are
+        # created through its related managers below so they follow it there
+        with sharding.use(sharding.locate_resume(target_id)):
+            try:
+                resume = Resume.objects.get(pk=target_id)
+            except Resume.DoesNotExist:
+                resume = archive.restore(target_id)
+                if resume is None:
+                    raise NotFound("Target resume not found")
 
         # ensure resume owner exists but we do not require caller to be that owner
         # map types
@@ -201,32 +586,29 @@ class IntegrationWebhookAPIView(APIView):
         data = payload.get('data') or {}
 
         if type_ == 'achievement':
-            ach = Achievement.objects.create(
-                resume=resume,
+            ach = resume.achievements.create(
                 title=data.get('title', 'Achievement'),
                 description=data.get('description', ''),
                 issuer=data.get('issuer', '') or payload.get('source', ''),
-                proof_url=data.get('proof_url', None),
+                proof_url=self.link(data, 'proof_url'),
                 date=data.get('date', None) or None
             )
             serializer = AchievementSerializer(ach)
             return Response({'status': 'ok', 'created': 'achievement', 'item': serializer.data}, status=status.HTTP_201_CREATED)
 
         elif type_ == 'project':
-            proj = Project.objects.create(
-                resume=resume,
+            proj = resume.projects.create(
                 title=data.get('title', 'Project'),
                 description=data.get('description', ''),
                 tech_stack=data.get('tech_stack', ''),
-                link=data.get('link', None),
+                link=self.link(data, 'link'),
             )
             serializer = ProjectSerializer(proj)
             return Response({'status': 'ok', 'created': 'project', 'item': serializer.data}, status=status.HTTP_201_CREATED)
 
         else:
             # unsupported type -> create an Achievement as generic fallback
-            ach = Achievement.objects.create(
-                resume=resume,
+            ach = resume.achievements.create(
                 title=data.get('title', f'Imported from {payload.get("source")}'),
                 description=str(data),
             )
@@ -239,54 +621,25 @@ class IntegrationWebhookAPIView(APIView):
 #
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([PdfRateThrottle])
+@limit_concurrency('pdf')
 def resume_pdf_view(request, pk):
     """
-    Return a simple PDF of the resume with basic fields.
-    GET /api/resumes/{id}/export_pdf/
+    Return the resume as a PDF, laid out from the same document tree as the
+    HTML view (resumes/documents.py).
+    GET /api/resumes/{id}/export_pdf/?theme=classic|modern|compact
     """
-    resume = get_object_or_404(Resume, pk=pk, owner=request.user)
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    y = height - 50
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(40, y, resume.title)
-    y -= 25
-    p.setFont("Helvetica", 12)
-    p.drawString(40, y, f"Owner: {request.user.get_full_name() or request.user.username}")
-    y -= 25
-
-    if resume.summary_text:
-        p.setFont("Helvetica-Oblique", 11)
-        p.drawString(40, y, "Summary:")
-        y -= 18
-        text = p.beginText(40, y)
-        text.setFont("Helvetica", 10)
-        for line in resume.summary_text.splitlines():
-            text.textLine(line)
-            y -= 14
-        p.drawText(text)
-        y = text.getY() - 10
-
-    # Projects
-    projs = resume.projects.all()[:6]
-    if projs:
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(40, y, "Projects:")
-        y -= 18
-        p.setFont("Helvetica", 10)
-        for pr in projs:
-            p.drawString(50, y, f"- {pr.title} ({pr.tech_stack})")
-            y -= 14
-            if y < 80:
-                p.showPage()
-                y = height - 50
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return HttpResponse(buffer, content_type='application/pdf', headers={
-        'Content-Disposition': f'attachment; filename=resume_{resume.id}.pdf'
+    theme = _theme(request)
+
+    def load():
+        resume = (Resume.objects.filter(pk=pk, owner=request.user)
+                  .prefetch_related('owner', *CHILD_SERIALIZERS).first()
+                  or archive.restore(pk, owner_id=request.user.pk))
+        if resume is None:
+            raise Http404
+        return resume
+
+    doc = documents.document_for(request.user.pk, pk, load)
+    return HttpResponse(documents.render_pdf(doc, theme), content_type='application/pdf', headers={
+        'Content-Disposition': f'attachment; filename=resume_{doc["id"]}.pdf'
     })
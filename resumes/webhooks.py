@@ -0,0 +1,173 @@
+# resumes/webhooks.py
+"""
+Signature and replay checks for POST /api/integrations/webhook/.
+
+Each source has its own secret (settings.WEBHOOK_SOURCES; list several to
+rotate). A delivery carries:
+
+    X-Webhook-Source:     hackathon_platform
+    X-Webhook-Timestamp:  1760875200            (unix seconds)
+    X-Webhook-Nonce:      3f1c...               (optional, unique per delivery)
+    X-Webhook-Signature:  v1=<hex HMAC-SHA256 of "<timestamp>.<nonce>." + raw body>
+
+`verify()` rejects unknown sources, timestamps outside
+settings.WEBHOOK_TOLERANCE_SECONDS and bad signatures (compared in constant
+time), all without touching the database. A delivery that passes is then
+checked against the replay cache, keyed by its nonce (or, without one, its
+signature). The cache has two levels:
+
+- an in-process bounded LRU, so a replay flood against one worker is
+  answered from a dict lookup;
+- the shared cache (settings.RATE_LIMIT_CACHE) via add(), so a delivery
+  replayed to another worker is caught too.
+
+Entries only need to outlive the timestamp window: an older replay fails
+the timestamp check anyway.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, PermissionDenied
+
+SIGNATURE_VERSION = 'v1'
+
+Delivery = namedtuple('Delivery', 'source replay_key')
+
+
+class ReplayedDelivery(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Webhook delivery already received."
+    default_code = 'replayed'
+
+
+class ReplayCache:
+    """Keys seen in the last `window` seconds, at most `maxsize` of them, oldest evicted first."""
+
+    def __init__(self, maxsize, window):
+        self.maxsize = maxsize
+        self.window = window
+        self._expiry = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key, now=None):
+        """Record `key`; False if it was already recorded and has not expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expires = self._expiry.get(key)
+            if expires is not None and expires > now:
+                return False
+            self._expiry[key] = now + self.window
+            self._expiry.move_to_end(key)
+            # insertion order is expiry order, so expired keys sit at the front
+            while self._expiry and (len(self._expiry) > self.maxsize or next(iter(self._expiry.values())) <= now):
+                self._expiry.popitem(last=False)
+            return True
+
+    def discard(self, key):
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+def _tolerance():
+    return getattr(settings, 'WEBHOOK_TOLERANCE_SECONDS', 300)
+
+
+# a replay must be remembered for the whole window on either side of its timestamp
+replays = ReplayCache(getattr(settings, 'WEBHOOK_REPLAY_CACHE_SIZE', 100_000), 2 * _tolerance())
+
+
+def _shared():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def sign(secret, timestamp, body, nonce=''):
+    """The X-Webhook-Signature value for `body` (bytes); used by senders and tests."""
+    message = f'{timestamp}.{nonce}.'.encode() + body
+    return f'{SIGNATURE_VERSION}=' + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _signatures(header):
+    # "v1=abc, v1=def": a sender rotating its secret may sign with both
+    for part in header.split(','):
+        version, _, value = part.strip().partition('=')
+        if version == SIGNATURE_VERSION and value:
+            yield value
+
+
+def authenticate(headers, body, now=None):
+    """
+    Check a delivery's source, timestamp and signature. Returns the matching
+    signature; raises PermissionDenied.
+    """
+    source = headers.get('X-Webhook-Source', '')
+    secrets = getattr(settings, 'WEBHOOK_SOURCES', {}).get(source)
+    if not secrets:
+        raise PermissionDenied("Unknown webhook source.")
+
+    now = time.time() if now is None else now
+    timestamp = headers.get('X-Webhook-Timestamp', '')
+    try:
+        skew = abs(now - int(timestamp))
+    except ValueError:
+        raise PermissionDenied("Missing or malformed webhook timestamp.")
+    if skew > _tolerance():
+        raise PermissionDenied("Webhook timestamp outside the allowed window.")
+
+    nonce = headers.get('X-Webhook-Nonce', '')
+    provided = list(_signatures(headers.get('X-Webhook-Signature', '')))
+    signature = None
+    for secret in secrets:
+        expected = sign(secret, timestamp, body, nonce).partition('=')[2]
+        # compare against every candidate so timing does not reveal which one matched
+        matches = [hmac.compare_digest(expected, value) for value in provided]
+        if any(matches):
+            signature = expected
+            break
+    if signature is None:
+        raise PermissionDenied("Invalid webhook signature.")
+    return signature
+
+
+def signed_source(headers, body):
+    """The delivery's source if its signature checks out, else None (used by the throttle)."""
+    try:
+        authenticate(headers, body)
+    except PermissionDenied:
+        return None
+    return headers.get('X-Webhook-Source')
+
+
+def verify(headers, body, now=None):
+    """
+    authenticate() a delivery, then record it in the replay cache. Returns a
+    Delivery; raises PermissionDenied or ReplayedDelivery.
+    """
+    now = time.time() if now is None else now
+    signature = authenticate(headers, body, now)
+    source = headers.get('X-Webhook-Source', '')
+    nonce = headers.get('X-Webhook-Nonce', '')
+    key = f'webhook:replay:{source}:{nonce or signature}'
+    if not replays.add(key, now):
+        raise ReplayedDelivery()
+    if not _shared().add(key, 1, 2 * _tolerance()):
+        raise ReplayedDelivery()
+    return Delivery(source, key)
+
+
+def release(delivery):
+    """Forget a delivery whose processing failed, so the sender's retry is accepted."""
+    replays.discard(delivery.replay_key)
+    _shared().delete(delivery.replay_key)
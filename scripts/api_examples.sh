@@ -19,5 +19,8 @@ curl -X POST $BASE/api/token/ -H "Content-Type: application/json" -d '{"username
 # 6. Export PDF
 # curl -X GET $BASE/api/resumes/1/export_pdf/ -H "Authorization: Bearer $TOKEN" --output demo_resume.pdf
 
-# 7. Webhook (test)
-curl -X POST $BASE/api/integrations/webhook/ -H "Content-Type: application/json" -H "X-WEBHOOK-SECRET: change-this-in-prod" -d '{"source":"hack","external_id":"x1","type":"achievement","data":{"title":"Prize"},"target_resume_id":1}'
+# 7. Webhook (test): signed with the source's secret from WEBHOOK_SOURCES
+BODY='{"source":"hackathon_platform","external_id":"x1","type":"achievement","data":{"title":"Prize"},"target_resume_id":1}'
+TS=$(date +%s); NONCE=$(openssl rand -hex 16)
+SIG=$(printf '%s' "$TS.$NONCE.$BODY" | openssl dgst -sha256 -hmac "change-this-in-prod" | sed 's/^.* //')
+curl -X POST $BASE/api/integrations/webhook/ -H "Content-Type: application/json" -H "X-Webhook-Source: hackathon_platform" -H "X-Webhook-Timestamp: $TS" -H "X-Webhook-Nonce: $NONCE" -H "X-Webhook-Signature: v1=$SIG" -d "$BODY"
@@ -0,0 +1,89 @@
+# scripts/bench_admin.py
+"""
+Benchmark the Resume admin changelist on a large table, with the default
+ModelAdmin settings (exact COUNT(*), no select_related) and with ResumeAdmin.
+Uses a throwaway SQLite database, so the project database is untouched.
+
+Run: python scripts/bench_admin.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--rows', type=int, default=1_000_000)
+parser.add_argument('--owners', type=int, default=10_000)
+parser.add_argument('--repeat', type=int, default=5)
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+tmpdir = tempfile.mkdtemp()
+settings.DATABASES['default']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+settings.ALLOWED_HOSTS = ['*']
+django.setup()
+
+from django.contrib import admin  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from resumes.models import Resume  # noqa: E402
+from resumes.admin import ResumeAdmin  # noqa: E402
+from users.models import User  # noqa: E402
+
+call_command('migrate', verbosity=0)
+start = time.perf_counter()
+User.objects.bulk_create([User(username=f'user{i}') for i in range(args.owners)], batch_size=5000)
+owner_ids = list(User.objects.values_list('pk', flat=True))
+batch = 20000
+for offset in range(0, args.rows, batch):
+    Resume.objects.bulk_create([
+        Resume(owner_id=owner_ids[i % len(owner_ids)], title=f'Resume {i}')
+        for i in range(offset, min(offset + batch, args.rows))
+    ], batch_size=batch)
+print(f"seeded {args.rows} resumes in {time.perf_counter() - start:.1f}s")
+
+superuser = User.objects.create_superuser('bench', 'bench@example.com', 'bench')
+client = Client()
+client.force_login(superuser)
+
+
+model_admin = admin.site._registry[Resume]
+DEFAULTS = {  # plain ModelAdmin behaviour
+    'paginator': Paginator,
+    'show_full_result_count': True,
+    'list_select_related': False,
+    'search_fields': ('owner__username', 'title'),
+}
+TUNED = {name: getattr(ResumeAdmin, name) for name in DEFAULTS}
+
+
+def measure(label, config, url):
+    for name, value in config.items():
+        setattr(model_admin, name, value)
+    client.get(url)  # warm up
+    timings = []
+    for _ in range(args.repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            assert client.get(url).status_code == 200
+            timings.append(time.perf_counter() - t0)
+    print(f"{label:<52} {min(timings) * 1000:9.1f} ms  {len(ctx)} queries")
+    if os.environ.get('BENCH_SQL'):
+        for q in ctx.captured_queries:
+            print(f"    {float(q['time']) * 1000:8.1f} ms  {q['sql'][:160]}")
+
+
+settings.DEBUG = True
+for url in os.environ.get('BENCH_URLS', '/admin/resumes/resume/ /admin/resumes/resume/?q=user4242 /admin/resumes/resume/?p=500').split():
+    measure(f"default ModelAdmin   {url}", DEFAULTS, url)
+    measure(f"ResumeAdmin          {url}", TUNED, url)
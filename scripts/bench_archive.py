@@ -0,0 +1,120 @@
+# scripts/bench_archive.py
+"""
+Benchmark the archive tier and set-based deletes on a throwaway SQLite database:
+hot-table size before/after archiving stale resumes, cascade delete through
+Django's collector vs archive.hard_delete(), and restore latency.
+
+Run: python scripts/bench_archive.py --resumes 20000 --delete 2000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--resumes', type=int, default=20_000)
+parser.add_argument('--stale', type=float, default=0.8, help="Fraction of resumes not updated for years.")
+parser.add_argument('--delete', type=int, default=2_000, help="Resumes deleted per delete strategy.")
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+tmpdir = tempfile.mkdtemp()
+settings.DATABASES['default']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from resumes import archive, changes  # noqa: E402
+from resumes.models import (Resume, Project, Experience, Education, Skill, Achievement,  # noqa: E402
+                            ArchivedResume)
+from users.models import User  # noqa: E402
+
+HOT = (Resume,) + archive.SECTION_MODELS
+PER_RESUME = {Project: 3, Experience: 3, Education: 2, Skill: 8, Achievement: 2}
+
+
+def seed():
+    owners = User.objects.bulk_create([User(username=f'user{i}') for i in range(max(1, args.resumes // 4))])
+    resumes = Resume.objects.bulk_create([
+        Resume(owner=owners[i % len(owners)], title=f'Resume {i}', summary_text='Backend developer. ' * 10)
+        for i in range(args.resumes)
+    ], batch_size=5000)
+    day = datetime.date(2018, 1, 1)
+    rows = {
+        Project: lambda r, i: Project(resume=r, title=f'Project {i}', description='Built things. ' * 8,
+                                      tech_stack='Python, Django, PostgreSQL', start_date=day),
+        Experience: lambda r, i: Experience(resume=r, company=f'Company {i}', role='Backend Engineer',
+                                            start_date=day, end_date=day, description='Shipped APIs. ' * 8),
+        Education: lambda r, i: Education(resume=r, institute='State University', degree='BSc Computer Science'),
+        Skill: lambda r, i: Skill(resume=r, name=f'Skill {i}', level='Expert'),
+        Achievement: lambda r, i: Achievement(resume=r, title=f'Award {i}', issuer='hackathon_platform'),
+    }
+    for model, n in PER_RESUME.items():
+        model.objects.bulk_create([rows[model](r, i) for r in resumes for i in range(n)], batch_size=5000)
+    stale_ids = [r.pk for r in resumes[:int(len(resumes) * args.stale)]]
+    Resume.objects.filter(pk__in=stale_ids).update(last_updated=timezone.now() - datetime.timedelta(days=3 * 365))
+
+
+def table_sizes():
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        db_bytes = pages * cursor.fetchone()[0]
+    hot_rows = sum(model.objects.count() for model in HOT)
+    return hot_rows, db_bytes
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<48} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+call_command('migrate', verbosity=0)
+start = time.perf_counter()
+seed()
+print(f"seeded {args.resumes} resumes in {time.perf_counter() - start:.1f}s")
+
+rows, size = table_sizes()
+print(f"before archiving: {rows} hot rows, database {size / 1e6:.1f} MB")
+cutoff = timezone.now() - datetime.timedelta(days=365)
+raw = stored = 0
+start = time.perf_counter()
+for _archived, raw_bytes, stored_bytes in archive.archive_stale(cutoff):
+    raw, stored = raw + raw_bytes, stored + stored_bytes
+print(f"archived {ArchivedResume.objects.count()} resumes in {time.perf_counter() - start:.1f}s "
+      f"({raw / 1e6:.1f} MB JSON -> {stored / 1e6:.1f} MB compressed)")
+rows, size = table_sizes()
+print(f"after archiving:  {rows} hot rows, database {size / 1e6:.1f} MB")
+
+archived_ids = list(ArchivedResume.objects.values_list('resume_id', flat=True)[:100])
+start = time.perf_counter()
+for pk in archived_ids:
+    archive.restore(pk)
+print(f"restore: {(time.perf_counter() - start) * 1000 / len(archived_ids):.2f} ms per resume")
+
+hot_ids = list(Resume.objects.order_by('pk').values_list('pk', flat=True))
+collector_ids, set_ids = hot_ids[:args.delete], hot_ids[args.delete:2 * args.delete]
+
+
+def collector_delete():
+    # what ResumeViewSet.perform_destroy used to do, for a whole set at once
+    with transaction.atomic(), changes.batch():
+        Resume.objects.filter(pk__in=collector_ids).delete()
+
+
+print(f"deleting {args.delete} resumes with {sum(PER_RESUME.values())} section rows each:")
+timed("  Django collector cascade (+ signals)", collector_delete)
+timed("  archive.hard_delete (one DELETE per table)", lambda: archive.hard_delete(set_ids))
@@ -0,0 +1,81 @@
+# scripts/bench_payloads.py
+"""
+Wire size and CPU cost of a large nested resume in each response format:
+JSON vs MessagePack, each uncompressed and through every available codec
+(gzip / brotli / zstd). Needs no database.
+
+Run: python scripts/bench_payloads.py --items 200
+"""
+import argparse
+import datetime
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--items', type=int, default=200, help="Entries per resume section.")
+parser.add_argument('--repeat', type=int, default=50)
+args = parser.parse_args()
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from resumes.compression import available_codecs  # noqa: E402
+
+
+def resume_payload(n):
+    """Shaped like ResumeSerializer output."""
+    day = datetime.date(2020, 1, 1).isoformat()
+    return {
+        'id': 1, 'owner': 1, 'title': 'Senior Backend Engineer',
+        'summary_text': 'Backend developer experienced in Python, Django and PostgreSQL. ' * 3,
+        'last_updated': '2026-10-19T12:00:00.000000Z',
+        'projects': [{'id': i, 'resume': 1, 'title': f'Project {i}', 'description': f'Built service {i} for payments.',
+                      'tech_stack': 'Python, Django, Redis', 'link': f'https://example.com/p/{i}',
+                      'start_date': day, 'end_date': None} for i in range(n)],
+        'experiences': [{'id': i, 'resume': 1, 'company': f'Company {i % 20}', 'role': 'Backend Engineer',
+                         'start_date': day, 'end_date': day, 'description': 'Designed and shipped APIs.'}
+                        for i in range(n)],
+        'educations': [{'id': i, 'resume': 1, 'institute': 'State University', 'degree': 'BSc Computer Science',
+                        'start_date': day, 'end_date': day, 'details': ''} for i in range(n)],
+        'skills': [{'id': i, 'resume': 1, 'name': f'Skill {i}', 'level': 'Expert'} for i in range(n)],
+        'achievements': [{'id': i, 'resume': 1, 'title': f'Award {i}', 'date': day, 'issuer': 'hackathon_platform',
+                          'proof_url': None, 'description': ''} for i in range(n)],
+    }
+
+
+def per_call_us(fn):
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        result = fn()
+    return (time.perf_counter() - start) / args.repeat * 1e6, result
+
+
+data = resume_payload(args.items)
+formats = {'json': (JSONRenderer(), lambda body: JSONParser().parse(io.BytesIO(body)))}
+try:
+    import msgpack
+
+    from resumes.renderers import MessagePackRenderer
+    formats['msgpack'] = (MessagePackRenderer(), lambda body: msgpack.unpackb(body))
+except ImportError:
+    print("msgpack not installed; MessagePack rows skipped")
+
+codecs = available_codecs()
+print(f"resume with {args.items} entries per section; codecs: {', '.join(codecs)}")
+print(f"{'format':<16} {'bytes':>10} {'encode us':>11} {'decode us':>11}")
+for name, (renderer, parse) in formats.items():
+    render_us, body = per_call_us(lambda: renderer.render(data))
+    parse_us, _ = per_call_us(lambda: parse(body))
+    print(f"{name:<16} {len(body):>10} {render_us:>11.0f} {parse_us:>11.0f}")
+    for codec in codecs.values():
+        compress_us, packed = per_call_us(lambda: codec.compress(body))
+        print(f"  + {codec.name:<12} {len(packed):>10} {render_us + compress_us:>11.0f}")
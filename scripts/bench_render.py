@@ -0,0 +1,126 @@
+# scripts/bench_render.py
+"""
+Resume rendering throughput (renders/sec) per theme on a throwaway SQLite
+database:
+
+  cold      - nothing cached: load the resume, build the tree, render every section
+  warm      - tree and section fragments cached: only the page template runs
+  edited    - one section changed since the last render: tree rebuilt, one fragment rendered
+  pdf       - PDF laid out from the cached tree
+
+Pass --no-cached-loader to compile templates on every render, as Django's
+plain filesystem/app loaders do.
+
+Run: python scripts/bench_render.py --resumes 200 --items 10
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--resumes', type=int, default=200)
+parser.add_argument('--items', type=int, default=10, help="Entries per resume section.")
+parser.add_argument('--no-cached-loader', action='store_true')
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+tmpdir = tempfile.mkdtemp()
+settings.DATABASES['default']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+settings.RESUME_CACHE_SHARED = True  # one process
+if args.no_cached_loader:
+    settings.TEMPLATES[0]['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from resumes import caching, documents  # noqa: E402
+from resumes.models import Resume, Project, Experience, Education, Skill, Achievement  # noqa: E402
+from resumes.serializers import CHILD_SERIALIZERS  # noqa: E402
+from users.models import User  # noqa: E402
+
+
+def seed():
+    owners = User.objects.bulk_create([User(username=f'user{i}', first_name='Test', last_name=f'User {i}')
+                                       for i in range(args.resumes)])
+    resumes = Resume.objects.bulk_create([
+        Resume(owner=owner, title='Senior Backend Engineer', summary_text='Backend developer. ' * 10)
+        for owner in owners
+    ])
+    day = datetime.date(2018, 1, 1)
+    n = args.items
+    Project.objects.bulk_create([Project(resume=r, title=f'Project {i}', description='Built things. ' * 8,
+                                         tech_stack='Python, Django', link=f'https://example.com/{i}',
+                                         start_date=day) for r in resumes for i in range(n)])
+    Experience.objects.bulk_create([Experience(resume=r, company=f'Company {i}', role='Backend Engineer',
+                                               start_date=day, end_date=day, description='Shipped APIs. ' * 8)
+                                    for r in resumes for i in range(n)])
+    Education.objects.bulk_create([Education(resume=r, institute='State University', degree='BSc',
+                                             start_date=day, end_date=day) for r in resumes for i in range(n)])
+    Skill.objects.bulk_create([Skill(resume=r, name=f'Skill {i}', level='Expert')
+                               for r in resumes for i in range(n)])
+    Achievement.objects.bulk_create([Achievement(resume=r, title=f'Award {i}', issuer='hackathon_platform',
+                                                 date=day) for r in resumes for i in range(n)])
+    return resumes
+
+
+def loader(resume):
+    return lambda: (Resume.objects.select_related('owner').prefetch_related(*CHILD_SERIALIZERS)
+                    .get(pk=resume.pk))
+
+
+def clear():
+    caching.local.clear()
+    caches[settings.RESUME_CACHE].clear()
+
+
+def html(resume, theme):
+    doc = documents.document_for(resume.owner_id, resume.pk, loader(resume))
+    return documents.render_html(doc, theme)
+
+
+def pdf(resume, theme):
+    doc = documents.document_for(resume.owner_id, resume.pk, loader(resume))
+    return documents.render_pdf(doc, theme)
+
+
+def rate(resumes, render, before=None):
+    elapsed = 0.0
+    for resume in resumes:
+        if before:
+            before(resume)
+        start = time.perf_counter()
+        render(resume)
+        elapsed += time.perf_counter() - start
+    return len(resumes) / elapsed
+
+
+def edit_skill(resume):
+    # a single-row write: the change feed bumps the owner's cache version
+    Skill.objects.create(resume=resume, name=f'New skill {time.perf_counter_ns()}', level='Beginner')
+
+
+call_command('migrate', verbosity=0)
+resumes = seed()
+print(f"{args.resumes} resumes, {args.items} entries per section, "
+      f"{'plain' if args.no_cached_loader else 'cached'} template loader")
+print(f"{'theme':<10} {'cold/s':>9} {'warm/s':>9} {'edited/s':>9} {'pdf/s':>9}")
+for theme in documents.THEMES:
+    clear()
+    cold = rate(resumes, lambda r: html(r, theme), before=lambda r: clear())
+    rate(resumes, lambda r: html(r, theme))  # the cold pass kept only the last resume cached
+    warm = rate(resumes, lambda r: html(r, theme))
+    edited = rate(resumes, lambda r: html(r, theme), before=edit_skill)
+    pdf_rate = rate(resumes, lambda r: pdf(r, theme))
+    print(f"{theme:<10} {cold:>9.0f} {warm:>9.0f} {edited:>9.0f} {pdf_rate:>9.0f}")
@@ -0,0 +1,116 @@
+# scripts/bench_sharding.py
+"""
+Cross-shard fan-out on throwaway SQLite shard files: the same analytics
+rebuild, bulk export and admin search run one shard after another and with
+one thread per shard, plus the time one owner's writes pause during an
+online move. Local SQLite files answer in microseconds, so fan-out mostly
+adds thread overhead; --latency-ms adds a sleep per query to stand in for
+the round trip to a networked database, which is what fan-out overlaps.
+
+Run: python scripts/bench_sharding.py --shards 4 --resumes 20000
+     python scripts/bench_sharding.py --latency-ms 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--shards', type=int, default=4)
+parser.add_argument('--resumes', type=int, default=20_000)
+parser.add_argument('--latency-ms', type=float, default=0, help="Simulated round trip added to every query.")
+parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement; the best is reported.")
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+tmpdir = tempfile.mkdtemp()
+aliases = [f'shard{i}' for i in range(1, args.shards + 1)]
+settings.DATABASES = {alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(tmpdir, f'{alias}.sqlite3')}
+                      for alias in ['default'] + aliases}
+settings.RESUME_SHARDS = aliases
+settings.RESUME_CACHE_SHARED = True  # one process
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from resumes import analytics, export, sharding  # noqa: E402
+from resumes.models import Resume, Skill, Achievement  # noqa: E402
+from users.models import User  # noqa: E402
+
+
+def seed():
+    for alias in settings.DATABASES:
+        call_command('migrate', database=alias, verbosity=0)
+    owners = User.objects.bulk_create([User(username=f'user{i}') for i in range(max(1, args.resumes // 4))])
+    placement = sharding.partition(owners, owner_of=lambda owner: owner.pk)
+    for alias, group in placement.items():
+        with sharding.use(alias):
+            resumes = Resume.objects.bulk_create([
+                Resume(owner=group[i % len(group)], title=f'Resume {i}', summary_text='Backend developer. ' * 10)
+                for i in range(args.resumes * len(group) // len(owners))
+            ], batch_size=5000)
+            Skill.objects.bulk_create([Skill(resume=r, name=f'Skill {i}', level='Expert')
+                                       for r in resumes for i in range(8)], batch_size=5000)
+            Achievement.objects.bulk_create([Achievement(resume=r, title=f'Award {i}', issuer='hackathon_platform')
+                                             for r in resumes for i in range(2)], batch_size=5000)
+    return owners
+
+
+def best(fn):
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def search():
+    def shard_matches(alias):
+        return list(Resume.objects.filter(Q(title__startswith='Resume 1') | Q(owner_id__in=[1, 2]))
+                    .order_by('-last_updated', '-id').values('id', 'last_updated')[:20])
+    return sharding.fan_out(shard_matches)
+
+
+start = time.perf_counter()
+owners = seed()
+print(f"seeded {args.resumes} resumes on {args.shards} shards in {time.perf_counter() - start:.1f}s")
+
+if args.latency_ms:
+    execute = SQLiteCursorWrapper.execute
+
+    def slow_execute(self, query, params=None):
+        time.sleep(args.latency_ms / 1000)
+        return execute(self, query, params)
+
+    SQLiteCursorWrapper.execute = slow_execute
+    print(f"every query now waits {args.latency_ms:g} ms")
+
+cases = (
+    ('analytics rebuild', analytics.compute),
+    ('export (NDJSON documents)', lambda: sum(1 for _doc in export.iter_documents())),
+    ('search (title prefix)', search),
+)
+print(f"\n{'':<28} {'serial ms':>10} {'fan-out ms':>11} {'speedup':>8}")
+for label, fn in cases:
+    with mock.patch.object(sharding, '_inline', return_value=True):
+        serial = best(fn)
+    parallel = best(fn)
+    print(f"{label:<28} {serial:>10.1f} {parallel:>11.1f} {serial / parallel:>7.2f}x")
+
+owner = max(owners, key=lambda o: Resume.objects.using(sharding.shard_for(o.pk)).filter(owner=o).count())
+source = sharding.shard_for(owner.pk)
+target = next(alias for alias in aliases if alias != source)
+start = time.perf_counter()
+copied = sharding.move_owner(owner.pk, target, settle=0)
+print(f"\nmove owner {owner.pk} {source} -> {target}: {sum(copied.values())} rows, "
+      f"{(time.perf_counter() - start) * 1000:.1f} ms including the purge")
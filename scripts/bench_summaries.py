@@ -0,0 +1,26 @@
+# scripts/bench_summaries.py
+"""
+Throughput and failure behaviour of summary providers, offline (StubProvider).
+Run via shell: python manage.py shell -c "exec(open('scripts/bench_summaries.py').read())"
+"""
+import time
+
+from resumes.summaries import StubProvider
+
+PROMPTS = [f"Name: user{i}\nSkills: Python, Django\n" for i in range(200)]
+LATENCY = 0.02  # simulated round trip per provider call
+
+
+def run(label, provider):
+    start = time.perf_counter()
+    results = provider.summarize_many(PROMPTS)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for r in results if r)
+    print(f"{label:<40} {len(PROMPTS) / elapsed:8.1f} prompts/s  calls={provider.calls:<4} "
+          f"ok={ok:<4} fallback={len(PROMPTS) - ok}")
+
+
+run("batch_size=1", StubProvider(latency=LATENCY, batch_size=1))
+run("batch_size=10", StubProvider(latency=LATENCY, batch_size=10))
+run("batch_size=1, every 3rd call fails", StubProvider(latency=LATENCY, fail_every=3))
+run("batch_size=1, always failing, breaker=5", StubProvider(latency=LATENCY, fail_every=1, failure_threshold=5))
@@ -0,0 +1,51 @@
+# scripts/bench_throttling.py
+"""
+Measure the per-request overhead of the rate limiter and concurrency cap.
+Run via shell: python manage.py shell -c "exec(open('scripts/bench_throttling.py').read())"
+"""
+import time
+
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from resumes.throttling import UserBucketThrottle, limit_concurrency
+
+N = 50000
+cache.clear()
+
+factory = APIRequestFactory()
+
+
+class BenchUser:
+    pk = 1
+    is_authenticated = True
+
+
+request = Request(factory.get('/api/resumes/'))
+request.user = BenchUser()
+
+
+def bench(label, fn):
+    start = time.perf_counter()
+    for _ in range(N):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / N * 1e6:8.2f} us/call")
+
+
+class Unlimited(UserBucketThrottle):
+    THROTTLE_RATES = {'user': f'{N * 10}/s'}
+
+
+bench("token bucket allow_request", lambda: Unlimited().allow_request(request, None))
+
+
+@limit_concurrency('pdf')
+def noop():
+    return None
+
+
+bench("concurrency cap (acquire+release)", noop)
+bench("baseline (empty call)", lambda: None)
+cache.clear()
@@ -0,0 +1,109 @@
+# scripts/bench_webhooks.py
+"""
+Webhook verification cost and replay-flood throughput. Needs no database:
+replays are rejected before the view touches one, and the script checks
+that no query was issued.
+
+  verify   - signature check + replay-cache insert for fresh deliveries, per
+             body size, and the cost of rejecting a replay per cache tier
+  flood    - one delivery replayed --replays times through the full DRF view,
+             with the in-process replay cache and with only the shared cache
+
+Run: python scripts/bench_webhooks.py --replays 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--deliveries', type=int, default=20_000, help="Fresh deliveries verified per body size.")
+parser.add_argument('--replays', type=int, default=20_000)
+args = parser.parse_args()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.WEBHOOK_SOURCES = {'bench': ['bench-secret']}
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from resumes import webhooks  # noqa: E402
+from resumes.throttling import WebhookRateThrottle  # noqa: E402
+from resumes.views import IntegrationWebhookAPIView  # noqa: E402
+
+
+def delivery(size, nonce):
+    body = json.dumps({'source': 'bench', 'external_id': nonce, 'type': 'achievement',
+                       'data': {'title': 'Prize', 'description': 'x' * size}, 'target_resume_id': 1}).encode()
+    timestamp = str(int(time.time()))
+    return body, {
+        'X-Webhook-Source': 'bench',
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Nonce': nonce,
+        'X-Webhook-Signature': webhooks.sign('bench-secret', timestamp, body, nonce),
+    }
+
+
+print(f"{'verify fresh deliveries':<34} {'us/call':>9}")
+for size in (256, 4096, 65536):
+    batch = [delivery(size, f'{size}-{i}') for i in range(args.deliveries)]
+    start = time.perf_counter()
+    for body, headers in batch:
+        webhooks.verify(headers, body)
+    elapsed = time.perf_counter() - start
+    print(f"  body {size:>6} bytes{'':<15} {elapsed / args.deliveries * 1e6:>9.1f}")
+
+body, headers = delivery(1024, 'replayed')
+webhooks.verify(headers, body)  # the original delivery
+
+
+def reject_replays(local_tier):
+    start = time.perf_counter()
+    for _ in range(args.replays):
+        if not local_tier:
+            webhooks.replays.clear()  # as if every replay hit a different worker
+        try:
+            webhooks.verify(headers, body)
+        except webhooks.ReplayedDelivery:
+            pass
+        else:
+            raise AssertionError("replay accepted")
+    return (time.perf_counter() - start) / args.replays * 1e6
+
+
+print(f"  replay, in-process cache hit{'':<5} {reject_replays(True):>9.1f}")
+print(f"  replay, shared cache only{'':<8} {reject_replays(False):>9.1f}")
+
+factory = APIRequestFactory()
+view = IntegrationWebhookAPIView.as_view()
+meta = {'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()}
+
+
+def flood(local_tier):
+    codes = {}
+    with mock.patch.object(WebhookRateThrottle, 'THROTTLE_RATES', {'webhook': None}), \
+            CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(args.replays):
+            if not local_tier:
+                webhooks.replays.clear()  # as if every replay hit a different worker
+            response = view(factory.post('/api/integrations/webhook/', body, content_type='application/json',
+                                         **meta))
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - start
+    return args.replays / elapsed, elapsed / args.replays * 1e6, codes, len(queries)
+
+
+print(f"\n{'replay flood (full view)':<34} {'req/s':>9} {'us/req':>9}  statuses  queries")
+for label, local_tier in (('in-process + shared cache', True), ('shared cache only', False)):
+    rate, per_request, codes, query_count = flood(local_tier)
+    print(f"  {label:<32} {rate:>9.0f} {per_request:>9.1f}  {codes}  {query_count}")
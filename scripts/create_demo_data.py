@@ -4,7 +4,6 @@ Run: python manage.py runscript create_demo_data
 Or run via shell: python manage.py shell -c "exec(open('scripts/create_demo_data.py').read())"
 """
 from django.contrib.auth import get_user_model
-from resumes.models import Resume, Project, Experience, Skill, Achievement, Education
 User = get_user_model()
 
 username = "demo"
@@ -22,13 +21,14 @@ if created:
 else:
     print(f"User {username} already exists")
 
-resume = Resume.objects.create(owner=user, title="Demo Resume", summary_text="Sample summary created for demo.")
+# through the related managers, so the rows land on the owner's shard
+resume = user.resumes.create(title="Demo Resume", summary_text="Sample summary created for demo.")
 print("Created resume id:", resume.id)
 
-Project.objects.create(resume=resume, title="SmartResume", description="Auto resume generator", tech_stack="Django,DRF")
-Experience.objects.create(resume=resume, company="InternCo", role="Backend Intern", start_date="2024-01-01", description="Worked on backend features")
-Education.objects.create(resume=resume, institute="ABC University", degree="B.Tech", start_date="2019-07-01", end_date="2023-05-01")
-Skill.objects.create(resume=resume, name="Django", level="Expert")
-Achievement.objects.create(resume=resume, title="1st Prize - SmartResume Hack", issuer="Hackathon", description="Built resume auto-generator")
+resume.projects.create(title="SmartResume", description="Auto resume generator", tech_stack="Django,DRF")
+resume.experiences.create(company="InternCo", role="Backend Intern", start_date="2024-01-01", description="Worked on backend features")
+resume.educations.create(institute="ABC University", degree="B.Tech", start_date="2019-07-01", end_date="2023-05-01")
+resume.skills.create(name="Django", level="Expert")
+resume.achievements.create(title="1st Prize - SmartResume Hack", issuer="Hackathon", description="Built resume auto-generator")
 
 print("Demo data created. Resume id:", resume.id)
@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from resumes.paginators import EstimatedCountPaginator
 from .models import User
 
 @admin.register(User)
 class UserAdmin(DjangoUserAdmin):
-    pass 
+    # whole username in any case (UPPER() index on PostgreSQL, migration 0003)
+    # and email prefix; the default icontains on four columns scans the table
+    search_fields = ('username__iexact', '^email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
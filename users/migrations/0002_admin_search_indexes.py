@@ -0,0 +1,28 @@
+# PostgreSQL expression index for the admin's '^email' prefix search
+# (UPPER(email) LIKE UPPER('term%')); other backends are left unchanged.
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS "users_user_email_upper_like" '
+            'ON "users_user" (UPPER("email") varchar_pattern_ops)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS "users_user_email_upper_like"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
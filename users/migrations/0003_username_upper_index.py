@@ -0,0 +1,30 @@
+# PostgreSQL expression index for the admin's case-insensitive username search
+# (username__iexact runs as UPPER(username) = UPPER('term')); the unique index
+# on username only serves case-sensitive lookups. Other backends are left
+# unchanged.
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS "users_user_username_upper" '
+            'ON "users_user" (UPPER("username"))'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS "users_user_username_upper"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
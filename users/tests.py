@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+User = get_user_model()
+
+
+class AuthApiTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='demo', password='DemoPass123', email='demo@example.com')
+
+    def test_register_then_obtain_token_and_read_me(self):
+        resp = self.client.post(reverse('auth-register'), {
+            'username': 'newbie', 'email': 'newbie@example.com', 'password': 'NewbiePass123', 'first_name': 'New',
+        }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotIn('password', resp.data)
+
+        resp = self.client.post(reverse('token_obtain_pair'), {'username': 'newbie', 'password': 'NewbiePass123'},
+                                format='json')
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(reverse('auth-me'), HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.assertEqual((resp.data['username'], resp.data['first_name']), ('newbie', 'New'))
+
+    def test_register_rejects_short_passwords_and_taken_usernames(self):
+        resp = self.client.post(reverse('auth-register'), {'username': 'short', 'password': 'abc'}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('password', resp.data)
+        resp = self.client.post(reverse('auth-register'), {'username': 'demo', 'password': 'AnotherPass123'},
+                                format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('username', resp.data)
+
+    def test_token_requires_valid_credentials_and_refreshes(self):
+        resp = self.client.post(reverse('token_obtain_pair'), {'username': 'demo', 'password': 'wrong'}, format='json')
+        self.assertEqual(resp.status_code, 401)
+        resp = self.client.post(reverse('token_obtain_pair'), {'username': 'demo', 'password': 'DemoPass123'},
+                                format='json')
+        resp = self.client.post(reverse('token_refresh'), {'refresh': resp.data['refresh']}, format='json')
+        self.assertIn('access', resp.data)
+        self.assertEqual(self.client.get(reverse('auth-me')).status_code, 401)